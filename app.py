@@ -1,36 +1,24 @@
 import streamlit as st
 import pandas as pd
-import io
-from inventoryUpload.inveUpload import request_signed_url, upload_csv
+from inventoryUpload.journal import SyncJournal
+from inventoryUpload.jobs import SyncQueue, SyncWorkers
+from inventoryUpload.callbacks import CallbackServer, UploadStatusStore, configured_callback
+from inventoryUpload.pull import PullState, pull_inventory
 from authentication.tokening import getHeaders
+from catalog.cache import catalog_signature
+from catalog.database import CatalogDatabase, DatabaseCatalog
+from catalog.query import query_page
+from catalog.search import search_service
+from catalog.grid import MODIFIED_COLUMN, REVERT_COLUMN, grid_frame, diff_edits
+from catalog.bulk import BulkEdit, apply_bulk, parse_plus, preview_bulk, select_rows
+from catalog.imports import apply_updates, read_updates
+from catalog.reconcile import plan_merge, take_remote
+from catalog.locations import LocationInventory, configured_locations, configured_location_accounts, plan_sync
+from instrumentation import metrics
+import threading
+import uuid
 from datetime import datetime
 
-def convert_to_upload_format(df_or_series, location="Times Square"):
-    """
-    Convert product catalog to Deliverect inventory upload format.
-    Format: location | plu | stock status | stock | price
-    """
-    # Handle both single row (Series) and DataFrame
-    if isinstance(df_or_series, pd.Series):
-        # Single product
-        upload_df = pd.DataFrame({
-            'location': [location],
-            'plu': [df_or_series['PLU']],
-            'stock status': [df_or_series['Stock Status']],
-            'stock': [df_or_series['Stock Quantity']],
-            'price': [df_or_series['Base Price']]
-        })
-    else:
-        # Multiple products
-        upload_df = pd.DataFrame({
-            'location': location,
-            'plu': df_or_series['PLU'],
-            'stock status': df_or_series['Stock Status'],
-            'stock': df_or_series['Stock Quantity'],
-            'price': df_or_series['Base Price']
-        })
-    return upload_df
-
 # Page configuration
 st.set_page_config(
     page_title="DPOS | Inventory Management System",
@@ -39,7 +27,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for POS/ERP styling
+# Custom CSS for POS/ERP styling, all sent in one block per run
 st.markdown("""
     <style>
     /* Header styling */
@@ -97,31 +85,143 @@ st.markdown("""
         border-radius: 8px;
         overflow: hidden;
     }
+    
+    /* Page navigation */
+    .pagination-container {
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+        padding: 1rem 0;
+        gap: 1rem;
+    }
+    .page-info {
+        opacity: 0.7;
+        font-size: 0.9rem;
+        font-weight: 500;
+    }
+    
+    /* Custom pagination button styling - adapts to theme */
+    div[data-testid="column"] > div > div > button[kind="secondary"] {
+        border-radius: 8px;
+        border: 1px solid rgba(102, 126, 234, 0.3);
+        background: rgba(102, 126, 234, 0.05);
+        color: #667eea;
+        font-weight: 600;
+        padding: 0.5rem 1rem;
+        transition: all 0.3s ease;
+    }
+    div[data-testid="column"] > div > div > button[kind="secondary"]:hover {
+        background: rgba(102, 126, 234, 0.15);
+        border-color: #667eea;
+        transform: translateY(-1px);
+        box-shadow: 0 4px 8px rgba(102, 126, 234, 0.25);
+    }
+    div[data-testid="column"] > div > div > button[kind="secondary"]:disabled {
+        background: rgba(0, 0, 0, 0.05);
+        color: rgba(102, 126, 234, 0.3);
+        border-color: rgba(0, 0, 0, 0.1);
+        cursor: not-allowed;
+        opacity: 0.5;
+    }
     </style>
 """, unsafe_allow_html=True)
 
-# Load CSV data
-@st.cache_data
-def load_data():
-    df = pd.read_csv("itemCsv/DemoITems.csv")
-    
-    # Add stock management columns if they don't exist
-    if 'Stock Status' not in df.columns:
-        df['Stock Status'] = 'IN_STOCK'
-    if 'Stock Quantity' not in df.columns:
-        df['Stock Quantity'] = 10
-    
-    return df
+CATALOG_PATH = "itemCsv/DemoITems.csv"
+# The catalog's stock and prices are those of the first configured location
+CATALOG_LOCATION = configured_locations()[0]
+
+# Inventory state pulled from Deliverect, shared by all sessions
+@st.cache_resource
+def load_pull_state():
+    return PullState()
+
+# Open the catalog database once per process; shared by all sessions, each of which only keeps its own
+# edits (logged to the database). The signature argument (mtime/size) makes an edited CSV import again.
+@st.cache_resource(max_entries=1)
+@metrics.timed("load_data")
+def load_data(signature=None):
+    db = CatalogDatabase()
+    db.import_csv(CATALOG_PATH)
+    catalog = DatabaseCatalog(db)
+    # Start from the last state pulled from Deliverect rather than the CSV's defaults
+    pulled = load_pull_state().load([CATALOG_LOCATION])
+    if len(pulled):
+        catalog.adopt(plan_merge(catalog.current.store, pulled, CATALOG_LOCATION).updates)
+    # Build the search index in the background; a search arriving first waits for it
+    base = catalog.current.store
+    threading.Thread(target=search_service(base).index, args=(base,), daemon=True).start()
+    return catalog
+
+# Category lists and counts for the filters, derived once per catalog version rather than on every rerun
+@st.cache_data(max_entries=4)
+def catalog_metadata(_store, version):
+    return {
+        'categories': _store.categories,
+        'category_counts': _store.counts('Category 1'),
+        'categories2': _store.distinct('Category 2'),
+        'status_counts': _store.counts('Stock Status'),
+    }
 
-# Initialize session state
-if 'df' not in st.session_state:
-    st.session_state.df = load_data()
-if 'modified_items' not in st.session_state:
-    st.session_state.modified_items = set()
+# Per-location inventory, shared by all sessions so every sync plans against the same state
+@st.cache_resource(max_entries=1)
+def load_inventory(signature=None):
+    base = load_data(signature).current.store
+    inventory = LocationInventory(
+        base.plu,
+        base.values('Base Price'),
+        configured_locations(),
+        stock=base.values('Stock Quantity'),
+        status=base.values('Stock Status'),
+    )
+    inventory.adopt(load_pull_state().load(inventory.locations))
+    return inventory
+
+# Last acknowledged state per (location, PLU), shared by all sessions
+@st.cache_resource
+def load_journal():
+    return SyncJournal()
+
+# Receives Deliverect's upload callbacks in a background thread, once per process
+@st.cache_resource
+def load_callbacks():
+    host, port, public_url = configured_callback()
+    store = UploadStatusStore()
+    try:
+        server = CallbackServer(store, host, port).start()
+    except OSError:
+        # Port taken (e.g. a second app process); any free port still records local callbacks
+        server = CallbackServer(store, host, 0).start()
+    return store, public_url or server.url
+
+# Durable sync queue and its background workers, once per process
+@st.cache_resource
+def load_sync_workers():
+    upload_status, _ = load_callbacks()
+    return SyncWorkers(SyncQueue(), journal=load_journal(), upload_status=upload_status).start()
+
+metrics.count("reruns")
+
+# Initialize session state: the session's edits over the shared catalog, logged under a workspace id
+# kept in the URL, so reopening the URL (e.g. after a restart) picks up unsynced edits
+if 'workspace' not in st.query_params:
+    st.query_params['workspace'] = uuid.uuid4().hex[:12]
+signature = catalog_signature(CATALOG_PATH)
+shared_catalog = load_data(signature)
+if 'store' not in st.session_state or st.session_state.store.shared is not shared_catalog:
+    st.session_state.store, st.session_state.changes = shared_catalog.session(st.query_params['workspace'])
+inventory = load_inventory(signature)
 if 'last_sync' not in st.session_state:
     st.session_state.last_sync = None
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 0
+if 'grid_generation' not in st.session_state:
+    st.session_state.grid_generation = 0
+
+# Pick up syncs other sessions published since this session's last run
+if shared_catalog.refresh(st.session_state.store, st.session_state.changes):
+    st.session_state.grid_generation += 1
+current = shared_catalog.current
+metadata = catalog_metadata(current.store, current.version)
 
 # Header
 st.markdown(f"""
@@ -158,12 +258,67 @@ with st.sidebar:
     )
 
     st.markdown("---")
-    st.caption("📍 Location: Times Square")
-
-    
-    # Hidden settings (still needed for functionality)
-    location = "Times Square"  # Default location
-    callback_url = "https://example.com/callback"  # Default callback URL
+    locations = inventory.locations
+    sync_locations = st.multiselect("📍 Locations", locations, default=locations[:1])
+    location_accounts = configured_location_accounts()
+
+    # Upload processing status reported back by Deliverect
+    upload_status, callback_url = load_callbacks()
+
+    # Sync jobs run in the background; this panel polls them and the upload status every few seconds
+    sync_workers = load_sync_workers()
+
+    @st.fragment(run_every=2)
+    def sync_status():
+        status_counts = upload_status.counts()
+        if status_counts:
+            st.markdown("**📬 Upload Status**")
+            st.caption(" · ".join(f"{status}: {count}" for status, count in sorted(status_counts.items())))
+
+        jobs = sync_workers.queue.recent(5)
+        if not jobs:
+            return
+        st.markdown("**🚚 Sync Jobs**")
+        if st.session_state.last_sync:
+            st.caption(f"🕒 Last sync: {st.session_state.last_sync}")
+        for job in jobs:
+            label = f"#{job['id']} {job['account_id']} · {job['rows']:,} rows"
+            if job['status'] == "running":
+                total = max(job['chunks_total'], 1)
+                st.progress(job['chunks_done'] / total, text=f"{label} · {job['chunks_done']}/{job['chunks_total']} chunks")
+            elif job['status'] == "done":
+                report = job['report']
+                st.caption(
+                    f"✅ {label} · {report['rows']:,} uploaded in {report['chunks']} chunks · "
+                    f"{report['bytes_sent'] / 1024:,.1f} KiB · {report['bytes_per_second'] / 1024:,.1f} KiB/s"
+                )
+            elif job['status'] == "failed":
+                st.caption(f"❌ {label} · {job['error']}")
+                if st.button("Retry", key=f"retry_job_{job['id']}"):
+                    sync_workers.queue.retry(job['id'])
+                    sync_workers.notify()
+            else:
+                st.caption(f"⏳ {label} · queued")
+
+    sync_status()
+
+    # Latency of the instrumented hot paths so far (this run's filter/render show up next run)
+    if metrics.ENABLED:
+        with st.expander("📈 Performance"):
+            timings = metrics.summary()
+            if timings:
+                latency = pd.DataFrame(timings).set_index('name')[['count', 'p50', 'p95', 'max']]
+                latency[['p50', 'p95', 'max']] *= 1000
+                st.dataframe(
+                    latency,
+                    column_config={
+                        'count': st.column_config.NumberColumn("calls", format="%d"),
+                        'p50': st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+                        'p95': st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+                        'max': st.column_config.NumberColumn("max (ms)", format="%.1f"),
+                    },
+                )
+            st.download_button("⬇️ Prometheus metrics", metrics.prometheus_text(), file_name="metrics.prom", mime="text/plain")
 
 # Main content area - Table View
 # Toolbar
@@ -173,222 +328,287 @@ with toolbar_col1:
     search_term = st.text_input("🔍 Search Products", placeholder="Product name, PLU, or category...")
 
 with toolbar_col2:
-    category_filter = st.selectbox("Category", ["All"] + sorted(st.session_state.df['Category 1'].unique().tolist()))
+    category_filter = st.selectbox(
+        "Category", ["All"] + metadata['categories'],
+        format_func=lambda c: c if c == "All" else f"{c} ({metadata['category_counts'].get(c, 0):,})",
+    )
 
 with toolbar_col3:
-    stock_filter = st.selectbox("Stock", ["All", "IN_STOCK", "OUT_OF_STOCK"])
+    stock_filter = st.selectbox(
+        "Stock", ["All", "IN_STOCK", "OUT_OF_STOCK"],
+        format_func=lambda s: s if s == "All" else f"{s} ({metadata['status_counts'].get(s, 0):,})",
+    )
 
 with toolbar_col4:
     items_per_page = st.selectbox("Items per page", [20, 50, 100], index=0)
 
 # Sync button at top
-if len(st.session_state.modified_items) > 0:
+if len(st.session_state.changes) > 0:
     st.markdown("")
     sync_col1, sync_col2, sync_col3 = st.columns([2, 2, 2])
     with sync_col2:
-        if st.button(f"🚀 SYNC {len(st.session_state.modified_items)} ITEMS TO DELIVERECT", type="primary", use_container_width=True, key="sync_top"):
-            if not account_id:
+        if st.button(f"🚀 SYNC {len(st.session_state.changes)} ITEMS TO DELIVERECT", type="primary", use_container_width=True, key="sync_top"):
+            if not account_id and not location_accounts:
                 st.error("⚠️ Account ID required")
+            elif not sync_locations:
+                st.error("⚠️ Select at least one location")
             else:
                 try:
-                    with st.spinner(f"⏳ Syncing {len(st.session_state.modified_items)} items..."):
-                        # Get all modified products
-                        modified_products = st.session_state.df.loc[list(st.session_state.modified_items)]
-                        
-                        # Convert to upload format
-                        upload_df = convert_to_upload_format(modified_products, location)
-                        
-                        # Convert to CSV
-                        csv_buffer = io.StringIO()
-                        upload_df.to_csv(csv_buffer, index=False)
-                        csv_text = csv_buffer.getvalue()
-                        
-                        # Upload
-                        signed_url, upload_headers, file_id = request_signed_url(account_id, callback_url)
-                        upload_csv(csv_text, signed_url, upload_headers)
-                        
-                        # Clear modifications and update sync time
-                        st.session_state.modified_items.clear()
-                        st.session_state.last_sync = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        
-                        st.success(f"✅ Successfully synced {len(modified_products)} items!")
-                        st.rerun()
+                    # Get all modified products (rows edited back to their synced values drop out)
+                    modified_rows = st.session_state.changes.modified_rows()
+                    modified_products = st.session_state.store.take(modified_rows)
+                    
+                    # Fan the edits out to the selected locations and plan one upload per account
+                    with inventory.lock:
+                        inventory.apply_catalog(
+                            sync_locations,
+                            modified_products['PLU'],
+                            modified_products['Stock Quantity'],
+                            modified_products['Stock Status'],
+                            modified_products['Base Price'],
+                        )
+                        plans = plan_sync(inventory, location_accounts, default_account=account_id or None)
+
+                        # Hand the rows to the durable queue; workers diff against the journal and upload
+                        for sync_account, plan in plans.items():
+                            sync_workers.queue.enqueue(sync_account, callback_url, plan['frame'])
+                            inventory.mark_synced(*plan['cells'])
+                    sync_workers.notify()
+                    
+                    # Publish the synced rows as the shared catalog's new version; this session's edits are cleared
+                    shared_catalog.publish(st.session_state.store, st.session_state.changes, modified_rows)
+                    st.session_state.last_sync = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    
+                    st.success(
+                        f"✅ Queued {len(modified_products)} items for "
+                        f"{len(sync_locations)} locations ({len(plans)} accounts)!"
+                    )
+                    st.rerun()
                 except Exception as e:
                     st.error(f"❌ Sync failed: {str(e)}")
+    with sync_col3:
+        if st.button("↺ REVERT ALL", use_container_width=True, key="revert_all"):
+            st.session_state.changes.revert_all()
+            st.session_state.grid_generation += 1
+            st.rerun()
 
-st.markdown("---")
-
-# Apply filters
-filtered_df = st.session_state.df.copy()
-
-if search_term:
-    filtered_df = filtered_df[
-        filtered_df['Name'].str.contains(search_term, case=False, na=False) |
-        filtered_df['PLU'].astype(str).str.contains(search_term, case=False)
-    ]
+# Bulk edits: one vectorized write over every matching row, through the change tracker
+with st.expander("🧰 Bulk Edit"):
+    store = st.session_state.store
+    bulk_col1, bulk_col2, bulk_col3 = st.columns(3)
+    with bulk_col1:
+        bulk_category = st.selectbox("Category 1", ["Any"] + metadata['categories'], key="bulk_category")
+        bulk_category2 = st.selectbox("Category 2", ["Any"] + metadata['categories2'], key="bulk_category2")
+    with bulk_col2:
+        bulk_status = st.selectbox("Current status", ["Any", "IN_STOCK", "OUT_OF_STOCK"], key="bulk_status")
+        bulk_plus = st.text_area("PLUs", placeholder="Optional, comma or line separated", key="bulk_plus", height=68)
+    with bulk_col3:
+        bulk_field = st.selectbox("Field", ["Stock Status", "Base Price", "Stock Quantity"], key="bulk_field")
+        if bulk_field == "Stock Status":
+            bulk_op = "set"
+            bulk_value = st.selectbox("Set to", ["OUT_OF_STOCK", "IN_STOCK"], key="bulk_value_status")
+        else:
+            bulk_op = st.radio("Operation", ["multiply", "add", "set"], horizontal=True, key="bulk_op")
+            default = 1.05 if bulk_op == "multiply" else 0.0
+            bulk_value = st.number_input("Value", value=default, step=0.01 if bulk_field == "Base Price" else 1.0,
+                                         key=f"bulk_value_{bulk_op}")
+
+    try:
+        bulk_rows = select_rows(
+            store,
+            category=None if bulk_category == "Any" else bulk_category,
+            category2=None if bulk_category2 == "Any" else bulk_category2,
+            stock_status=None if bulk_status == "Any" else bulk_status,
+            plus=parse_plus(bulk_plus) if bulk_plus.strip() else None,
+        )
+        bulk_edit = BulkEdit(bulk_field, bulk_op, bulk_value)
+        preview = preview_bulk(store, bulk_rows, bulk_edit)
+        st.caption(f"{preview.matched:,} items match · {preview.changed:,} would change")
+        if st.button(f"Apply to {preview.changed:,} items", disabled=preview.changed == 0, key="bulk_apply"):
+            apply_bulk(st.session_state.changes, preview.rows, bulk_edit)
+            st.session_state.grid_generation += 1
+            st.rerun()
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+
+# Stock/price file import: streamed, validated and joined on PLU, then merged as pending changes
+with st.expander("📥 Import Stock File"):
+    import_file = st.file_uploader("CSV or XLSX with PLU and price / stock / stock status", type=["csv", "xlsx"], key="import_file")
+    if import_file is not None:
+        import_key = (import_file.name, import_file.size)
+        if st.session_state.get('import_plan', (None,))[0] != import_key:
+            try:
+                with st.spinner("Reading file..."):
+                    st.session_state.import_plan = (import_key, read_updates(st.session_state.store, import_file, import_file.name))
+            except ValueError as e:
+                st.session_state.import_plan = (import_key, None)
+                st.error(f"⚠️ {e}")
+        plan = st.session_state.import_plan[1]
+        if plan is not None:
+            report = plan.report
+            st.caption(
+                f"{report['rows_read']:,} rows read · {report['matched']:,} matched · "
+                f"{len(report['unknown_plus']):,} unknown PLUs · {len(report['duplicate_plus']):,} duplicate PLUs · "
+                f"{report['invalid']:,} invalid rows"
+            )
+            if len(report['unknown_plus']):
+                st.caption("Unknown PLUs: " + ", ".join(map(str, report['unknown_plus'][:20])))
+            if len(report['duplicate_plus']):
+                st.caption("Duplicate PLUs (last row used): " + ", ".join(map(str, report['duplicate_plus'][:20])))
+            if report['errors']:
+                st.dataframe(pd.DataFrame(report['errors']), hide_index=True)
+            if st.button(f"Apply {report['matched']:,} rows", disabled=report['matched'] == 0, key="import_apply"):
+                changed = apply_updates(st.session_state.changes, plan)
+                st.session_state.grid_generation += 1
+                st.toast(" · ".join(f"{field}: {count:,} changed" for field, count in changed.items()))
+                st.rerun()
 
-if category_filter != "All":
-    filtered_df = filtered_df[filtered_df['Category 1'] == category_filter]
+# Reverse sync: pull Deliverect's current inventory (changes since the last pull) and merge it on PLU
+with st.expander("🔄 Pull from Deliverect"):
+    pull_accounts = list(dict.fromkeys(([account_id] if account_id else []) + list(location_accounts.values())))
+    if not pull_accounts:
+        st.caption("⚠️ Account ID required")
+    else:
+        pull_col1, pull_col2 = st.columns([2, 1])
+        with pull_col1:
+            pull_account = st.selectbox("Account", pull_accounts, key="pull_account")
+        with pull_col2:
+            pull_full = st.checkbox("Full pull", help="Fetch everything instead of changes since the last pull", key="pull_full")
+        last_pull = load_pull_state().last_run(pull_account)
+        if last_pull is not None:
+            last_status = "interrupted, resumes" if last_pull['status'] == "running" else last_pull['status']
+            st.caption(
+                f"Last pull: {datetime.fromtimestamp(last_pull['started_at']).strftime('%Y-%m-%d %H:%M:%S')} · "
+                f"{last_pull['rows']:,} rows · {last_status}"
+            )
+        if st.button("Pull inventory", key="pull_start"):
+            # Items without a location belong to the account's only location, if it has one
+            account_locations = [loc for loc, acc in location_accounts.items() if acc == pull_account]
+            progress = st.progress(0.0, text="Pulling...")
+            pages_pulled = []
+
+            def on_page(page, pages_total, rows):
+                pages_pulled.append(page)
+                progress.progress(min(len(pages_pulled) / pages_total, 1.0) if pages_total else 0.0,
+                                  text=f"Pulled {len(pages_pulled)}" + (f" of {pages_total}" if pages_total else "") + " pages")
+
+            try:
+                pull_report = pull_inventory(
+                    pull_account,
+                    load_pull_state(),
+                    full=pull_full,
+                    location=account_locations[0] if len(account_locations) == 1 else CATALOG_LOCATION,
+                    journal=load_journal(),
+                    inventory=inventory,
+                    on_page=on_page,
+                )
+                pulled = load_pull_state().load(run_id=pull_report['run_id'])
+                with inventory.lock:
+                    inventory.adopt(pulled)
+                # Remote changes become the synced state; this session's edits stay on top, conflicts are listed
+                merge = plan_merge(st.session_state.store, pulled, CATALOG_LOCATION, tracker=st.session_state.changes)
+                shared_catalog.adopt(merge.updates)
+                shared_catalog.refresh(st.session_state.store, st.session_state.changes)
+                st.session_state.grid_generation += 1
+                st.session_state.pull_result = (pull_report, merge.report, merge.conflicts)
+                st.rerun()
+            except Exception as e:
+                progress.empty()
+                st.error(f"❌ Pull failed: {str(e)} (pages pulled so far are kept; pulling again resumes)")
+
+    if st.session_state.get('pull_result'):
+        pull_report, merge_report, conflicts = st.session_state.pull_result
+        st.caption(
+            f"{'Resumed · ' if pull_report['resumed'] else ''}{pull_report['rows']:,} rows in {pull_report['pages']} pages · "
+            f"{pull_report['seconds']:.1f}s · {merge_report['matched']:,} matched · "
+            f"{merge_report['unknown_plus']:,} unknown PLUs · "
+            + " · ".join(f"{field}: {count:,} updated" for field, count in merge_report['updated'].items())
+        )
+        if len(conflicts):
+            st.warning(f"⚠️ {len(conflicts):,} of your unsynced edits conflict with changes made in Deliverect")
+            st.dataframe(conflicts.drop(columns='row'), hide_index=True)
+            conflict_col1, conflict_col2 = st.columns(2)
+            with conflict_col1:
+                if st.button("Take remote", key="pull_take_remote", use_container_width=True):
+                    take_remote(st.session_state.changes, conflicts)
+                    st.session_state.pull_result = (pull_report, merge_report, conflicts.iloc[:0])
+                    st.session_state.grid_generation += 1
+                    st.rerun()
+            with conflict_col2:
+                if st.button("Keep local", key="pull_keep_local", use_container_width=True):
+                    st.session_state.pull_result = (pull_report, merge_report, conflicts.iloc[:0])
+                    st.rerun()
 
-if stock_filter != "All":
-    filtered_df = filtered_df[filtered_df['Stock Status'] == stock_filter]
+st.markdown("---")
 
-total_filtered = len(filtered_df)
+# Query only the visible page; filter results are cached per filter signature
+store = st.session_state.store
+with metrics.timer("filter"):
+    page = query_page(
+        store,
+        filters={
+            'search': search_term or None,
+            'category': None if category_filter == "All" else category_filter,
+            'stock_status': None if stock_filter == "All" else stock_filter,
+        },
+        cursor=st.session_state.current_page * items_per_page,
+        page_size=items_per_page,
+    )
+total_filtered = page.total
 
 # Pagination
 total_pages = (total_filtered - 1) // items_per_page + 1 if total_filtered > 0 else 1
-current_page = st.session_state.current_page
-
-# Get page data
-start_idx = current_page * items_per_page
-end_idx = start_idx + items_per_page
-page_data = filtered_df.iloc[start_idx:end_idx]
+current_page = page.cursor // items_per_page
+st.session_state.current_page = current_page
+page_data = page.frame
 
 # Show item count at top
 st.markdown(f"**Showing {min(current_page * items_per_page + 1, total_filtered)} - {min((current_page + 1) * items_per_page, total_filtered)} of {total_filtered} items**")
 st.markdown("")
 
-# Table header
-header_cols = st.columns([3, 1, 1, 1, 1, 1, 1])
-with header_cols[0]:
-    st.markdown("**PRODUCT**")
-with header_cols[1]:
-    st.markdown("**CATEGORY**")
-with header_cols[2]:
-    st.markdown("**PLU**")
-with header_cols[3]:
-    st.markdown("**PRICE ($)**")
-with header_cols[4]:
-    st.markdown("**STOCK**")
-with header_cols[5]:
-    st.markdown("**STATUS**")
-with header_cols[6]:
-    st.markdown("**ACTIONS**")
-
-st.markdown("---")
+# Editable grid: one widget per page, edits come back as a single diff
+with metrics.timer("render"):
+    grid = grid_frame(page_data, st.session_state.changes)
+    grid_key = f"grid_{st.session_state.grid_generation}_{hash(page.rows.tobytes())}"
+    edited = st.data_editor(
+        grid,
+        key=grid_key,
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        disabled=[MODIFIED_COLUMN, 'Name', 'Category 1', 'PLU'],
+        column_config={
+            MODIFIED_COLUMN: st.column_config.CheckboxColumn("🔶", help="Modified since last sync", width="small"),
+            'Name': st.column_config.TextColumn("PRODUCT", width="large"),
+            'Category 1': st.column_config.TextColumn("CATEGORY"),
+            'PLU': st.column_config.NumberColumn("PLU", format="%d"),
+            'Base Price': st.column_config.NumberColumn("PRICE ($)", min_value=0.0, step=0.01, format="%.2f"),
+            'Stock Quantity': st.column_config.NumberColumn("STOCK", min_value=0, step=1, format="%d"),
+            'Stock Status': st.column_config.SelectboxColumn("STATUS", options=["IN_STOCK", "OUT_OF_STOCK"], required=True),
+            REVERT_COLUMN: st.column_config.CheckboxColumn("↺", help="Revert changes", width="small"),
+        },
+    )
 
-# Table rows
-for idx, row in page_data.iterrows():
-    is_modified = idx in st.session_state.modified_items
-    
-    row_cols = st.columns([3, 1, 1, 1, 1, 1, 1])
-    
-    with row_cols[0]:
-        st.markdown(f"{'🔶 ' if is_modified else ''}{row['Name'][:45]}{'...' if len(row['Name']) > 45 else ''}")
-    
-    with row_cols[1]:
-        st.text(row['Category 1'][:15])
-    
-    with row_cols[2]:
-        st.text(str(row['PLU']))
-    
-    with row_cols[3]:
-        new_price = st.number_input(
-            "Price",
-            min_value=0.0,
-            value=float(row['Base Price']),
-            step=0.01,
-            format="%.2f",
-            key=f"price_{idx}",
-            label_visibility="collapsed"
-        )
-        if new_price != float(row['Base Price']):
-            st.session_state.df.at[idx, 'Base Price'] = new_price
-            st.session_state.modified_items.add(idx)
-    
-    with row_cols[4]:
-        new_stock = st.number_input(
-            "Stock",
-            min_value=0,
-            value=int(row['Stock Quantity']),
-            step=1,
-            key=f"stock_{idx}",
-            label_visibility="collapsed"
-        )
-        if new_stock != int(row['Stock Quantity']):
-            st.session_state.df.at[idx, 'Stock Quantity'] = new_stock
-            st.session_state.modified_items.add(idx)
-    
-    with row_cols[5]:
-        new_status = st.selectbox(
-            "Status",
-            options=["IN_STOCK", "OUT_OF_STOCK"],
-            index=0 if row['Stock Status'] == 'IN_STOCK' else 1,
-            key=f"status_{idx}",
-            label_visibility="collapsed"
-        )
-        if new_status != row['Stock Status']:
-            st.session_state.df.at[idx, 'Stock Status'] = new_status
-            st.session_state.modified_items.add(idx)
-    
-    with row_cols[6]:
-        if is_modified:
-            if st.button("↺", key=f"revert_{idx}", help="Revert changes"):
-                # Reload original data for this row
-                original_df = load_data()
-                st.session_state.df.loc[idx] = original_df.loc[idx]
-                st.session_state.modified_items.discard(idx)
-                st.rerun()
-        else:
-            st.text("")
-    
-    st.divider()
+edits = diff_edits(grid, edited)
+revert_rows = edited.index[edited[REVERT_COLUMN]].to_numpy()
+if len(edits) or len(revert_rows):
+    if len(edits):
+        st.session_state.changes.apply_edits(edits)
+    if len(revert_rows):
+        st.session_state.changes.revert_rows(revert_rows)
+    # Start the next run from a fresh editor so applied edits are not replayed
+    st.session_state.grid_generation += 1
+    st.rerun()
 
 st.markdown("---")
 
 # Modern page navigation at bottom
-st.markdown("""
-    <style>
-    .pagination-container {
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        padding: 1rem 0;
-        gap: 1rem;
-    }
-    .page-info {
-        opacity: 0.7;
-        font-size: 0.9rem;
-        font-weight: 500;
-    }
-    </style>
-""", unsafe_allow_html=True)
-
 nav_col1, nav_col2, nav_col3 = st.columns([2, 3, 2])
 
 with nav_col1:
     st.markdown(f'<div class="page-info">Showing <strong>{min(current_page * items_per_page + 1, total_filtered):,}</strong> to <strong>{min((current_page + 1) * items_per_page, total_filtered):,}</strong> of <strong>{total_filtered:,}</strong> items</div>', unsafe_allow_html=True)
 
 with nav_col2:
-    # Modern pagination controls with custom styling
-    st.markdown("""
-        <style>
-        /* Custom pagination button styling - adapts to theme */
-        div[data-testid="column"] > div > div > button[kind="secondary"] {
-            border-radius: 8px;
-            border: 1px solid rgba(102, 126, 234, 0.3);
-            background: rgba(102, 126, 234, 0.05);
-            color: #667eea;
-            font-weight: 600;
-            padding: 0.5rem 1rem;
-            transition: all 0.3s ease;
-        }
-        div[data-testid="column"] > div > div > button[kind="secondary"]:hover {
-            background: rgba(102, 126, 234, 0.15);
-            border-color: #667eea;
-            transform: translateY(-1px);
-            box-shadow: 0 4px 8px rgba(102, 126, 234, 0.25);
-        }
-        div[data-testid="column"] > div > div > button[kind="secondary"]:disabled {
-            background: rgba(0, 0, 0, 0.05);
-            color: rgba(102, 126, 234, 0.3);
-            border-color: rgba(0, 0, 0, 0.1);
-            cursor: not-allowed;
-            opacity: 0.5;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     page_cols = st.columns([1, 1, 2, 1, 1])
     with page_cols[0]:
         if st.button("⏮ First", disabled=current_page == 0, key="first_bottom", use_container_width=True, type="secondary"):
@@ -424,12 +644,12 @@ with nav_col2:
             st.rerun()
 
 with nav_col3:
-    if len(st.session_state.modified_items) > 0:
-        st.markdown(f'<div style="text-align: center; padding: 0.5rem; color: #667eea; font-weight: 600;">📝 {len(st.session_state.modified_items)} items modified</div>', unsafe_allow_html=True)
+    if len(st.session_state.changes) > 0:
+        st.markdown(f'<div style="text-align: center; padding: 0.5rem; color: #667eea; font-weight: 600;">📝 {len(st.session_state.changes)} items modified</div>', unsafe_allow_html=True)
     else:
         st.markdown('<div style="text-align: center; opacity: 0.5; padding: 0.5rem;">No changes</div>', unsafe_allow_html=True)
 
 # Summary footer
-if len(st.session_state.modified_items) > 0:
+if len(st.session_state.changes) > 0:
     st.markdown("---")
-    st.info(f"📝 **{len(st.session_state.modified_items)} items modified** - Scroll to top to sync changes to Deliverect")
+    st.info(f"📝 **{len(st.session_state.changes)} items modified** - Scroll to top to sync changes to Deliverect")
@@ -1,62 +1,272 @@
+import base64
+import hashlib
+import json
+import os
+import threading
 import time
-from datetime import datetime, timedelta
-
-# Token cache
-_token_cache = {
-    'token': None,
-    'expires_at': None
-}
-
-def getToken():
-    import requests
-    import json
-    import os
-    
-    # Check if we have a valid cached token
-    if _token_cache['token'] and _token_cache['expires_at']:
-        if datetime.now() < _token_cache['expires_at']:
-            return _token_cache['token']
-    
-    # Try to get credentials from Streamlit secrets first (for Streamlit Cloud)
+from pathlib import Path
+
+from instrumentation.metrics import timed
+
+TOKEN_URL = "https://api.deliverect.io/oauth/token"
+AUDIENCE = "https://api.deliverect.com"
+
+# Refresh this many seconds before expiry; callers keep the old token meanwhile
+REFRESH_MARGIN = 300
+# Treat tokens this close to expiry as expired to allow for clock skew and latency
+EXPIRY_SKEW = 30
+# Wait before retrying a failed background refresh
+REFRESH_RETRY_SECONDS = 30
+
+# Optional encrypted on-disk cache, enabled by setting TOKEN_CACHE_DIR
+TOKEN_CACHE_DIR = os.getenv("TOKEN_CACHE_DIR")
+
+
+def _fernet_module():
+    """cryptography's fernet module, imported only when a disk cache is configured; None if not installed."""
     try:
-        import streamlit as st
-        client_id = st.secrets.get("CLIENT_ID")
-        client_secret = st.secrets.get("CLIENT_SECRET")
-    except:
-        # Fall back to .env file for local development
+        from cryptography import fernet
+    except ImportError:  # disk cache is optional
+        return None
+    return fernet
+
+
+class TokenProvider:
+    """
+    OAuth token for one client, safe to share between threads.
+
+    Only one fetch is ever in flight: concurrent callers wait for it and share
+    the result. Once a token is held, a background timer refreshes it
+    REFRESH_MARGIN seconds before expiry so callers never block on the network.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, audience: str = AUDIENCE,
+                 url: str = TOKEN_URL, cache_dir=TOKEN_CACHE_DIR):
+        self.client_id = client_id
+        self._client_secret = client_secret
+        self.audience = audience
+        self.url = url
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._inflight = None
+        self._timer = None
+
+        self._cache_path = None
+        self._fernet = None
+        fernet = _fernet_module() if cache_dir else None
+        if fernet is not None:
+            digest = hashlib.sha256(f"{client_id}|{audience}".encode()).hexdigest()[:32]
+            self._cache_path = Path(cache_dir) / f"{digest}.token"
+            # The key derives from the client secret, so only its holder can read the cache
+            key = base64.urlsafe_b64encode(hashlib.sha256(client_secret.encode()).digest())
+            self._fernet = fernet.Fernet(key)
+            self._invalid_token = fernet.InvalidToken
+            self._load_disk_cache()
+
+    # ------------------------------------------------------------------
+    # Public
+    # ------------------------------------------------------------------
+
+    def get(self) -> str:
+        """Return a valid token, fetching it only if none is held or it has expired."""
+        with self._lock:
+            if self._valid():
+                return self._token
+        return self._refresh()
+
+    def invalidate(self):
+        """Drop the held token, e.g. after the API rejected it."""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def _valid(self) -> bool:
+        """Whether the held token can still be used; call with self._lock held."""
+        return bool(self._token) and time.time() < self._expires_at - EXPIRY_SKEW
+
+    def _refresh(self, force: bool = False) -> str:
+        """
+        Single-flight fetch: the first caller fetches, the rest wait for its result.
+        A caller arriving after a fetch finished gets that token unless force
+        (the background refresh, which replaces a token that is still valid).
+        """
+        with self._lock:
+            inflight = self._inflight
+            leader = inflight is None
+            if leader:
+                if not force and self._valid():
+                    return self._token
+                inflight = self._inflight = {"done": threading.Event(), "token": None, "error": None}
+
+        if not leader:
+            inflight["done"].wait()
+            if inflight["error"] is not None:
+                raise inflight["error"]
+            return inflight["token"]
+
+        try:
+            token, expires_in = self._fetch()
+            with self._lock:
+                self._token = token
+                self._expires_at = time.time() + expires_in
+            self._store_disk_cache()
+            self._schedule_refresh()
+            inflight["token"] = token
+            return token
+        except Exception as e:
+            inflight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight["done"].set()
+
+    def _fetch(self):
+        from httpClient import pool
+
+        payload = json.dumps({
+            "client_id": self.client_id,
+            "client_secret": self._client_secret,
+            "audience": self.audience,
+            "grant_type": "token"
+        })
+        headers = {
+            'Content-Type': 'application/json'
+        }
+        response = pool.post(self.url, headers=headers, data=payload, retries=2)
+        response.raise_for_status()
+        data = response.json()
+        # OAuth tokens typically expire in 1 hour; default to that if not provided
+        return data["access_token"], data.get("expires_in", 3600)
+
+    def _schedule_refresh(self, delay: float = None):
+        with self._lock:
+            if delay is None:
+                delay = max(self._expires_at - time.time() - REFRESH_MARGIN, 0)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._background_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh(force=True)
+        except Exception:
+            # The held token may still be valid; try again shortly
+            self._schedule_refresh(REFRESH_RETRY_SECONDS)
+
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+
+    def _load_disk_cache(self):
+        try:
+            blob = self._fernet.decrypt(self._cache_path.read_bytes())
+            cached = json.loads(blob)
+        except (OSError, ValueError, self._invalid_token):
+            return
+        if cached.get("expires_at", 0) - EXPIRY_SKEW > time.time():
+            self._token = cached["token"]
+            self._expires_at = cached["expires_at"]
+            self._schedule_refresh()
+
+    def _store_disk_cache(self):
+        if self._cache_path is None:
+            return
+        blob = self._fernet.encrypt(json.dumps({"token": self._token, "expires_at": self._expires_at}).encode())
+        try:
+            self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._cache_path.with_suffix(".tmp")
+            tmp.write_bytes(blob)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self._cache_path)
+        except OSError:
+            pass  # the cache is best effort
+
+
+# One provider per client id / audience
+_providers = {}
+_providers_lock = threading.Lock()
+_credentials = {}
+_env_loaded = False
+
+
+def _load_env():
+    """Read .env into the environment, once per process."""
+    global _env_loaded
+    if not _env_loaded:
         from dotenv import load_dotenv
         load_dotenv()
-        client_id = os.getenv("CLIENT_ID")
-        client_secret = os.getenv("CLIENT_SECRET")
+        _env_loaded = True
+
+
+def _secret(name: str):
+    """Look a setting up in Streamlit secrets first (Streamlit Cloud), then the environment/.env."""
+    try:
+        import streamlit as st
+        value = st.secrets.get(name)
+        if value:
+            return value
+    except Exception:
+        pass
+    return os.getenv(name)
+
+
+def getCredentials(account_id: str = None):
+    """
+    Resolve (client_id, client_secret) once per account.
+    Account-specific CLIENT_ID_<account> / CLIENT_SECRET_<account> take precedence.
+    """
+    if account_id in _credentials:
+        return _credentials[account_id]
+
+    _load_env()
+
+    client_id = client_secret = None
+    if account_id:
+        client_id = _secret(f"CLIENT_ID_{account_id}")
+        client_secret = _secret(f"CLIENT_SECRET_{account_id}")
+    if not client_id or not client_secret:
+        client_id = _secret("CLIENT_ID")
+        client_secret = _secret("CLIENT_SECRET")
 
     if not client_id or not client_secret:
         raise ValueError("CLIENT_ID and CLIENT_SECRET must be set in Streamlit secrets or .env file")
 
-    url = "https://api.deliverect.io/oauth/token"
+    _credentials[account_id] = (client_id, client_secret)
+    return client_id, client_secret
 
-    payload = json.dumps({
-    "client_id": client_id,
-    "client_secret": client_secret,
-    "audience": "https://api.deliverect.com",
-    "grant_type": "token"
-    })
-    headers = {
-    'Content-Type': 'application/json'
-    }
 
-    response = requests.request("POST", url, headers=headers, data=payload).json()
-    token = response["access_token"]
-    
-    # Cache the token (OAuth tokens typically expire in 1 hour, we'll refresh 5 minutes early)
-    expires_in = response.get("expires_in", 3600)  # Default to 1 hour if not provided
-    _token_cache['token'] = token
-    _token_cache['expires_at'] = datetime.now() + timedelta(seconds=expires_in - 300)
-    
-    return token
+def getProvider(account_id: str = None) -> TokenProvider:
+    client_id, client_secret = getCredentials(account_id)
+    key = (client_id, AUDIENCE)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = TokenProvider(client_id, client_secret)
+    return provider
+
 
+@timed("get_token")
+def getToken(account_id: str = None):
+    return getProvider(account_id).get()
 
-def getHeaders():
-    """Get headers with a fresh token"""
+
+def getHeaders(account_id: str = None):
+    """Get headers with a valid token"""
     return {
-        'Authorization': f'Bearer {getToken()}'
-    }
\ No newline at end of file
+        'Authorization': f'Bearer {getToken(account_id)}'
+    }
@@ -0,0 +1,129 @@
+"""
+Memory-mapped Arrow cache of a catalog CSV, as a benchmark fixture.
+
+The app keeps its catalog in SQLite (catalog/database.py); this is the
+read-only, shared-pages in-memory backend the benchmarks compare it against.
+The cache is written next to the CSV, under .catalog_cache/.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from catalog.cache import catalog_signature
+from catalog.ingest import CATALOG_DTYPES, read_catalog
+from catalog.store import EDITABLE_COLUMNS
+
+CACHE_DIR_NAME = ".catalog_cache"
+HASH_BLOCK = 1 << 20
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_dir(source: Path) -> Path:
+    return source.parent / CACHE_DIR_NAME
+
+
+def _write_atomic(path: Path, write):
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        # Readable by other processes sharing the cache
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def cached_catalog_path(path) -> Path:
+    """
+    Arrow IPC file for the CSV at path, converting it first if needed.
+
+    The cache file is named by the CSV's content hash; a manifest remembers
+    the mtime/size that hash was computed for, so an unchanged file is never
+    re-hashed and a touched-but-identical file is never re-converted.
+    """
+    source = Path(path).resolve()
+    cache_dir = _cache_dir(source)
+    cache_dir.mkdir(exist_ok=True)
+    manifest_path = cache_dir / f"{source.stem}.json"
+    _, mtime_ns, size = catalog_signature(source)
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get('mtime_ns') == mtime_ns and manifest.get('size') == size:
+        digest = manifest['sha256']
+    else:
+        digest = _file_hash(source)
+
+    arrow_path = cache_dir / f"{source.stem}-{digest[:16]}.arrow"
+    if not arrow_path.exists():
+        table = pa.Table.from_pandas(read_catalog(source), preserve_index=False)
+
+        def write(tmp_path):
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        _write_atomic(arrow_path, write)
+        # Drop files for older versions of this CSV
+        for stale in cache_dir.glob(f"{source.stem}-*.arrow"):
+            if stale != arrow_path:
+                stale.unlink(missing_ok=True)
+
+    if manifest.get('sha256') != digest or manifest.get('mtime_ns') != mtime_ns:
+        manifest = {'mtime_ns': mtime_ns, 'size': size, 'sha256': digest}
+        _write_atomic(manifest_path, lambda tmp: Path(tmp).write_text(json.dumps(manifest)))
+    return arrow_path
+
+
+def open_catalog(path) -> pd.DataFrame:
+    """
+    Open the catalog from its memory-mapped Arrow cache.
+
+    Numeric columns and Arrow-backed strings reference the mapped file
+    directly, so the pages are shared by every session and process that opens
+    the same cache. The frame must be treated as read-only; use
+    session_frame() to get an editable view.
+    """
+    source = pa.memory_map(str(cached_catalog_path(path)), 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_arrow_strings)
+
+
+def load_catalog(path) -> pd.DataFrame:
+    """open_catalog() plus default stock columns for catalogs that do not carry them."""
+    df = open_catalog(path)
+    if 'Stock Status' not in df.columns:
+        df['Stock Status'] = pd.Series('IN_STOCK', index=df.index, dtype=CATALOG_DTYPES['Stock Status'])
+    if 'Stock Quantity' not in df.columns:
+        df['Stock Quantity'] = 10
+    return df
+
+
+def _arrow_strings(arrow_type):
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def session_frame(base: pd.DataFrame) -> pd.DataFrame:
+    """Shallow copy of a shared catalog with private copies of only the editable columns."""
+    df = base.copy(deep=False)
+    for column in EDITABLE_COLUMNS:
+        if column in df.columns:
+            df[column] = base[column].copy()
+    return df
@@ -0,0 +1,123 @@
+"""
+The SQLite catalog database against the in-memory catalog.
+
+    python benchmarks/database.py [--rows 1000000] [--repeat 5]
+
+Reports the one-off CSV import, resident memory after opening each backend
+(each in its own process), the latency of uncached filtered/sorted page
+queries and of appending an edit to the write-ahead log.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.catalog_cache import load_catalog
+from benchmarks.sessions import rss_bytes
+from benchmarks.synthetic import synthetic_csv
+from catalog.database import CatalogDatabase, DatabaseCatalog
+from catalog.query import _cache_for, query_page
+from catalog.shared import SharedCatalog
+
+BACKENDS = ('memory', 'database')
+QUERIES = {
+    'all': ({}, None),
+    'category': ({'category': None}, None),
+    'stock_status': ({'stock_status': 'OUT_OF_STOCK'}, None),
+    'search': ({'search': None}, None),
+    'search+category/-price': ({'search': None, 'category': None}, '-price'),
+    'all/name': ({}, 'name'),
+}
+
+
+def _open(backend: str, csv_path: Path, db_path: Path):
+    if backend == 'memory':
+        return SharedCatalog(load_catalog(csv_path))
+    return DatabaseCatalog(CatalogDatabase(db_path))
+
+
+def _filters(filters: dict, store) -> dict:
+    # Placeholders: the first category and a common name fragment
+    defaults = {'category': store.categories[0], 'search': 'chocolate'}
+    return {name: defaults[name] if value is None else value for name, value in filters.items()}
+
+
+def run_backend(backend: str, csv_path: Path, db_path: Path, repeat: int) -> dict:
+    rss_before = rss_bytes()
+    began = time.perf_counter()
+    catalog = _open(backend, csv_path, db_path)
+    store, tracker = catalog.session()
+    results = {'open': time.perf_counter() - began, 'rss': rss_bytes() - rss_before}
+
+    base = catalog.current.store
+    for name, (filters, sort) in QUERIES.items():
+        filters = _filters(filters, base)
+        runs = []
+        for _ in range(repeat):
+            _cache_for(base).clear()
+            began = time.perf_counter()
+            page = query_page(store, filters, sort=sort, page_size=20)
+            runs.append(time.perf_counter() - began)
+        results[f'query/{name}'] = statistics.median(runs)
+        results[f'rows/{name}'] = page.total
+
+    rng = np.random.default_rng(0)
+    runs = []
+    for _ in range(repeat):
+        rows = rng.choice(store.size, 10, replace=False)
+        began = time.perf_counter()
+        tracker.record(rows, 'Base Price', rng.uniform(1, 20, 10).round(2))
+        runs.append(time.perf_counter() - began)
+    results['edit/10 rows'] = statistics.median(runs)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--database", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    csv_path = synthetic_csv(args.rows)
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, csv_path, args.database, args.repeat)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "catalog.sqlite"
+        began = time.perf_counter()
+        CatalogDatabase(db_path).import_csv(csv_path)
+        print(f"{args.rows:,} items; import into SQLite {time.perf_counter() - began:.1f}s, "
+              f"{sum(f.stat().st_size for f in Path(tmp).iterdir()) / 2**20:,.0f} MiB on disk")
+
+        results = {}
+        for backend in BACKENDS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--backend", backend, "--database", str(db_path),
+                 "--rows", str(args.rows), "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'':<32}" + "".join(f"{backend:>12}" for backend in BACKENDS))
+    print(f"{'open (s)':<32}" + "".join(f"{results[b]['open']:12.2f}" for b in BACKENDS))
+    print(f"{'RSS (MiB)':<32}" + "".join(f"{results[b]['rss'] / 2**20:12.1f}" for b in BACKENDS))
+    for name in [*(f'query/{q}' for q in QUERIES), 'edit/10 rows']:
+        print(f"{name + ' (ms)':<32}" + "".join(f"{results[b][name] * 1000:12.1f}" for b in BACKENDS))
+    mismatched = [q for q in QUERIES if results['memory'][f'rows/{q}'] != results['database'][f'rows/{q}']]
+    if mismatched:
+        print(f"⚠️ Different result counts for: {', '.join(mismatched)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Inventory pull against a local stub of the paginated Deliverect listing.
+
+    python benchmarks/pull.py [--rows 100000] [--page-size 500] [--latency 0.05]
+                              [--workers 1,4,8]
+
+The stub serves Eve-style pages ({"_items": [...], "_meta": {...}}) with
+--latency seconds per request, honouring page, pageSize and updatedSince.
+Reports a full pull per worker count, a pull interrupted halfway and
+resumed, an incremental pull after a few remote changes, and the PLU merge
+of the pulled rows onto the catalog.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.catalog_cache import load_catalog
+from benchmarks.synthetic import synthetic_csv
+from catalog.reconcile import plan_merge
+from catalog.store import CatalogStore
+from inventoryUpload import pull
+from inventoryUpload.pull import PullState, pull_inventory
+
+LOCATION = "Times Square"
+
+
+class StubInventory:
+    """Remote inventory the stub serves: one item per PLU, each with its last update time."""
+
+    def __init__(self, plus, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.plus = np.asarray(plus, dtype=np.int64)
+        self.stock = rng.integers(0, 200, len(self.plus))
+        self.status = np.where(rng.random(len(self.plus)) < 0.1, 'OUT_OF_STOCK', 'IN_STOCK').astype(object)
+        self.price = rng.uniform(1, 20, len(self.plus)).round(2)
+        self.updated = np.full(len(self.plus), time.time() - 86_400)
+        self.lock = threading.Lock()
+
+    def touch(self, count: int, seed: int = 1) -> np.ndarray:
+        """Change count random items now, as if edited in Deliverect."""
+        rng = np.random.default_rng(seed)
+        with self.lock:
+            rows = rng.choice(len(self.plus), count, replace=False)
+            self.stock[rows] = rng.integers(0, 200, count)
+            self.updated[rows] = time.time()
+        return rows
+
+    def page(self, page: int, page_size: int, since: str = None) -> dict:
+        with self.lock:
+            rows = np.arange(len(self.plus))
+            if since:
+                since = datetime.strptime(since, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+                rows = rows[self.updated[rows] >= since]
+            selected = rows[(page - 1) * page_size:page * page_size]
+            items = [
+                {'locationName': LOCATION, 'plu': int(self.plus[row]), 'stockStatus': self.status[row],
+                 'stock': int(self.stock[row]), 'price': float(self.price[row])}
+                for row in selected
+            ]
+        return {'_items': items, '_meta': {'page': page, 'max_results': page_size, 'total': len(rows)}}
+
+
+class _StubListing(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        page = int(params.get(pull.PAGE_PARAM, 1))
+        with server.lock:
+            server.requests += 1
+            failing = server.fail_after is not None and server.requests > server.fail_after
+        time.sleep(server.latency)
+        if failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(server.inventory.page(
+            page, int(params.get(pull.PAGE_SIZE_PARAM, pull.PAGE_SIZE)), params.get(pull.SINCE_PARAM),
+        )).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubListingServer:
+    """Local HTTP server standing in for the inventory listing; fail_after makes later requests fail."""
+
+    def __init__(self, inventory: StubInventory, latency: float = 0.0):
+        self.inventory = inventory
+        self.latency = latency
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubListing)
+        self._server.inventory = self.inventory
+        self._server.latency = self.latency
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._server.fail_after = None
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}/inventory"
+        return self
+
+    def fail_after(self, requests):
+        with self._server.lock:
+            self._server.requests = 0
+            self._server.fail_after = requests
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _no_auth(account_id):
+    return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=pull.PAGE_SIZE)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub seconds per request")
+    parser.add_argument("--workers", default="1,4,8", help="comma-separated worker counts")
+    parser.add_argument("--changes", type=int, default=1000, help="remote changes before the incremental pull")
+    args = parser.parse_args(argv)
+    worker_counts = [int(count) for count in args.workers.split(",") if count.strip()]
+
+    df = load_catalog(synthetic_csv(args.rows))
+    store = CatalogStore(df)
+    remote = StubInventory(store.plu)
+    options = dict(page_size=args.page_size, headers=_no_auth)
+    pages = -(-args.rows // args.page_size)
+    print(f"{args.rows:,} items, {pages} pages of {args.page_size}, {args.latency * 1000:.0f} ms per request")
+
+    with tempfile.TemporaryDirectory() as tmp, StubListingServer(remote, args.latency) as server:
+        for workers in worker_counts:
+            state = PullState(Path(tmp) / f"full_{workers}.sqlite")
+            report = pull_inventory("bench", state, url=server.url, full=True, workers=workers, **options)
+            print(f"full pull, {workers} workers: {report['seconds']:7.2f}s  {report['rows'] / report['seconds']:10,.0f} rows/s")
+            state.close()
+
+        workers = max(worker_counts)
+        state = PullState(Path(tmp) / "resume.sqlite")
+        server.fail_after(pages // 2)
+        try:
+            pull_inventory("bench", state, url=server.url, workers=workers, **options)
+        except Exception as e:
+            stored = state.last_run("bench")
+            print(f"interrupted ({type(e).__name__}): {len(stored['pages_done'])} pages, {stored['rows']:,} rows kept")
+        server.fail_after(None)
+        report = pull_inventory("bench", state, url=server.url, workers=workers, **options)
+        print(f"resumed: {report['pages']} pages in {report['seconds']:.2f}s, "
+              f"{len(state.load()):,} rows stored")
+
+        # The next pull asks for changes since the last one started (minus the overlap margin)
+        remote.touch(args.changes)
+        report = pull_inventory("bench", state, url=server.url, workers=workers, **options)
+        print(f"incremental: {report['rows']:,} rows in {report['pages']} pages, {report['seconds']:.2f}s")
+
+        pulled = state.load()
+        began = time.perf_counter()
+        plan = plan_merge(store, pulled, LOCATION)
+        seconds = time.perf_counter() - began
+        updated = ", ".join(f"{field} {count:,}" for field, count in plan.report['updated'].items())
+        print(f"merge {len(pulled):,} rows on PLU: {seconds * 1000:7.1f} ms ({updated})")
+        state.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
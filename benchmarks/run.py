@@ -0,0 +1,278 @@
+"""
+Benchmark harness: catalog load, filters, pagination, grid prep, upload
+formatting, CSV serialization and upload_csv, on synthetic catalogs.
+
+The catalog cases run against the SQLite backend the app serves
+(CatalogDatabase, DatabaseCatalog and its DatabaseSessions), in a
+temporary database per size.
+
+    python benchmarks/run.py [--sizes 10k,100k,1M] [--repeat 5]
+                             [--output results.json] [--baseline baseline.json]
+
+Results are written as JSON (median/min/max seconds per benchmark and size).
+With --baseline, each median is compared against the baseline run and
+benchmarks slower than --threshold are reported (exit code 1 with --fail).
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.synthetic import SIZES, synthetic_csv
+from catalog.database import CatalogDatabase, DatabaseCatalog
+from catalog.grid import grid_frame
+from catalog.ingest import read_catalog
+from catalog.query import _cache_for, query_page
+from inventoryUpload.inveUpload import convert_to_upload_format, upload_csv
+from inventoryUpload.serialize import iter_upload_csv, upload_columns, write_upload_csv
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PAGE_SIZE = 20
+REGRESSION_THRESHOLD = 1.2
+
+
+class _StubUpload(BaseHTTPRequestHandler):
+    """Accepts PUTs like the signed upload URL, reading (and discarding) the body."""
+    protocol_version = "HTTP/1.1"
+
+    def do_PUT(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                self.rfile.read(size + 2)
+                if size == 0:
+                    break
+        else:
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """Local HTTP server standing in for the signed upload URL."""
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubUpload)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}/upload"
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def timed(func, repeat: int, setup=None) -> dict:
+    """Run func repeat times (after setup(), untimed) and summarize the wall times."""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        began = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - began)
+    return {
+        'median': statistics.median(runs),
+        'min': min(runs),
+        'max': max(runs),
+        'runs': len(runs),
+    }
+
+
+def _common_word(names) -> str:
+    words = pd.Series(names).astype(str).str.lower().str.split().explode()
+    return words[words.str.len() >= 4].value_counts().index[0]
+
+
+def _open_catalog(db_path: Path, csv_path: Path) -> DatabaseCatalog:
+    """As the app's load_data: open the database, import the CSV if it changed, serve it."""
+    db = CatalogDatabase(db_path)
+    db.import_csv(csv_path)
+    return DatabaseCatalog(db)
+
+
+def bench_size(rows: int, repeat: int, upload_url: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        return _bench_catalog(rows, repeat, upload_url, Path(tmp))
+
+
+def _bench_catalog(rows: int, repeat: int, upload_url: str, tmp: Path) -> dict:
+    csv_path = synthetic_csv(rows)
+    results = {}
+
+    def fresh_database():
+        for path in tmp.glob("import.sqlite*"):
+            path.unlink()
+
+    # Load: CSV parse, the first-run import into SQLite, then opening the imported database (load_data)
+    results['load/read_csv'] = timed(lambda: read_catalog(csv_path), repeat)
+    results['load/import_csv'] = timed(
+        lambda: CatalogDatabase(tmp / "import.sqlite").import_csv(csv_path), repeat, setup=fresh_database)
+    fresh_database()
+    db_path = tmp / "catalog.sqlite"
+    CatalogDatabase(db_path).import_csv(csv_path)
+    results['load/load_data'] = timed(lambda: _open_catalog(db_path, csv_path), repeat)
+
+    catalog = _open_catalog(db_path, csv_path)
+    # Some items out of stock, so the stock filter has something to find
+    out_of_stock = np.arange(0, rows, 10)
+    catalog.adopt({'Stock Status': (out_of_stock, np.full(len(out_of_stock), 'OUT_OF_STOCK', dtype=object))})
+    base = catalog.current.store
+    results['session/open'] = timed(catalog.session, repeat)
+    store, tracker = catalog.session()
+
+    names = base.values('Name')
+    largest_category = max(base.counts('Category 1').items(), key=lambda item: item[1])[0]
+    filters = {
+        'search_common': {'search': _common_word(names[:10_000])},
+        'search_rare': {'search': str(names[rows // 2])},
+        'search_plu': {'search': str(base.plu[rows // 3])},
+        'category': {'category': largest_category},
+        'stock': {'stock_status': 'OUT_OF_STOCK'},
+        'combined': {'search': _common_word(names[:10_000]), 'category': largest_category, 'stock_status': 'IN_STOCK'},
+    }
+
+    def clear_caches():
+        _cache_for(base).clear()
+        _cache_for(store).clear()
+
+    for name, params in filters.items():
+        # Uncached: every run recomputes the filter
+        results[f'filter/{name}'] = timed(lambda: store.filter_rows(**params), repeat)
+    results['filter/cached_page'] = timed(lambda: query_page(store, filters['combined'], page_size=PAGE_SIZE), repeat)
+
+    # Pagination over the full catalog sorted by price: cold sort, then first/middle/last pages
+    results['page/sort_cold'] = timed(
+        lambda: query_page(store, sort='-price', page_size=PAGE_SIZE), repeat, setup=clear_caches)
+    for name, cursor in (('first', 0), ('middle', rows // 2), ('last', rows)):
+        results[f'page/{name}'] = timed(
+            lambda: query_page(store, sort='-price', cursor=cursor, page_size=PAGE_SIZE), repeat)
+
+    page = query_page(store, page_size=100)
+    results['render/grid_frame'] = timed(lambda: grid_frame(page.frame, tracker), repeat)
+
+    # Upload formatting and serialization work on the session's rows as a frame
+    df = store.take(np.arange(store.size))
+
+    # Upload payload for every item: the frame-building format, then serialization
+    results['upload/convert_format'] = timed(lambda: convert_to_upload_format(df), repeat)
+    upload_df = convert_to_upload_format(df)
+
+    def to_csv_bytes():
+        buffer = io.StringIO()
+        upload_df.to_csv(buffer, index=False)
+        return buffer.getvalue().encode("utf-8")
+
+    results['serialize/to_csv'] = timed(to_csv_bytes, repeat)
+    reused = bytearray()
+    results['serialize/buffer'] = timed(lambda: write_upload_csv(upload_columns(df), reused), repeat)
+    payload = bytes(write_upload_csv(upload_columns(df)))
+
+    headers = {"Content-Type": "text/csv"}
+    results['upload/put_bytes'] = timed(lambda: upload_csv(payload, upload_url, headers), repeat)
+    results['upload/put_stream'] = timed(
+        lambda: upload_csv(iter_upload_csv(upload_columns(df)), upload_url, headers), repeat)
+    results['upload/payload_bytes'] = len(payload)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """[(size, benchmark, baseline median, median, ratio)] for benchmarks slower than threshold x baseline."""
+    regressions = []
+    for size, benches in results['results'].items():
+        for name, timing in benches.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if not isinstance(timing, dict) or not isinstance(before, dict) or not before['median']:
+                continue
+            ratio = timing['median'] / before['median']
+            if ratio > threshold:
+                regressions.append((size, name, before['median'], timing['median'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k,100k", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail", action="store_true", help="exit 1 when a benchmark regressed")
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {unknown}, expected {list(SIZES)}")
+
+    started = datetime.now(timezone.utc)
+    report = {
+        'meta': {
+            'started': started.isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': {},
+    }
+    with StubServer() as stub:
+        for size in sizes:
+            print(f"== {size} ({SIZES[size]:,} items)")
+            benches = bench_size(SIZES[size], args.repeat, stub.url)
+            for name, timing in benches.items():
+                if isinstance(timing, dict):
+                    print(f"  {name:<24} {timing['median'] * 1000:10.2f} ms  (min {timing['min'] * 1000:.2f})")
+            report['results'][size] = benches
+
+    output = args.output or RESULTS_DIR / f"{started:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f"\nSlower than {args.threshold:.2f}x baseline:")
+            for size, name, before, after, ratio in regressions:
+                print(f"  {size:<5} {name:<24} {before * 1000:10.2f} -> {after * 1000:10.2f} ms  ({ratio:.2f}x)")
+            if args.fail:
+                return 1
+        else:
+            print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
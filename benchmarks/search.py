@@ -0,0 +1,135 @@
+"""
+Product search: the ranked search service against the substring filter.
+
+    python benchmarks/search.py [--rows 500000] [--queries 200]
+
+For each backend (in-memory catalog and SQLite database, each in its own
+process) reports building the word index, then per-query latency for:
+typing a name word by word, a keystroke at a time ("typing": every prefix
+is a new query, narrowed from the previous one); random one- and two-word
+queries with an empty cache ("cold"); the same queries again ("cached");
+exact PLUs and category names. "substring" is the store's unranked
+substring filter on the cold queries, as the search box used before.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.catalog_cache import load_catalog
+from benchmarks.sessions import rss_bytes
+from benchmarks.synthetic import synthetic_csv
+from catalog.database import CatalogDatabase, DatabaseCatalog
+from catalog.search import TOKEN, search_service
+from catalog.shared import SharedCatalog
+
+BACKENDS = ('memory', 'database')
+SCENARIOS = ('typing', 'cold', 'cached', 'plu', 'category', 'substring')
+
+
+def _queries(store, count: int, seed: int = 0) -> dict:
+    """Query strings per scenario, drawn from the catalog's own names, PLUs and categories."""
+    rng = np.random.default_rng(seed)
+    names = store.values('Name', rng.choice(store.size, count, replace=False))
+    words = [TOKEN.findall(str(name).lower()) for name in names]
+    cold = [" ".join(w[:1 + i % 2]) for i, w in enumerate(words) if w]
+    typing = []
+    for w in words[:max(count // 10, 1)]:
+        text = " ".join(w[:3])
+        typing += [text[:end] for end in range(1, len(text) + 1) if not text[:end].endswith(" ")]
+    return {
+        'typing': typing,
+        'cold': cold,
+        'plu': [str(plu) for plu in rng.choice(store.plu, count)],
+        'category': list(rng.choice(store.categories, count)),
+    }
+
+
+def _timed(function, queries) -> list:
+    runs = []
+    for query in queries:
+        began = time.perf_counter()
+        function(query)
+        runs.append(time.perf_counter() - began)
+    return runs
+
+
+def run_backend(backend: str, csv_path: Path, db_path: Path, count: int) -> dict:
+    if backend == 'memory':
+        catalog = SharedCatalog(load_catalog(csv_path))
+    else:
+        catalog = DatabaseCatalog(CatalogDatabase(db_path))
+    store = catalog.current.store
+    service = search_service(store)
+    queries = _queries(store, count)
+
+    rss_before = rss_bytes()
+    began = time.perf_counter()
+    service.index(store)
+    results = {'index': time.perf_counter() - began, 'index rss': rss_bytes() - rss_before}
+
+    def search(query):
+        return service.search(store, query)
+
+    service.clear()
+    results['typing'] = _timed(search, queries['typing'])
+    service.clear()
+    results['cold'] = _timed(lambda query: (service.clear(), search(query)), queries['cold'])
+    # Each query again right after an untimed first run, so it is still in the LRU
+    results['cached'] = []
+    for query in queries['cold']:
+        search(query)
+        results['cached'] += _timed(search, [query])
+    results['plu'] = _timed(lambda query: (service.clear(), search(query)), queries['plu'])
+    results['category'] = _timed(lambda query: (service.clear(), search(query)), queries['category'])
+    results['substring'] = _timed(lambda query: store.filter_rows(search=query), queries['cold'])
+    results['matches'] = statistics.median(len(search(query)) for query in queries['cold'])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backend", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--database", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    csv_path = synthetic_csv(args.rows)
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, csv_path, args.database, args.queries)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "catalog.sqlite"
+        CatalogDatabase(db_path).import_csv(csv_path)
+        results = {}
+        for backend in BACKENDS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--backend", backend, "--database", str(db_path),
+                 "--rows", str(args.rows), "--queries", str(args.queries)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{args.rows:,} items")
+    for backend, run in results.items():
+        print(f"\n{backend}: word index {run['index']:.2f}s, {run['index rss'] / 2**20:,.0f} MiB; "
+              f"median {run['matches']:,.0f} matches per cold query")
+        print(f"{'(ms)':<12}{'queries':>9}{'p50':>9}{'p95':>9}{'max':>9}")
+        for scenario in SCENARIOS:
+            runs = np.asarray(run[scenario]) * 1000
+            print(f"{scenario:<12}{len(runs):>9}{np.percentile(runs, 50):9.2f}"
+                  f"{np.percentile(runs, 95):9.2f}{runs.max():9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Upload CSV serialization: convert_to_upload_format + to_csv vs inventoryUpload.serialize.
+
+    python benchmarks/serialize_upload.py [rows]
+
+Reports throughput and peak traced memory (tracemalloc) for each path and
+checks that both produce the same bytes. Timing and memory are separate runs,
+tracing slows allocation-heavy code down too much to time it.
+"""
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.synthetic import synthetic_catalog
+from inventoryUpload.inveUpload import convert_to_upload_format
+from inventoryUpload.serialize import iter_upload_csv, upload_columns, write_upload_csv
+
+
+def upload_catalog(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    catalog = synthetic_catalog(rows, seed)
+    catalog['Stock Status'] = pd.Categorical.from_codes(
+        (rng.random(rows) < 0.1).astype(np.int8), ['IN_STOCK', 'OUT_OF_STOCK'])
+    catalog['Stock Quantity'] = rng.integers(0, 200, rows)
+    return catalog
+
+
+def to_csv_path(catalog):
+    # The original path: new frame, text CSV, then an encoded copy
+    upload_df = convert_to_upload_format(catalog)
+    buffer = io.StringIO()
+    upload_df.to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
+
+
+def buffer_path(catalog, buffer=None):
+    return write_upload_csv(upload_columns(catalog), buffer)
+
+
+def stream_path(catalog):
+    # What the chunked uploader does: only one batch alive at a time
+    return sum(len(chunk) for chunk in iter_upload_csv(upload_columns(catalog)))
+
+
+def measure(name, func, *args):
+    began = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - began
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = result if isinstance(result, int) else len(result)
+    print(f"{name:<12} {seconds:7.3f}s  {size / seconds / 2**20:8.1f} MiB/s  peak {peak / 2**20:8.1f} MiB")
+    return result
+
+
+def main(rows: int = 1_000_000):
+    catalog = upload_catalog(rows)
+    print(f"{rows:,} rows")
+    expected = measure("to_csv", to_csv_path, catalog)
+    measure("buffer", buffer_path, catalog)
+    # A buffer kept between syncs: no new allocation for the payload
+    buffer = bytearray()
+    measure("buffer reuse", buffer_path, catalog, buffer)
+    measure("stream", stream_path, catalog)
+    print("identical:", bytes(buffer) == expected)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
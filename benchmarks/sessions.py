@@ -0,0 +1,103 @@
+"""
+Resident memory as concurrent sessions grow, per-session copies vs the shared catalog.
+
+    python benchmarks/sessions.py [--rows 100000] [--sessions 1,10,50] [--edits 100]
+
+"private" builds what each session used to hold on its own (editable
+column copies, indexes, change tracker, location inventory); "shared" opens
+a session on one SharedCatalog, which keeps only the session's edits. Each
+session edits --edits random rows and reads a page. Every mode runs in its
+own process so the RSS figures do not mix.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.catalog_cache import load_catalog, session_frame
+from benchmarks.synthetic import synthetic_csv
+from catalog.changes import ChangeTracker
+from catalog.locations import LocationInventory
+from catalog.query import query_page
+from catalog.shared import SharedCatalog
+from catalog.store import CatalogStore
+
+MODES = ('private', 'shared')
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux), else the peak."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _inventory(df) -> LocationInventory:
+    return LocationInventory(df['PLU'], df['Base Price'], ['Times Square'],
+                             stock=df['Stock Quantity'], status=df['Stock Status'])
+
+
+def run_mode(mode: str, rows: int, counts, edits: int, seed: int = 0) -> dict:
+    """RSS (bytes) after opening each number of sessions in counts."""
+    rng = np.random.default_rng(seed)
+    base = load_catalog(synthetic_csv(rows))
+    shared = SharedCatalog(base) if mode == 'shared' else None
+    inventory = _inventory(base) if mode == 'shared' else None
+    sessions = []
+    rss = {'0': rss_bytes()}
+    for count in counts:
+        while len(sessions) < count:
+            if mode == 'shared':
+                store, tracker = shared.session()
+                sessions.append((store, tracker, inventory))
+            else:
+                store = CatalogStore(session_frame(base))
+                sessions.append((store, ChangeTracker(store), _inventory(store.df)))
+            store, tracker, _ = sessions[-1]
+            edited = rng.choice(rows, edits, replace=False)
+            tracker.record(edited, 'Base Price', rng.uniform(1, 20, edits).round(2))
+            tracker.record(edited, 'Stock Status', np.full(edits, 'OUT_OF_STOCK', dtype=object))
+            query_page(store, {'stock_status': 'OUT_OF_STOCK'}, sort='-price', page_size=20)
+        rss[str(count)] = rss_bytes()
+    return rss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", default="1,10,50", help="comma-separated session counts")
+    parser.add_argument("--edits", type=int, default=100, help="rows each session edits")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    counts = sorted(int(count) for count in args.sessions.split(",") if count.strip())
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.rows, counts, args.edits)))
+        return 0
+
+    synthetic_csv(args.rows)
+    print(f"{args.rows:,} items, {args.edits} edited rows per session; RSS in MiB")
+    print(f"{'sessions':<10}" + "".join(f"{mode:>12}" for mode in MODES))
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--rows", str(args.rows),
+             "--sessions", args.sessions, "--edits", str(args.edits)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    for label in ['0', *map(str, counts)]:
+        print(f"{label:<10}" + "".join(f"{results[mode][label] / 2**20:12.1f}" for mode in MODES))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
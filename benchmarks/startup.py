@@ -0,0 +1,142 @@
+"""
+App startup: cold imports, first render and a warm rerun.
+
+    python benchmarks/startup.py [--baseline HEAD~1] [--repeat 3]
+
+Each measurement runs in a fresh process against a tree of the repository:
+"imports" times importing every module app.py imports (after streamlit
+itself, which every version pays for); "first launch" renders app.py once
+with streamlit's AppTest on a tree with no local state, "restart" renders it
+again in a new process once the first launch has left its caches behind,
+and "rerun" is a second run in that process. With --baseline, the same
+measurements run on that git revision (extracted with git archive) for a
+before/after comparison.
+"""
+import argparse
+import ast
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Dependencies the app should only import once they are needed
+DEFERRED = ('requests', 'cryptography.fernet', 'dotenv')
+PHASES = ('imports', 'first launch', 'restart', 'rerun')
+
+
+def _app_imports(tree: Path) -> list:
+    """Top-level modules app.py imports, in order."""
+    modules = []
+    for node in ast.parse((tree / "app.py").read_text()).body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return [module for module in dict.fromkeys(modules) if module != 'streamlit']
+
+
+def measure_imports(tree: Path) -> dict:
+    import importlib
+    import streamlit  # noqa: F401 (paid by every version alike)
+    began = time.perf_counter()
+    for module in _app_imports(tree):
+        importlib.import_module(module)
+    return {'imports': time.perf_counter() - began, 'loaded': [m for m in DEFERRED if m in sys.modules]}
+
+
+def measure_render(tree: Path) -> dict:
+    from streamlit.testing.v1 import AppTest
+    began = time.perf_counter()
+    app = AppTest.from_file(str(tree / "app.py"), default_timeout=300)
+    app.run()
+    first = time.perf_counter() - began
+    began = time.perf_counter()
+    app.run()
+    results = {'render': first, 'rerun': time.perf_counter() - began,
+               'errors': [exception.value for exception in app.exception]}
+    results['loaded'] = [m for m in DEFERRED if m in sys.modules]
+    return results
+
+
+def _child(tree: Path, phase: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--tree", str(tree), "--phase", phase],
+        cwd=tree, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_tree(tree: Path, repeat: int) -> dict:
+    imports = [_child(tree, 'imports') for _ in range(repeat)]
+    first = _child(tree, 'render')
+    restarts = [_child(tree, 'render') for _ in range(repeat)]
+    return {
+        'imports': statistics.median(run['imports'] for run in imports),
+        'first launch': first['render'],
+        'restart': statistics.median(run['render'] for run in restarts),
+        'rerun': statistics.median(run['rerun'] for run in restarts),
+        'loaded at import': imports[-1]['loaded'],
+        'loaded after render': restarts[-1]['loaded'],
+        'errors': first['errors'] + restarts[-1]['errors'],
+    }
+
+
+def _export(revision: str, target: Path) -> Path:
+    archive = subprocess.run(["git", "archive", revision], cwd=ROOT, capture_output=True, check=True).stdout
+    target.mkdir()
+    subprocess.run(["tar", "-x", "-C", str(target)], input=archive, check=True)
+    return target
+
+
+def _working_copy(target: Path) -> Path:
+    # The working tree without its local state (databases, caches), so the first launch starts cold
+    files = subprocess.run(
+        ["git", "ls-files", "--cached", "--others", "--exclude-standard"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    for name in files:
+        source = ROOT / name
+        if source.is_file():
+            (target / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target / name)
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="git revision to compare against, e.g. HEAD~1")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tree", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--phase", choices=('imports', 'render'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.phase:
+        sys.path.insert(0, str(args.tree))
+        measure = measure_imports if args.phase == 'imports' else measure_render
+        print(json.dumps(measure(args.tree)))
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.baseline:
+            results[args.baseline] = run_tree(_export(args.baseline, Path(tmp) / "baseline"), args.repeat)
+        results['working tree'] = run_tree(_working_copy(Path(tmp) / "current"), args.repeat)
+
+    print(f"{'':<20}" + "".join(f"{name:>16}" for name in results))
+    for phase in PHASES:
+        print(f"{phase + ' (ms)':<20}" + "".join(f"{run[phase] * 1000:16.0f}" for run in results.values()))
+    for name, run in results.items():
+        print(f"{name}: deferred modules loaded at import {run['loaded at import'] or 'none'}, "
+              f"after the first render {run['loaded after render'] or 'none'}")
+        for error in run['errors']:
+            print(f"⚠️ {name}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Synthetic catalogs shaped like itemCsv/DemoITems.csv, at any size.
+
+Category pairs keep DemoITems' frequencies (a few big aisles, many small
+ones), names are drawn from its vocabulary and prices from its price
+distribution, so filters and search see realistic selectivity.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog.ingest import iter_catalog
+
+DEMO_PATH = Path(__file__).resolve().parent.parent / "itemCsv" / "DemoITems.csv"
+DEMO_COLUMNS = ['Category 1', 'Category 2', 'Name', 'Base Price']
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+SIZES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+PLU_START = 20_000_000
+
+
+def _demo_profile(path=DEMO_PATH):
+    """(category pairs, pair weights, name words, prices) from the demo catalog."""
+    demo = pd.concat(iter_catalog(path, usecols=DEMO_COLUMNS), ignore_index=True)
+    pairs = demo.groupby(['Category 1', 'Category 2'], observed=True).size()
+    words = pd.unique(demo['Name'].dropna().str.split().explode().to_numpy())
+    prices = demo['Base Price'].dropna().to_numpy()
+    return pairs.index.to_frame(index=False), (pairs / pairs.sum()).to_numpy(), words, prices
+
+
+def synthetic_catalog(rows: int, seed: int = 0, path=DEMO_PATH) -> pd.DataFrame:
+    """Catalog frame with the DemoITems columns the app reads, plus Image Links and GTINs."""
+    rng = np.random.default_rng(seed)
+    pairs, weights, words, prices = _demo_profile(path)
+
+    pair_ids = rng.choice(len(pairs), size=rows, p=weights)
+    # Names of 3-8 words, built a word column at a time
+    lengths = rng.integers(3, 9, rows)
+    vocabulary = np.asarray(words, dtype=str)
+    names = vocabulary[rng.integers(0, len(vocabulary), rows)]
+    for position in range(1, lengths.max()):
+        word = vocabulary[rng.integers(0, len(vocabulary), rows)]
+        names = np.where(lengths > position, np.char.add(np.char.add(names, " "), word), names)
+
+    gtins = rng.integers(10**12, 10**13, rows)
+    # Demo prices with a little noise, still at cent precision
+    base = rng.choice(prices, size=rows) * rng.uniform(0.8, 1.2, rows)
+    return pd.DataFrame({
+        'Category 1': pd.Categorical(pairs['Category 1'].to_numpy()[pair_ids]),
+        'Category 2': pd.Categorical(pairs['Category 2'].to_numpy()[pair_ids]),
+        'Name': names.astype(object),
+        'PLU': PLU_START + rng.permutation(rows).astype(np.int64),
+        'Base Price': np.round(base, 2).astype(np.float32),
+        'GTINs': gtins,
+        'Image Links': np.char.add("https://images.example.com/", gtins.astype(str)).astype(object),
+    })
+
+
+def synthetic_csv(rows: int, seed: int = 0, directory=DATA_DIR) -> Path:
+    """Write (once) and return a synthetic catalog CSV for rows/seed."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"catalog-{rows}-{seed}.csv"
+    if not path.exists():
+        tmp_path = path.with_suffix(".tmp")
+        synthetic_catalog(rows, seed).to_csv(tmp_path, index=False)
+        tmp_path.replace(path)
+    return path
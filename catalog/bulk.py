@@ -0,0 +1,91 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from catalog.store import EDITABLE_COLUMNS, STOCK_STATUSES
+
+# op -> fields it applies to
+OPERATIONS = {
+    'set': EDITABLE_COLUMNS,
+    'multiply': ('Base Price', 'Stock Quantity'),
+    'add': ('Base Price', 'Stock Quantity'),
+}
+PRICE_DECIMALS = 2
+
+BulkEdit = namedtuple('BulkEdit', ['field', 'op', 'value'])
+Preview = namedtuple('Preview', ['rows', 'matched', 'changed'])
+
+
+def parse_plus(text: str) -> np.ndarray:
+    """PLUs from free text separated by commas, spaces or new lines."""
+    tokens = [token for token in re.split(r'[\s,;]+', text or '') if token]
+    try:
+        return np.asarray([int(token) for token in tokens], dtype=np.int64)
+    except ValueError as e:
+        raise ValueError(f"PLU list must contain only integers: {e}") from None
+
+
+def select_rows(store, category=None, category2=None, stock_status=None, plus=None, search=None) -> np.ndarray:
+    """
+    Sorted row ids matching every given condition (None = no condition),
+    combined as one boolean mask over the catalog.
+    """
+    if search or category is not None or stock_status is not None:
+        rows = store.filter_rows(search=search or None, category=category, stock_status=stock_status)
+        mask = np.zeros(store.size, dtype=bool)
+        mask[rows] = True
+    else:
+        mask = np.ones(store.size, dtype=bool)
+    if category2 is not None:
+        mask &= store.equals('Category 2', category2)
+    if plus is not None:
+        rows = store.rows_for_plus(plus)
+        selected = np.zeros(store.size, dtype=bool)
+        selected[rows[rows >= 0]] = True
+        mask &= selected
+    return np.flatnonzero(mask)
+
+
+def bulk_values(store, rows, edit: BulkEdit) -> np.ndarray:
+    """New values of edit.field for rows, computed in one vectorized step."""
+    if edit.op not in OPERATIONS:
+        raise ValueError(f"Unknown operation '{edit.op}', expected one of {sorted(OPERATIONS)}")
+    if edit.field not in OPERATIONS[edit.op]:
+        raise ValueError(f"'{edit.op}' does not apply to {edit.field}")
+
+    if edit.field == 'Stock Status':
+        if edit.value not in STOCK_STATUSES:
+            raise ValueError(f"Unknown stock status, expected one of {list(STOCK_STATUSES)}")
+        return np.full(len(rows), edit.value, dtype=object)
+
+    current = store.values(edit.field, rows).astype(np.float64)
+    if edit.op == 'set':
+        values = np.full(len(rows), float(edit.value))
+    elif edit.op == 'multiply':
+        values = current * float(edit.value)
+    else:
+        values = current + float(edit.value)
+
+    # Prices and stock never go negative; prices stay at cent precision, stock whole
+    values = np.maximum(values, 0)
+    if edit.field == 'Base Price':
+        values = np.round(values, PRICE_DECIMALS)
+    else:
+        values = np.round(values)
+    return values.astype(store.dtype(edit.field))
+
+
+def preview_bulk(store, rows, edit: BulkEdit) -> Preview:
+    """How many selected rows an edit would actually change, without writing anything."""
+    rows = np.asarray(rows, dtype=np.int64)
+    values = bulk_values(store, rows, edit)
+    current = store.values(edit.field, rows)
+    changed = rows[current != values]
+    return Preview(rows=changed, matched=len(rows), changed=len(changed))
+
+
+def apply_bulk(tracker, rows, edit: BulkEdit) -> int:
+    """Apply an edit to rows through the change tracker; returns the number of rows changed."""
+    rows = np.asarray(rows, dtype=np.int64)
+    return tracker.record(rows, edit.field, bulk_values(tracker.store, rows, edit))
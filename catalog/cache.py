@@ -0,0 +1,8 @@
+import os
+from pathlib import Path
+
+
+def catalog_signature(path) -> tuple:
+    """Cheap (path, mtime, size) key, e.g. for st.cache_resource; changes whenever the CSV is edited."""
+    stat = os.stat(path)
+    return str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+
+from catalog.store import EDITABLE_COLUMNS, STOCK_STATUSES
+
+LOG_INITIAL_CAPACITY = 1024
+
+
+class ChangeTracker:
+    """
+    Tracks edits against an immutable baseline snapshot of the editable columns.
+
+    Every write is appended to an array-backed delta log of (row, field, old, new)
+    with values encoded as float64 (stock statuses as codes). Per-field dirty
+    bitmaps are kept up to date incrementally, so counting and exporting pending
+    changes never loops over rows in Python.
+    """
+
+    def __init__(self, store, baseline: dict = None):
+        self.store = store
+        self.fields = list(EDITABLE_COLUMNS)
+        self.statuses = list(STOCK_STATUSES)
+
+        # Baseline snapshot, read-only so it can be shared safely; a shared
+        # catalog passes the one every session on its version uses
+        self.baseline = {}
+        for field in self.fields:
+            if baseline is not None:
+                snapshot = baseline[field]
+            else:
+                snapshot = np.array(store.values(field), copy=True)
+                snapshot.setflags(write=False)
+            self.baseline[field] = snapshot
+        self.dirty = {field: np.zeros(store.size, dtype=bool) for field in self.fields}
+
+        # Delta log
+        self._log_rows = np.empty(LOG_INITIAL_CAPACITY, dtype=np.int64)
+        self._log_fields = np.empty(LOG_INITIAL_CAPACITY, dtype=np.int8)
+        self._log_old = np.empty(LOG_INITIAL_CAPACITY, dtype=np.float64)
+        self._log_new = np.empty(LOG_INITIAL_CAPACITY, dtype=np.float64)
+        self._log_size = 0
+
+    # ------------------------------------------------------------------
+    # Delta log
+    # ------------------------------------------------------------------
+
+    def _encode(self, field, values) -> np.ndarray:
+        if field != 'Stock Status':
+            return np.asarray(values, dtype=np.float64)
+        values = np.asarray(values, dtype=object)
+        for status in pd.unique(values):
+            if status not in self.statuses:
+                self.statuses.append(status)
+        return pd.Index(self.statuses).get_indexer(values).astype(np.float64)
+
+    def _append_log(self, rows, field, old, new):
+        count = len(rows)
+        needed = self._log_size + count
+        if needed > len(self._log_rows):
+            capacity = max(needed, 2 * len(self._log_rows))
+            for name in ('_log_rows', '_log_fields', '_log_old', '_log_new'):
+                grown = np.empty(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._log_size] = getattr(self, name)[:self._log_size]
+                setattr(self, name, grown)
+        end = self._log_size + count
+        self._log_rows[self._log_size:end] = rows
+        self._log_fields[self._log_size:end] = self.fields.index(field)
+        self._log_old[self._log_size:end] = self._encode(field, old)
+        self._log_new[self._log_size:end] = self._encode(field, new)
+        self._log_size = end
+
+    def log(self) -> pd.DataFrame:
+        """The delta log as a frame (row, field, old, new); statuses are decoded."""
+        size = self._log_size
+        fields = np.asarray(self.fields, dtype=object)[self._log_fields[:size]]
+        frame = pd.DataFrame({
+            'row': self._log_rows[:size].copy(),
+            'field': fields,
+            'old': self._log_old[:size].astype(object),
+            'new': self._log_new[:size].astype(object),
+        })
+        is_status = fields == 'Stock Status'
+        if is_status.any():
+            statuses = np.asarray(self.statuses, dtype=object)
+            frame.loc[is_status, 'old'] = statuses[self._log_old[:size][is_status].astype(np.int64)]
+            frame.loc[is_status, 'new'] = statuses[self._log_new[:size][is_status].astype(np.int64)]
+        return frame
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(self, rows, field, values) -> int:
+        """Write values for rows of one field, logging the change against the current state; returns rows changed."""
+        rows = np.asarray(rows, dtype=np.int64)
+        dtype = self.store.dtype(field)
+        values = np.asarray(values)
+        if pd.api.types.is_numeric_dtype(dtype):
+            values = values.astype(dtype)
+        old = self.store.values(field, rows)
+        changed = old != values
+        if not changed.any():
+            return 0
+        rows, old, values = rows[changed], old[changed], values[changed]
+        self.store.set_values(rows, field, values)
+        self._append_log(rows, field, old, values)
+        self.dirty[field][rows] = values != self.baseline[field][rows]
+        return len(rows)
+
+    def apply_edits(self, edits: pd.DataFrame) -> np.ndarray:
+        """Apply a long-format (row, column, value) edit frame, one vectorized write per field."""
+        for field, group in edits.groupby('column', sort=False):
+            self.record(group['row'].to_numpy(), field, group['value'].to_numpy())
+        return np.unique(edits['row'].to_numpy().astype(np.int64))
+
+    def revert(self, row, field=None):
+        """Restore one field (or every field) of a single row to its baseline value."""
+        for name in ([field] if field else self.fields):
+            if self.dirty[name][row]:
+                self.record([row], name, self.baseline[name][[row]])
+
+    def revert_rows(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        for field in self.fields:
+            dirty_rows = rows[self.dirty[field][rows]]
+            if len(dirty_rows):
+                self.record(dirty_rows, field, self.baseline[field][dirty_rows])
+
+    def revert_all(self):
+        for field in self.fields:
+            dirty_rows = np.flatnonzero(self.dirty[field])
+            if len(dirty_rows):
+                self.record(dirty_rows, field, self.baseline[field][dirty_rows])
+
+    def mark_synced(self, rows=None):
+        """Adopt the current values of rows (default: all modified) as the new baseline."""
+        rows = self.modified_rows() if rows is None else np.asarray(rows, dtype=np.int64)
+        for field in self.fields:
+            # Copy-on-write: the old snapshot may still be referenced by readers
+            snapshot = self.baseline[field].copy()
+            snapshot[rows] = self.store.values(field, rows)
+            snapshot.setflags(write=False)
+            self.baseline[field] = snapshot
+            self.dirty[field][rows] = False
+
+    def rebase(self, baseline: dict, rows: dict):
+        """
+        Adopt a newer read-only baseline, e.g. a version published by a sync.
+        rows maps each field to the rows that may still differ from it (the
+        session's own edits); dirty flags are re-derived for those and for
+        the rows that were dirty, without touching the rest.
+        """
+        for field in self.fields:
+            check = np.union1d(np.flatnonzero(self.dirty[field]), rows.get(field, np.empty(0, dtype=np.int64)))
+            self.baseline[field] = baseline[field]
+            if len(check):
+                self.dirty[field][check] = self.store.values(field, check) != baseline[field][check]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def modified_mask(self) -> np.ndarray:
+        mask = np.zeros(self.store.size, dtype=bool)
+        for bitmap in self.dirty.values():
+            mask |= bitmap
+        return mask
+
+    def is_modified(self, rows) -> np.ndarray:
+        """Modified flags for just the given rows (e.g. the visible page)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        flags = np.zeros(len(rows), dtype=bool)
+        for bitmap in self.dirty.values():
+            flags |= bitmap[rows]
+        return flags
+
+    def modified_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.modified_mask())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.modified_mask()))
+
+    def export_changes(self) -> pd.DataFrame:
+        """Only the fields that differ from the baseline: row, plu, field, old, new."""
+        parts = []
+        for field in self.fields:
+            rows = np.flatnonzero(self.dirty[field])
+            if len(rows):
+                parts.append(pd.DataFrame({
+                    'row': rows,
+                    'plu': self.store.plu[rows],
+                    'field': field,
+                    'old': self.baseline[field][rows],
+                    'new': self.store.values(field, rows),
+                }))
+        if not parts:
+            return pd.DataFrame(columns=['row', 'plu', 'field', 'old', 'new'])
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,523 @@
+import copy
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog.cache import catalog_signature
+from catalog.changes import ChangeTracker
+from catalog.ingest import CATALOG_DTYPES, CHUNK_ROWS, iter_catalog
+from catalog.shared import CatalogVersion, EditOverlay, SharedCatalog
+from catalog.store import EDITABLE_COLUMNS, NGRAM, CatalogStore
+
+DATABASE_PATH = Path(__file__).resolve().parent / ".catalog.sqlite"
+DEFAULT_WORKSPACE = "default"
+
+# Columns with a B-tree index: lookups, filters and bulk selections
+INDEXED_COLUMNS = ('PLU', 'Category 1', 'Category 2', 'Stock Status')
+# Largest IN (...) list per statement, under SQLite's variable limit
+BATCH_ROWS = 30_000
+# Reading more than this share of the rows scans the column instead
+SCAN_FRACTION = 1 / 16
+SEARCH_SEPARATOR = '\n'
+NAME_ORDER = """lower(coalesce("Name", ''))"""
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _python_values(values) -> list:
+    """NumPy values as SQLite parameters (NaN -> NULL)."""
+    values = pd.Series(values)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _readonly(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+
+class CatalogDatabase:
+    """
+    The catalog in SQLite (WAL): items, their indexes and a write-ahead edit log.
+
+    items holds one row per catalog item with its positional row id as the
+    primary key, B-tree indexes on INDEXED_COLUMNS and an FTS5 trigram index
+    on the lower-cased name and PLU. Edits are appended to the edit log per
+    workspace (keyed by PLU, so they survive a re-import) before sessions
+    apply them, and commit() writes synced values into items and drops their
+    log entries in one transaction. Every commit bumps the version.
+    """
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the app's sessions, serialized by a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS edits (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                workspace TEXT NOT NULL,
+                plu INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                value,
+                recorded_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS edits_workspace ON edits (workspace, plu, field);
+        """)
+        self.dtypes = self._load_dtypes()
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, key: str, value):
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _bump_version(self, conn) -> int:
+        version = self.version() + 1
+        self._set_meta(conn, 'version', version)
+        return version
+
+    def _load_dtypes(self) -> dict:
+        dtypes = {}
+        for column, name in self._meta('dtypes', {}).items():
+            if column in CATALOG_DTYPES:
+                dtypes[column] = pd.api.types.pandas_dtype(CATALOG_DTYPES[column])
+            elif name == 'category':
+                dtypes[column] = pd.CategoricalDtype()
+            else:
+                dtypes[column] = pd.api.types.pandas_dtype(name)
+        return dtypes
+
+    def version(self) -> int:
+        return self._meta('version', 0)
+
+    def query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ------------------------------------------------------------------
+    # Catalog import
+    # ------------------------------------------------------------------
+
+    def import_csv(self, path, chunksize: int = CHUNK_ROWS) -> bool:
+        """
+        Load the catalog CSV into items, streamed chunk by chunk, unless this
+        exact file (path, mtime, size) was loaded last. Items that were already
+        in the database keep their stock and prices, matched on PLU; the
+        database, not the CSV, holds the synced state. Returns whether it loaded.
+        """
+        signature = list(catalog_signature(path))
+        if self._meta('source') == signature:
+            return False
+
+        with self._transaction() as conn:
+            conn.execute("DROP TABLE IF EXISTS items_new")
+            columns, dtypes, offset = None, {}, 0
+            for chunk in iter_catalog(path, chunksize=chunksize):
+                if 'Stock Status' not in chunk.columns:
+                    chunk['Stock Status'] = pd.Series('IN_STOCK', index=chunk.index, dtype=CATALOG_DTYPES['Stock Status'])
+                if 'Stock Quantity' not in chunk.columns:
+                    chunk['Stock Quantity'] = 10
+                if columns is None:
+                    columns = list(chunk.columns)
+                    definitions = ", ".join(f"{_quote(c)} {_sql_type(chunk[c].dtype)}" for c in columns)
+                    conn.execute(f'CREATE TABLE items_new ("row" INTEGER PRIMARY KEY, {definitions})')
+                # A later chunk can infer a wider type (e.g. a float column with missing values)
+                for column in columns:
+                    if dtypes.get(column) != 'object':
+                        dtypes[column] = 'category' if isinstance(chunk[column].dtype, pd.CategoricalDtype) else str(chunk[column].dtype)
+                values = [np.arange(offset, offset + len(chunk))] + [_python_values(chunk[c]) for c in columns]
+                conn.executemany(
+                    f"INSERT INTO items_new VALUES ({', '.join('?' * (len(columns) + 1))})",
+                    zip(*(v.tolist() if isinstance(v, np.ndarray) else v for v in values)),
+                )
+                offset += len(chunk)
+            if columns is None:
+                raise ValueError(f"{path} has no items")
+
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'items'").fetchone():
+                assignments = ", ".join(f"{_quote(c)} = old.{_quote(c)}" for c in EDITABLE_COLUMNS)
+                conn.execute(f'UPDATE items_new SET {assignments} FROM items AS old WHERE old."PLU" = items_new."PLU"')
+                conn.execute("DROP TABLE items")
+            conn.execute("ALTER TABLE items_new RENAME TO items")
+            for column in INDEXED_COLUMNS:
+                name = "items_" + column.lower().replace(' ', '_')
+                conn.execute(f"CREATE INDEX {name} ON items ({_quote(column)})")
+            # Name order, the one sort over a column that never changes
+            conn.execute(f"CREATE INDEX items_name_order ON items ({NAME_ORDER})")
+
+            # Substring search: trigrams of "name\nplu", as CatalogStore indexes them
+            conn.execute("DROP TABLE IF EXISTS items_search")
+            conn.execute("CREATE VIRTUAL TABLE items_search USING fts5(key, tokenize='trigram')")
+            keys = pd.read_sql_query('SELECT "row", "Name", "PLU" FROM items', conn)
+            keys['key'] = keys['Name'].fillna('').astype(str).str.lower() + SEARCH_SEPARATOR + keys['PLU'].astype(str)
+            conn.executemany("INSERT INTO items_search (rowid, key) VALUES (?, ?)", zip(keys['row'].tolist(), keys['key'].tolist()))
+
+            self._set_meta(conn, 'dtypes', dtypes)
+            self._set_meta(conn, 'source', signature)
+            self._bump_version(conn)
+        self.dtypes = self._load_dtypes()
+        return True
+
+    # ------------------------------------------------------------------
+    # Edit log
+    # ------------------------------------------------------------------
+
+    def log_edits(self, workspace: str, plus, field: str, values):
+        """Append edits of one field, durably, in one transaction."""
+        now = time.time()
+        rows = zip(np.asarray(plus, dtype=np.int64).tolist(), _python_values(values))
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO edits (workspace, plu, field, value, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                [(workspace, plu, field, value, now) for plu, value in rows],
+            )
+
+    def pending_edits(self, workspace: str) -> pd.DataFrame:
+        """The workspace's latest logged value per (PLU, field)."""
+        with self._lock:
+            return pd.read_sql_query(
+                """
+                SELECT plu, field, value FROM edits
+                WHERE seq IN (SELECT MAX(seq) FROM edits WHERE workspace = ? GROUP BY plu, field)
+                ORDER BY seq
+                """,
+                self._conn, params=(workspace,),
+            )
+
+    def compact_edits(self, workspace: str):
+        """Drop log entries a later edit of the same cell superseded."""
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                DELETE FROM edits WHERE workspace = ?
+                AND seq NOT IN (SELECT MAX(seq) FROM edits WHERE workspace = ? GROUP BY plu, field)
+                """,
+                (workspace, workspace),
+            )
+
+    def commit(self, updates: dict, workspace: str = None, plus=None) -> int:
+        """
+        Write {field: (rows, values)} into items as the synced state and,
+        if given, drop the workspace's logged edits of plus, atomically.
+        Returns the new version.
+        """
+        with self._transaction() as conn:
+            for field, (rows, values) in updates.items():
+                if len(rows):
+                    conn.executemany(
+                        f'UPDATE items SET {_quote(field)} = ? WHERE "row" = ?',
+                        zip(_python_values(values), np.asarray(rows, dtype=np.int64).tolist()),
+                    )
+            if workspace is not None and plus is not None and len(plus):
+                plus = np.asarray(plus, dtype=np.int64).tolist()
+                for start in range(0, len(plus), BATCH_ROWS):
+                    batch = plus[start:start + BATCH_ROWS]
+                    conn.execute(
+                        f"DELETE FROM edits WHERE workspace = ? AND plu IN ({','.join('?' * len(batch))})",
+                        [workspace, *batch],
+                    )
+            return self._bump_version(conn)
+
+    def close(self):
+        self._conn.close()
+
+
+class DatabaseStore(CatalogStore):
+    """
+    CatalogStore interface over CatalogDatabase.items.
+
+    Filters and sorts run as SQL on the indexes and only the rows asked for
+    are read, so nothing but the PLU index is held in memory. It reads the
+    database's latest committed state; versions is the database version it
+    was opened at, which keys the query cache.
+    """
+
+    def __init__(self, db: CatalogDatabase, version: int = None):
+        self.db = db
+        version = db.version() if version is None else version
+        self.versions = {column: version for column in EDITABLE_COLUMNS}
+        self.columns = list(db.dtypes)
+        self.size = db.query("SELECT COUNT(*) FROM items")[0][0]
+        self.plu = self.values('PLU')
+        self.plu_index = pd.Index(self.plu)
+        self.categories = self.distinct('Category 1')
+
+    def with_version(self, version: int) -> 'DatabaseStore':
+        """This store for a later version; the PLU index is shared."""
+        store = copy.copy(self)
+        store.versions = {column: version for column in EDITABLE_COLUMNS}
+        return store
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _typed(self, column: str, values: list) -> np.ndarray:
+        dtype = self.db.dtypes[column]
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(dtype):
+            return np.asarray(values, dtype=object)
+        if pd.api.types.is_integer_dtype(dtype):
+            return np.asarray(values, dtype=dtype)
+        return np.asarray([np.nan if v is None else v for v in values], dtype=dtype)
+
+    def _select(self, columns, rows) -> list:
+        """(row, *columns) tuples for rows, in batches."""
+        names = ", ".join(['"row"'] + [_quote(c) for c in columns])
+        rows = np.asarray(rows, dtype=np.int64).tolist()
+        result = []
+        for start in range(0, len(rows), BATCH_ROWS):
+            batch = rows[start:start + BATCH_ROWS]
+            result += self.db.query(f"SELECT {names} FROM items WHERE \"row\" IN ({','.join('?' * len(batch))})", batch)
+        return result
+
+    def values(self, column: str, rows=None) -> np.ndarray:
+        if rows is None or len(rows) > self.size * SCAN_FRACTION:
+            values = self._typed(column, [v for (v,) in self.db.query(f'SELECT {_quote(column)} FROM items ORDER BY "row"')])
+            return values if rows is None else values[np.asarray(rows, dtype=np.int64)]
+        rows = np.asarray(rows, dtype=np.int64)
+        found = dict(self._select([column], rows))
+        return self._typed(column, [found.get(row) for row in rows.tolist()])
+
+    def dtype(self, column: str):
+        return self.db.dtypes[column]
+
+    def distinct(self, column: str) -> list:
+        values = self.db.query(f"SELECT DISTINCT {_quote(column)} FROM items WHERE {_quote(column)} IS NOT NULL")
+        return sorted(str(value) for (value,) in values)
+
+    def counts(self, column: str) -> dict:
+        values = self.db.query(
+            f"SELECT {_quote(column)}, COUNT(*) FROM items WHERE {_quote(column)} IS NOT NULL GROUP BY 1"
+        )
+        return {str(value): count for value, count in values}
+
+    def equals(self, column: str, value) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._rows(f"{_quote(column)} = ?", [value])] = True
+        return mask
+
+    def take(self, rows) -> pd.DataFrame:
+        rows = np.asarray(rows, dtype=np.int64)
+        frame = pd.DataFrame.from_records(self._select(self.columns, rows), columns=['row'] + self.columns)
+        frame = frame.set_index('row').reindex(rows)
+        frame.index.name = None
+        for column, dtype in self.db.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and dtype.categories is None:
+                frame[column] = frame[column].astype('category')
+            elif not pd.api.types.is_integer_dtype(dtype) or frame[column].notna().all():
+                frame[column] = frame[column].astype(dtype)
+        return frame
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+
+    def _rows(self, where: str = None, params=(), order: str = None) -> np.ndarray:
+        sql = 'SELECT "row" FROM items'
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY " + (order or '"row"')
+        return np.fromiter((row for (row,) in self.db.query(sql, list(params))), dtype=np.int64)
+
+    def _where(self, search=None, category=None, stock_status=None, rows=None):
+        clauses, params = [], []
+        if category is not None:
+            clauses.append('"Category 1" = ?')
+            params.append(category)
+        if stock_status is not None:
+            clauses.append('"Stock Status" = ?')
+            params.append(stock_status)
+        if search:
+            term = search.lower()
+            if SEARCH_SEPARATOR in term:
+                return "0", []
+            if len(term) >= NGRAM:
+                # A quoted trigram phrase matches exactly the keys containing term
+                clauses.append('"row" IN (SELECT rowid FROM items_search WHERE items_search MATCH ?)')
+                params.append('"' + term.replace('"', '""') + '"')
+            else:
+                clauses.append('"row" IN (SELECT rowid FROM items_search WHERE instr(key, ?) > 0)')
+                params.append(term)
+        if rows is not None:
+            clauses.append(f'"row" IN ({",".join("?" * len(rows))})')
+            params += np.asarray(rows, dtype=np.int64).tolist()
+        return " AND ".join(clauses), params
+
+    def filter_rows(self, search=None, category=None, stock_status=None) -> np.ndarray:
+        if not search and category is None and stock_status is None:
+            # Row ids are the positions 0..size-1
+            return np.arange(self.size, dtype=np.int64)
+        return self._rows(*self._where(search, category, stock_status))
+
+    def ordered_rows(self, filters: dict, sort=None) -> np.ndarray:
+        if sort is None:
+            return self.filter_rows(**filters)
+        column, descending = sort
+        key = NAME_ORDER if column == 'Name' else _quote(column)
+        # Ties keep row order, as CatalogStore's stable sort does
+        return self._rows(*self._where(**filters), order=f'{key} {"DESC" if descending else "ASC"}, "row"')
+
+    def _status_mask(self, status):
+        return self.equals('Stock Status', status)
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def set_values(self, rows, column: str, values):
+        raise TypeError("The database store is read-only; edit through a DatabaseSession")
+
+    def refresh_rows(self, rows):
+        for column in EDITABLE_COLUMNS:
+            self.versions[column] += 1
+
+
+class DatabaseSession(EditOverlay, DatabaseStore):
+    """
+    A session's view of a DatabaseCatalog: the database with the session's
+    unsynced edits on top. Every edit is appended to the workspace's edit
+    log before it is applied, and a session opened on the same workspace
+    (e.g. after a restart) starts from the logged edits.
+    """
+
+    def __init__(self, shared: 'DatabaseCatalog', workspace: str = DEFAULT_WORKSPACE):
+        self.shared = shared
+        self.workspace = workspace
+        self._edits = {}
+        self.rebase(shared.current)
+
+        pending = shared.db.pending_edits(workspace)
+        for field, group in pending.groupby('field', sort=False):
+            if field not in EDITABLE_COLUMNS:
+                continue
+            rows = self.rows_for_plus(group['plu'].to_numpy(dtype=np.int64))
+            known = rows >= 0
+            values = group['value'].to_numpy()[known]
+            if pd.api.types.is_numeric_dtype(self.dtype(field)):
+                values = values.astype(self.dtype(field))
+            self._merge_edits(rows[known], field, values)
+
+    def _base_values(self, column, rows=None) -> np.ndarray:
+        return DatabaseStore.values(self, column, rows)
+
+    def _base_take(self, rows) -> pd.DataFrame:
+        return DatabaseStore.take(self, rows)
+
+    def filter_rows(self, search=None, category=None, stock_status=None) -> np.ndarray:
+        rows = DatabaseStore.filter_rows(self, search, category, stock_status)
+        if stock_status is None or 'Stock Status' not in self._edits:
+            return rows
+        # Edited statuses override the database's: drop rows edited away, add rows edited to it
+        edit_rows, values = self._edits['Stock Status']
+        rows = np.setdiff1d(rows, edit_rows, assume_unique=True)
+        candidates = edit_rows[values == stock_status]
+        if len(candidates):
+            where, params = self._where(search, category, rows=candidates)
+            rows = np.union1d(rows, self._rows(where, params))
+        return rows
+
+    # Edited sort or filter columns are ordered in memory from values()
+    ordered_rows = CatalogStore.ordered_rows
+
+    def set_values(self, rows, column: str, values):
+        """Log the edits, then record them in the overlay; items are only written by a sync."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.shared.db.log_edits(self.workspace, self.plu[rows], column, values)
+        self._merge_edits(rows, column, values)
+
+
+class DatabaseCatalog(SharedCatalog):
+    """
+    SharedCatalog over a CatalogDatabase. Versions are database versions;
+    publish() and adopt() commit to items, and sessions are DatabaseSessions
+    whose unsynced edits live in the database's edit log.
+    """
+
+    def __init__(self, db: CatalogDatabase):
+        self.db = db
+        self._lock = threading.Lock()
+        self._current = self._open(DatabaseStore(db))
+
+    def _open(self, store: DatabaseStore) -> CatalogVersion:
+        baseline = {field: _readonly(store.values(field)) for field in EDITABLE_COLUMNS}
+        return CatalogVersion(store.versions['Stock Status'], None, store, baseline)
+
+    def session(self, workspace: str = DEFAULT_WORKSPACE):
+        """A session's (store, change tracker), starting from the workspace's logged edits."""
+        self.db.compact_edits(workspace)
+        store = DatabaseSession(self, workspace)
+        tracker = ChangeTracker(store, baseline=store.base.baseline)
+        tracker.rebase(store.base.baseline, {field: store.edits(field)[0] for field in EDITABLE_COLUMNS})
+        return store, tracker
+
+    def publish(self, store: DatabaseSession, tracker: ChangeTracker, rows) -> CatalogVersion:
+        rows = np.asarray(rows, dtype=np.int64)
+        version = self._commit({field: store.edits(field, rows) for field in EDITABLE_COLUMNS},
+                               workspace=store.workspace, plus=store.plu[rows])
+        self.refresh(store, tracker)
+        return version
+
+    def adopt(self, updates: dict) -> CatalogVersion:
+        return self._commit(updates)
+
+    def _commit(self, updates: dict, workspace: str = None, plus=None) -> CatalogVersion:
+        with self._lock:
+            base = self._current
+            version = self.db.commit(updates, workspace, plus)
+            if version != base.version + 1:
+                # Another process committed in between: read everything again
+                self._current = self._open(base.store.with_version(version))
+                return self._current
+            baseline = dict(base.baseline)
+            for field, (rows, values) in updates.items():
+                if len(rows):
+                    snapshot = base.baseline[field].copy()
+                    snapshot[rows] = values
+                    baseline[field] = _readonly(snapshot)
+            self._current = CatalogVersion(version, None, base.store.with_version(version), baseline)
+            return self._current
+
+    def refresh(self, store: DatabaseSession, tracker: ChangeTracker) -> bool:
+        # Pick up commits from other processes sharing the database
+        if self.db.version() != self._current.version:
+            with self._lock:
+                version = self.db.version()
+                if version != self._current.version:
+                    self._current = self._open(self._current.store.with_version(version))
+        return super().refresh(store, tracker)
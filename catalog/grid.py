@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from catalog.store import EDITABLE_COLUMNS
+
+# Columns shown in the editable grid, in display order
+GRID_COLUMNS = ['Name', 'Category 1', 'PLU', 'Base Price', 'Stock Quantity', 'Stock Status']
+MODIFIED_COLUMN = 'Modified'
+REVERT_COLUMN = 'Revert'
+
+
+def grid_frame(page: pd.DataFrame, tracker) -> pd.DataFrame:
+    """
+    Build the frame handed to st.data_editor for one page.
+    The index carries the catalog row ids so edits map straight back to the store.
+    """
+    grid = page[GRID_COLUMNS].copy()
+    grid.insert(0, MODIFIED_COLUMN, tracker.is_modified(page.index.to_numpy()))
+    grid[REVERT_COLUMN] = False
+    return grid
+
+
+def diff_edits(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the grid before and after editing.
+    Returns one row per changed cell: row (catalog row id), column, value.
+    Cleared cells are ignored rather than written as missing values.
+    """
+    rows = before.index.to_numpy()
+    parts = []
+    for column in EDITABLE_COLUMNS:
+        old = before[column].to_numpy()
+        new = after[column].to_numpy()
+        present = ~pd.isna(new)
+        if pd.api.types.is_numeric_dtype(before[column].dtype):
+            # Compare at the catalog's precision (e.g. float32 prices)
+            new = np.where(present, new, 0).astype(before[column].dtype)
+        changed = (old != new) & present
+        if changed.any():
+            parts.append(pd.DataFrame({
+                'row': rows[changed],
+                'column': column,
+                'value': new[changed],
+            }))
+    if not parts:
+        return pd.DataFrame({'row': np.empty(0, dtype=np.int64), 'column': [], 'value': []})
+    return pd.concat(parts, ignore_index=True)
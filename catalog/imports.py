@@ -0,0 +1,188 @@
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog.ingest import CHUNK_ROWS
+from catalog.store import STOCK_STATUSES
+
+# Accepted headers (case-insensitive) -> catalog column; the Deliverect upload
+# format (location, plu, stock status, stock, price) is accepted as is
+COLUMN_ALIASES = {
+    'plu': 'PLU',
+    'base price': 'Base Price',
+    'price': 'Base Price',
+    'stock quantity': 'Stock Quantity',
+    'stock': 'Stock Quantity',
+    'quantity': 'Stock Quantity',
+    'stock status': 'Stock Status',
+    'status': 'Stock Status',
+}
+UPDATE_FIELDS = ('Base Price', 'Stock Quantity', 'Stock Status')
+MAX_ERRORS = 20
+
+ImportPlan = namedtuple('ImportPlan', ['rows', 'updates', 'report'])
+
+
+def _normalize_header(name) -> str:
+    return ' '.join(str(name).replace('_', ' ').split()).lower()
+
+
+def _read_chunks(source, filename: str, chunksize: int):
+    """
+    Chunks with only the recognized columns, renamed to catalog columns.
+    Clean numeric columns arrive parsed by the C reader; columns with stray
+    text arrive as strings and are validated by _numbers().
+    """
+    usecols = lambda name: _normalize_header(name) in COLUMN_ALIASES
+    suffix = Path(filename or '').suffix.lower()
+    if suffix in ('.xlsx', '.xls'):
+        # Excel has no chunked reader; the sheet is read once and sliced
+        try:
+            frame = pd.read_excel(source, usecols=usecols)
+        except ImportError as e:
+            raise ValueError(f"Reading Excel files needs an optional dependency: {e}") from None
+        chunks = (frame.iloc[start:start + chunksize] for start in range(0, len(frame), chunksize))
+    else:
+        chunks = pd.read_csv(source, chunksize=chunksize, usecols=usecols)
+    for chunk in chunks:
+        _check_aliases(chunk.columns)
+        yield chunk.rename(columns=lambda name: COLUMN_ALIASES[_normalize_header(name)])
+
+
+def _check_aliases(headers):
+    """ValueError if two headers name the same catalog column, e.g. "Price" and "Base Price"."""
+    targets = {}
+    for header in headers:
+        targets.setdefault(COLUMN_ALIASES[_normalize_header(header)], []).append(str(header))
+    clashes = [f"{', '.join(names)} (all {column})" for column, names in targets.items() if len(names) > 1]
+    if clashes:
+        raise ValueError(f"The file has more than one column for the same field: {'; '.join(clashes)}")
+
+
+def _numbers(values: pd.Series):
+    """Values as float64 (NaN for blank) and a mask of non-numeric or negative cells."""
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        parsed = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return parsed, parsed < 0
+    raw = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+    parsed = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return parsed, ((raw != '').to_numpy() & np.isnan(parsed)) | (parsed < 0)
+
+
+def _parse_status(values: pd.Series) -> np.ndarray:
+    """Codes into STOCK_STATUSES; -1 for blank, -2 for unknown. Only distinct spellings are normalized."""
+    codes, spellings = pd.factorize(values)
+    normalized = pd.Series(spellings.astype(str)).str.strip().str.upper().str.replace(r'[\s-]+', '_', regex=True)
+    lookup = pd.Index(STOCK_STATUSES).get_indexer(normalized.to_numpy(dtype=object))
+    lookup[(lookup < 0) & (normalized.to_numpy(dtype=object) != '')] = -2
+    # factorize gives -1 for missing cells, which stays "blank"
+    return np.append(lookup, -1)[codes]
+
+
+def read_updates(store, source, filename: str = None, chunksize: int = CHUNK_ROWS) -> ImportPlan:
+    """
+    Stream a stock/price file and resolve it against the catalog.
+
+    The file needs a PLU column and any of price, stock and stock status
+    (blank cells leave that field unchanged). Values are validated a chunk
+    at a time, then every PLU is resolved in one lookup through the store's
+    PLU hash index. Rows with invalid values or unknown PLUs are skipped and
+    reported; when a PLU repeats, its last row wins.
+    Returns an ImportPlan(rows, updates {field: (row mask, values)}, report).
+    """
+    plus, prices, stock, statuses = [], [], [], []
+    errors = []
+    counts = {'rows_read': 0, 'invalid': 0}
+    columns = None
+    first_line = 2  # header is line 1
+
+    for chunk in _read_chunks(source, filename, chunksize):
+        if columns is None:
+            columns = set(chunk.columns)
+            if 'PLU' not in columns:
+                raise ValueError("The file has no PLU column")
+            if not columns & set(UPDATE_FIELDS):
+                raise ValueError("The file has no price, stock or stock status column")
+        n = len(chunk)
+        lines = np.arange(first_line, first_line + n)
+        first_line += n
+        counts['rows_read'] += n
+
+        if pd.api.types.is_integer_dtype(chunk['PLU'].dtype):
+            plu = chunk['PLU'].to_numpy(dtype=np.int64)
+            invalid = np.zeros(n, dtype=bool)
+        else:
+            parsed, invalid = _numbers(chunk['PLU'])
+            invalid |= np.isnan(parsed) | (parsed % 1 != 0)
+            plu = np.where(invalid, 0, parsed).astype(np.int64)
+        reasons = np.where(invalid, 'invalid PLU', '').astype(object)
+
+        if 'Base Price' in chunk:
+            price, bad = _numbers(chunk['Base Price'])
+            reasons[bad & (reasons == '')] = 'invalid price'
+        else:
+            price = np.full(n, np.nan)
+        if 'Stock Quantity' in chunk:
+            quantity, bad = _numbers(chunk['Stock Quantity'])
+            bad |= ~np.isnan(quantity) & (quantity % 1 != 0)
+            reasons[bad & (reasons == '')] = 'invalid stock'
+        else:
+            quantity = np.full(n, np.nan)
+        if 'Stock Status' in chunk:
+            status = _parse_status(chunk['Stock Status'])
+            reasons[(status == -2) & (reasons == '')] = 'unknown stock status'
+        else:
+            status = np.full(n, -1)
+
+        bad = reasons != ''
+        if bad.any():
+            counts['invalid'] += int(bad.sum())
+            for line, reason in zip(lines[bad][:max(MAX_ERRORS - len(errors), 0)], reasons[bad]):
+                errors.append({'line': int(line), 'error': reason})
+        good = ~bad
+        plus.append(plu[good])
+        prices.append(price[good])
+        stock.append(quantity[good])
+        statuses.append(status[good])
+
+    if columns is None:
+        raise ValueError("The file is empty")
+
+    plus = np.concatenate(plus)
+    prices, stock, statuses = np.concatenate(prices), np.concatenate(stock), np.concatenate(statuses)
+
+    # Duplicates: keep each PLU's last row
+    duplicated = pd.Index(plus).duplicated(keep='last')
+    duplicate_plus = np.unique(plus[duplicated])
+    keep = ~duplicated
+
+    # One hash lookup for every PLU in the file
+    rows = store.rows_for_plus(plus)
+    unknown = rows < 0
+    unknown_plus = np.unique(plus[unknown])
+    keep &= ~unknown
+
+    rows = rows[keep]
+    updates = {
+        'Base Price': (~np.isnan(prices[keep]), prices[keep]),
+        'Stock Quantity': (~np.isnan(stock[keep]), stock[keep]),
+        'Stock Status': (statuses[keep] >= 0, np.asarray(STOCK_STATUSES, dtype=object)[np.maximum(statuses[keep], 0)]),
+    }
+    report = {
+        **counts,
+        'matched': len(rows),
+        'unknown_plus': unknown_plus,
+        'duplicate_plus': duplicate_plus,
+        'errors': errors,
+    }
+    return ImportPlan(rows=rows, updates=updates, report=report)
+
+
+def apply_updates(tracker, plan: ImportPlan) -> dict:
+    """Merge an ImportPlan through the change tracker, one vectorized write per field; returns rows changed per field."""
+    return {
+        field: tracker.record(plan.rows[present], field, values[present])
+        for field, (present, values) in plan.updates.items()
+    }
@@ -0,0 +1,105 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from catalog.store import STOCK_STATUSES
+
+CHUNK_ROWS = 50_000
+
+# Explicit dtypes for the catalog columns we know about; other columns are inferred
+CATALOG_DTYPES = {
+    'Category 1': 'category',
+    'Category 2': 'category',
+    'Stock Status': pd.CategoricalDtype(STOCK_STATUSES),
+    'PLU': 'int64',
+    'Base Price': 'float32',
+}
+
+
+def iter_catalog(path, chunksize: int = CHUNK_ROWS, usecols=None, dtype=None):
+    """
+    Read a catalog CSV as a generator of DataFrame chunks with explicit dtypes.
+    Peak memory is bounded by chunksize rows, not the file size.
+    """
+    dtypes = {**CATALOG_DTYPES, **(dtype or {})}
+    if usecols is not None:
+        dtypes = {column: dtypes[column] for column in usecols if column in dtypes}
+    with pd.read_csv(path, chunksize=chunksize, usecols=usecols, dtype=dtypes) as reader:
+        yield from reader
+
+
+def concat_chunks(chunks) -> pd.DataFrame:
+    """Concatenate chunks, unifying categorical columns instead of falling back to object."""
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    categorical = [
+        column for column, dtype in chunks[0].dtypes.items()
+        if isinstance(dtype, pd.CategoricalDtype)
+    ]
+    unified = {}
+    for column in categorical:
+        if chunks[0][column].cat.ordered:
+            continue
+        unified[column] = union_categoricals([chunk[column] for chunk in chunks]).categories
+    for chunk in chunks:
+        for column, categories in unified.items():
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_catalog(path, chunksize: int = CHUNK_ROWS, usecols=None) -> pd.DataFrame:
+    """Whole catalog as one typed frame, parsed chunk by chunk."""
+    return concat_chunks(iter_catalog(path, chunksize=chunksize, usecols=usecols))
+
+
+class AtomicCsvWriter:
+    """
+    Push-style counterpart of write_csv_atomic(): write() chunks as they come,
+    the target is replaced only when the with-block exits without an error.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows = 0
+        self._handle = None
+        self._tmp_path = None
+
+    def __enter__(self):
+        fd, self._tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp", dir=self.path.parent)
+        self._handle = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+        return self
+
+    def write(self, chunk: pd.DataFrame):
+        chunk.to_csv(self._handle, index=False, header=self.rows == 0 and self._handle.tell() == 0)
+        self.rows += len(chunk)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._handle.close()
+            if exc_type is None:
+                if self.path.exists():
+                    os.chmod(self._tmp_path, self.path.stat().st_mode & 0o777)
+                os.replace(self._tmp_path, self.path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.unlink(self._tmp_path)
+        return False
+
+
+def write_csv_atomic(chunks, path) -> int:
+    """
+    Stream chunks to path through a temporary file in the same directory and
+    atomically replace the target, so readers never see a half-written file and
+    the input may be the same file being streamed. Returns rows written.
+    """
+    with AtomicCsvWriter(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows
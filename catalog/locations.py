@@ -0,0 +1,229 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from catalog.store import STOCK_STATUSES
+
+DEFAULT_LOCATION = "Times Square"
+UPLOAD_COLUMNS = ['location', 'plu', 'stock status', 'stock', 'price']
+
+
+def configured_locations():
+    """
+    Locations to manage, from the LOCATIONS setting (Streamlit secrets list or a
+    comma-separated environment variable). Defaults to the single demo store.
+    """
+    locations = None
+    try:
+        import streamlit as st
+        locations = st.secrets.get("LOCATIONS")
+    except Exception:
+        pass
+    if not locations:
+        locations = os.getenv("LOCATIONS")
+    if isinstance(locations, str):
+        locations = [name.strip() for name in locations.split(",") if name.strip()]
+    return list(locations) if locations else [DEFAULT_LOCATION]
+
+
+def configured_location_accounts():
+    """Optional location -> Deliverect account id mapping (LOCATION_ACCOUNTS secret/env as location=account,...)."""
+    mapping = None
+    try:
+        import streamlit as st
+        mapping = st.secrets.get("LOCATION_ACCOUNTS")
+    except Exception:
+        pass
+    if not mapping:
+        mapping = os.getenv("LOCATION_ACCOUNTS")
+    if isinstance(mapping, str):
+        pairs = (item.split("=", 1) for item in mapping.split(",") if "=" in item)
+        mapping = {location.strip(): account.strip() for location, account in pairs}
+    return dict(mapping or {})
+
+
+class LocationInventory:
+    """
+    PLU x location inventory held as dense location-major matrices.
+
+    stock (int32), status (int8 codes into STOCK_STATUSES) and a float32 price
+    override (NaN = use the catalog base price) per cell, plus a dirty bitmap of
+    cells changed since the last acknowledged sync. 500 locations x 50k PLUs is
+    about 250 MB. When sessions share one inventory, hold lock across an
+    edit-plan-mark_synced sequence.
+    """
+
+    def __init__(self, plus, base_prices, locations, stock=10, status="IN_STOCK"):
+        self.plus = np.asarray(plus, dtype=np.int64)
+        self.base_prices = np.asarray(base_prices, dtype=np.float32)
+        self.locations = list(locations)
+        self.statuses = list(STOCK_STATUSES)
+
+        self._plu_index = pd.Index(self.plus)
+        self._location_index = pd.Index(self.locations)
+
+        shape = (len(self.locations), len(self.plus))
+        self.stock = np.empty(shape, dtype=np.int32)
+        self.stock[:] = np.asarray(stock, dtype=np.int32)
+        self.status = np.empty(shape, dtype=np.int8)
+        self.status[:] = self._status_codes(status)
+        self.price = np.full(shape, np.nan, dtype=np.float32)
+        self.dirty = np.zeros(shape, dtype=bool)
+        self.lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _status_codes(self, statuses) -> np.ndarray:
+        codes = pd.Index(self.statuses).get_indexer(np.atleast_1d(np.asarray(statuses, dtype=object)))
+        if (codes < 0).any():
+            raise ValueError(f"Unknown stock status, expected one of {self.statuses}")
+        return codes.astype(np.int8)
+
+    def location_ids(self, locations) -> np.ndarray:
+        ids = self._location_index.get_indexer(list(locations))
+        if (ids < 0).any():
+            unknown = [loc for loc, i in zip(locations, ids) if i < 0]
+            raise KeyError(f"Unknown locations: {unknown}")
+        return ids
+
+    def plu_ids(self, plus) -> np.ndarray:
+        ids = self._plu_index.get_indexer(np.asarray(plus, dtype=np.int64))
+        if (ids < 0).any():
+            raise KeyError(f"{int((ids < 0).sum())} unknown PLUs")
+        return ids
+
+    # ------------------------------------------------------------------
+    # Edits: every location listed gets every PLU/value listed
+    # ------------------------------------------------------------------
+
+    def _assign(self, matrix, locations, plus, values):
+        cells = np.ix_(self.location_ids(locations), self.plu_ids(plus))
+        changed = matrix[cells] != values
+        if matrix.dtype.kind == 'f':
+            # NaN != NaN, so clearing an override that is already clear is not a change
+            changed &= ~(np.isnan(matrix[cells]) & np.isnan(np.broadcast_to(values, changed.shape)))
+        matrix[cells] = values
+        self.dirty[cells] |= changed
+
+    def set_stock(self, locations, plus, values):
+        self._assign(self.stock, locations, plus, np.asarray(values, dtype=np.int32))
+
+    def set_status(self, locations, plus, statuses):
+        self._assign(self.status, locations, plus, self._status_codes(statuses))
+
+    def set_price(self, locations, plus, prices):
+        """Per-location price override; NaN clears it back to the base price."""
+        self._assign(self.price, locations, plus, np.asarray(prices, dtype=np.float32))
+
+    def apply_catalog(self, locations, plus, stock, statuses, prices):
+        """Fan one set of catalog rows out to many locations."""
+        self.set_stock(locations, plus, stock)
+        self.set_status(locations, plus, statuses)
+        plu_ids = self.plu_ids(plus)
+        prices = np.asarray(prices, dtype=np.float32)
+        # Only store an override where the price differs from the base price
+        overrides = np.where(prices == self.base_prices[plu_ids], np.float32(np.nan), prices)
+        self.set_price(locations, plus, overrides)
+
+    def adopt(self, frame: pd.DataFrame) -> int:
+        """
+        Take upload-format rows of Deliverect's state (e.g. pulled inventory)
+        as already synced: cells are set without being marked dirty. Unknown
+        locations/PLUs and cells with an unsynced edit are skipped; missing
+        values leave the cell as it is. Returns the number of cells taken.
+        """
+        location_ids = self._location_index.get_indexer(np.asarray(frame['location'], dtype=object))
+        plu_ids = self._plu_index.get_indexer(np.asarray(frame['plu'], dtype=np.int64))
+        known = (location_ids >= 0) & (plu_ids >= 0)
+        known[known] = ~self.dirty[location_ids[known], plu_ids[known]]
+        frame, location_ids, plu_ids = frame[known], location_ids[known], plu_ids[known]
+
+        stock = frame['stock'].notna().to_numpy()
+        self.stock[location_ids[stock], plu_ids[stock]] = frame['stock'][stock].to_numpy(dtype=np.int32)
+
+        status = pd.Index(self.statuses).get_indexer(np.asarray(frame['stock status'], dtype=object))
+        valid = status >= 0
+        self.status[location_ids[valid], plu_ids[valid]] = status[valid]
+
+        price = frame['price'].notna().to_numpy()
+        prices = frame['price'][price].to_numpy(dtype=np.float32)
+        base = self.base_prices[plu_ids[price]]
+        self.price[location_ids[price], plu_ids[price]] = np.where(prices == base, np.float32(np.nan), prices)
+        return len(frame)
+
+    def fill_missing(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Upload-format rows with missing stock, status or price taken from the
+        inventory's current cells (a missing price is the effective price, the
+        base price unless overridden), i.e. what adopt() leaves in place.
+        Rows for unknown locations/PLUs keep their gaps.
+        """
+        frame = frame.copy()
+        location_ids = self._location_index.get_indexer(np.asarray(frame['location'], dtype=object))
+        plu_ids = self._plu_index.get_indexer(np.asarray(frame['plu'], dtype=np.int64))
+        known = (location_ids >= 0) & (plu_ids >= 0)
+
+        stock = known & frame['stock'].isna().to_numpy()
+        frame.loc[stock, 'stock'] = self.stock[location_ids[stock], plu_ids[stock]]
+        status = known & frame['stock status'].isna().to_numpy()
+        frame.loc[status, 'stock status'] = np.asarray(self.statuses, dtype=object)[
+            self.status[location_ids[status], plu_ids[status]]]
+        price = known & frame['price'].isna().to_numpy()
+        overrides = self.price[location_ids[price], plu_ids[price]]
+        frame.loc[price, 'price'] = np.where(np.isnan(overrides), self.base_prices[plu_ids[price]], overrides)
+        return frame
+
+    def mark_synced(self, location_ids=None, plu_ids=None):
+        if location_ids is None:
+            self.dirty[:] = False
+        else:
+            self.dirty[location_ids, plu_ids] = False
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def upload_rows(self, location_ids, plu_ids) -> pd.DataFrame:
+        """Deliverect upload rows for the given (location, PLU) cells."""
+        prices = self.price[location_ids, plu_ids]
+        prices = np.where(np.isnan(prices), self.base_prices[plu_ids], prices)
+        return pd.DataFrame({
+            'location': pd.Categorical.from_codes(location_ids, self.locations),
+            'plu': self.plus[plu_ids],
+            'stock status': pd.Categorical.from_codes(self.status[location_ids, plu_ids], self.statuses),
+            'stock': self.stock[location_ids, plu_ids],
+            'price': prices,
+        }, columns=UPLOAD_COLUMNS)
+
+
+def plan_sync(inventory: LocationInventory, location_accounts=None, default_account=None) -> dict:
+    """
+    Build the minimal upload for everything changed since the last sync.
+
+    Each dirty (location, PLU) cell yields exactly one row, so repeated edits
+    to a cell collapse to its latest value. Rows are grouped per account
+    (location_accounts mapping, else default_account).
+    Returns {account_id: {'frame': upload DataFrame, 'cells': (location_ids, plu_ids)}}.
+    """
+    location_accounts = location_accounts or {}
+    location_ids, plu_ids = np.nonzero(inventory.dirty)
+    if len(location_ids) == 0:
+        return {}
+
+    accounts = [location_accounts.get(location, default_account) for location in inventory.locations]
+    if any(account is None for account, count in zip(accounts, np.bincount(location_ids, minlength=len(accounts))) if count):
+        raise ValueError("No account configured for some edited locations")
+
+    account_codes, account_names = pd.factorize(pd.Series(accounts, dtype=object))
+    row_accounts = account_codes[location_ids]
+    plans = {}
+    for code, account in enumerate(account_names):
+        mask = row_accounts == code
+        if mask.any():
+            cells = (location_ids[mask], plu_ids[mask])
+            plans[account] = {'frame': inventory.upload_rows(*cells), 'cells': cells}
+    return plans
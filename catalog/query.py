@@ -0,0 +1,173 @@
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from catalog.search import ranked_search
+
+# Sort keys accepted by query_page() and the catalog column they order by
+SORT_COLUMNS = {
+    'name': 'Name',
+    'plu': 'PLU',
+    'category': 'Category 1',
+    'price': 'Base Price',
+    'stock': 'Stock Quantity',
+}
+
+# Editable columns each filter reads; their store versions are part of the cache key
+FILTER_DEPENDENCIES = {
+    'search': (),
+    'category': (),
+    'stock_status': ('Stock Status',),
+}
+
+CACHE_SIZE = 32
+
+Page = namedtuple('Page', ['rows', 'frame', 'total', 'cursor', 'next_cursor', 'prev_cursor'])
+
+
+class ResultCache:
+    """
+    Small LRU of (filter signature, sort, column versions) -> ordered row ids.
+    Locked, since a shared catalog's cache is used from every session's thread.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+            return rows
+
+    def put(self, key, rows):
+        with self._lock:
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# One cache per store; entries go away with the store
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def _cache_for(store) -> ResultCache:
+    with _caches_lock:
+        cache = _caches.get(store)
+        if cache is None:
+            cache = _caches[store] = ResultCache()
+        return cache
+
+
+def _parse_sort(sort):
+    """Accept 'price', '-price' or ('price', True) (descending) -> (key, descending)."""
+    if sort is None:
+        return None
+    if isinstance(sort, str):
+        key, descending = sort.lstrip('-'), sort.startswith('-')
+    else:
+        key, descending = sort
+    if key not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort key '{key}', expected one of {sorted(SORT_COLUMNS)}")
+    return key, bool(descending)
+
+
+def _active(filters) -> tuple:
+    active = tuple(sorted((k, v) for k, v in filters.items() if v is not None))
+    for name, _ in active:
+        if name not in FILTER_DEPENDENCIES:
+            raise ValueError(f"Unknown filter '{name}', expected one of {sorted(FILTER_DEPENDENCIES)}")
+    return active
+
+
+def _dependencies(active, sort) -> set:
+    """Catalog columns whose edits can change the result of the filters and sort."""
+    columns = {column for name, _ in active for column in FILTER_DEPENDENCIES[name]}
+    if sort is not None:
+        columns.add(SORT_COLUMNS[sort[0]])
+    return columns
+
+
+def _signature(store, active, sort):
+    """Hashable cache key covering the filters, the sort and the columns they read."""
+    columns = _dependencies(active, sort)
+    versions = tuple(sorted((c, store.versions[c]) for c in columns if c in store.versions))
+    return active, sort, versions
+
+
+def _search_rows(store, filters, sort) -> np.ndarray:
+    """Search matches that pass the other filters, most relevant first unless sorted."""
+    rows = ranked_search(store, filters['search'])
+    others = {name: value for name, value in filters.items() if name != 'search' and value is not None}
+    if others:
+        keep = np.zeros(store.size, dtype=bool)
+        keep[store.filter_rows(**others)] = True
+        rows = rows[keep[rows]]
+    return store.sort_rows(rows, sort)
+
+
+def filtered_rows(store, filters=None, sort=None) -> np.ndarray:
+    """
+    Ordered row ids for filters/sort, served from the per-store cache when fresh.
+    Search results come in relevance order when no sort is given.
+    """
+    filters = dict(filters or {})
+    sort = _parse_sort(sort)
+    active = _active(filters)
+    # Sessions sharing a catalog share results for queries their own edits cannot change
+    store = store.shared_source(_dependencies(active, sort))
+    cache = _cache_for(store)
+    key = _signature(store, active, sort)
+    rows = cache.get(key)
+    if rows is None:
+        column_sort = None if sort is None else (SORT_COLUMNS[sort[0]], sort[1])
+        if filters.get('search'):
+            rows = _search_rows(store, filters, column_sort)
+        else:
+            rows = store.ordered_rows(filters, column_sort)
+        rows.setflags(write=False)
+        cache.put(key, rows)
+    return rows
+
+
+def query_page(store, filters=None, sort=None, cursor=None, page_size=20) -> Page:
+    """
+    Return one page of the filtered, sorted catalog plus the total match count.
+
+    filters: dict with any of search / category / stock_status (None = no filter)
+    sort:    'price', '-price' or ('price', descending)
+    cursor:  offset returned as next_cursor/prev_cursor by a previous call; a
+             cursor past the end is clamped to the last page.
+    Only the page rows are materialized; with a warm cache this is O(page_size).
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be positive")
+
+    rows = filtered_rows(store, filters, sort)
+    total = len(rows)
+
+    last_page_start = ((total - 1) // page_size) * page_size if total else 0
+    start = min(max(int(cursor or 0), 0), last_page_start)
+    page_rows = rows[start:start + page_size]
+
+    next_cursor = start + page_size if start + page_size < total else None
+    prev_cursor = max(start - page_size, 0) if start > 0 else None
+    return Page(
+        rows=page_rows,
+        frame=store.take(page_rows),
+        total=total,
+        cursor=start,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
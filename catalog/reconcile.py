@@ -0,0 +1,88 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Catalog column <- upload-format column of pulled inventory
+REMOTE_FIELDS = {
+    'Base Price': 'price',
+    'Stock Quantity': 'stock',
+    'Stock Status': 'stock status',
+}
+CONFLICT_COLUMNS = ['row', 'plu', 'field', 'synced', 'local', 'remote']
+
+MergePlan = namedtuple('MergePlan', ['updates', 'conflicts', 'report'])
+
+
+def plan_merge(store, remote: pd.DataFrame, location: str, tracker=None) -> MergePlan:
+    """
+    Join pulled inventory for one location onto the catalog by PLU.
+
+    Cells where Deliverect's value differs from the last synced value
+    (tracker's baseline, or the store's values without a tracker) become
+    updates {field: (rows, values)} to adopt as the new synced state. Where
+    the session also has an unsynced edit of that cell with yet another
+    value, the cell is a conflict: after adopting, the edit still wins
+    unless the operator takes the remote value.
+    """
+    remote = remote[np.asarray(remote['location'], dtype=object) == location]
+    plus = remote['plu'].to_numpy(dtype=np.int64)
+    # Latest row per PLU
+    keep = ~pd.Index(plus).duplicated(keep='last')
+    remote, plus = remote[keep], plus[keep]
+
+    # One hash lookup for every pulled PLU
+    rows = store.rows_for_plus(plus)
+    known = rows >= 0
+    rows = rows[known]
+    remote = remote[known]
+
+    updates, conflicts = {}, []
+    for field, source in REMOTE_FIELDS.items():
+        values = remote[source]
+        present = values.notna().to_numpy()
+        if not present.any():
+            continue
+        field_rows = rows[present]
+        dtype = store.dtype(field)
+        values = values[present].to_numpy(dtype=object)
+        if pd.api.types.is_numeric_dtype(dtype):
+            values = values.astype(dtype)
+        synced = tracker.baseline[field][field_rows] if tracker is not None else store.values(field, field_rows)
+        changed = values != synced
+        updates[field] = (field_rows[changed], values[changed])
+
+        if tracker is not None:
+            current = store.values(field, field_rows)
+            conflict = changed & tracker.dirty[field][field_rows] & (current != values)
+            if conflict.any():
+                conflicts.append(pd.DataFrame({
+                    'row': field_rows[conflict],
+                    'plu': store.plu[field_rows[conflict]],
+                    'field': field,
+                    'synced': synced[conflict].astype(object),
+                    'local': current[conflict].astype(object),
+                    'remote': values[conflict].astype(object),
+                }))
+
+    conflicts = pd.concat(conflicts, ignore_index=True) if conflicts else pd.DataFrame(columns=CONFLICT_COLUMNS)
+    report = {
+        'pulled': len(plus),
+        'matched': len(rows),
+        'unknown_plus': int((~known).sum()),
+        'updated': {field: len(field_rows) for field, (field_rows, _) in updates.items()},
+        'conflicts': len(conflicts),
+    }
+    return MergePlan(updates=updates, conflicts=conflicts, report=report)
+
+
+def take_remote(tracker, conflicts: pd.DataFrame) -> int:
+    """
+    Resolve conflicts in favor of Deliverect: drop the local edits of those
+    cells. Call after the merge was adopted, so the synced value is the remote one.
+    """
+    reverted = 0
+    for field, group in conflicts.groupby('field', sort=False):
+        rows = group['row'].to_numpy(dtype=np.int64)
+        reverted += tracker.record(rows, field, tracker.baseline[field][rows])
+    return reverted
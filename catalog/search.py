@@ -0,0 +1,296 @@
+import re
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from catalog.store import _run_starts
+
+# Words of a name or query: runs of letters, digits and underscores, matched lower-cased.
+# SEPARATOR splits names the same way in Arrow (RE2), whose \w would be ASCII-only.
+TOKEN = re.compile(r'\w+')
+SEPARATOR = r'[^\p{L}\p{N}_]+'
+# Sorts after every token starting with a given prefix
+_PREFIX_END = chr(0x10FFFF)
+
+CACHE_SIZE = 32
+# Names tokenized per chunk while building the index, which bounds Arrow's temporaries
+BUILD_ROWS = 100_000
+
+# Relevance: a name equal to the query, then names with more query words as whole words, then
+# names starting with the query's first word; ties go to shorter names. Scores stay small so
+# (score, name length) fits an int16 key, which NumPy sorts with a radix sort.
+FULL_NAME_BONUS = 16
+EXACT_TOKEN_WEIGHT = 2
+LEADING_BONUS = 1
+MAX_EXACT_TOKENS = 7
+MAX_NAME_LENGTH = 1023
+
+# ranked: row ids in result order; matched: sorted rows matching the words or PLU prefix,
+# which a longer query that starts with this one can only narrow (None when ranked came from
+# the substring fallback, which a longer query must not narrow from)
+SearchResult = namedtuple('SearchResult', ['ranked', 'matched'])
+
+
+def _is_number(token: str) -> bool:
+    return token.isascii() and token.isdigit()
+
+
+def normalize(term: str) -> str:
+    """Cache key for a search term: lower-cased, whitespace collapsed."""
+    return " ".join(term.lower().split())
+
+
+class SearchIndex:
+    """
+    Word index over the item names for prefix matching and ranking.
+
+    Words are sorted, so the words starting with a prefix are one contiguous
+    range and so are their postings (CSR, like CatalogStore's trigram index).
+    Each posting records whether the word leads its name; per row, the name's
+    length and word count feed the ranking. PLUs are matched on a sorted copy
+    of the PLU column rather than indexed as words.
+    """
+
+    def __init__(self, names: np.ndarray, plu: np.ndarray, category_codes: np.ndarray):
+        self.size = len(names)
+        self.name_length = np.zeros(self.size, dtype=np.int16)
+        words = {}
+        codes, rows = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for start in range(0, self.size, BUILD_ROWS):
+            chunk = pa.array(names[start:start + BUILD_ROWS], type=pa.string(), from_pandas=True)
+            chunk = pc.utf8_lower(pc.fill_null(chunk, ''))
+            self.name_length[start:start + len(chunk)] = np.minimum(pc.utf8_length(chunk).to_numpy(), MAX_NAME_LENGTH)
+
+            # Tokenize in Arrow: split on separators, flatten, and drop the empty pieces at either end
+            pieces = pc.split_pattern_regex(chunk, SEPARATOR)
+            tokens = pc.list_flatten(pieces)
+            keep = pc.not_equal(tokens, '')
+            encoded = pc.dictionary_encode(tokens.filter(keep))
+            # Chunk-local word numbers -> numbers shared by all chunks
+            shared = np.fromiter(
+                (words.setdefault(word, len(words)) for word in encoded.dictionary.to_pylist()),
+                dtype=np.int64, count=len(encoded.dictionary),
+            )
+            codes.append(shared[encoded.indices.to_numpy()])
+            rows.append(pc.list_parent_indices(pieces).filter(keep).to_numpy().astype(np.int64) + start)
+        pa.default_memory_pool().release_unused()
+
+        codes, rows = np.concatenate(codes), np.concatenate(rows)
+        leading = np.ones(len(rows), dtype=bool)
+        leading[1:] = rows[1:] != rows[:-1]
+        self.token_count = np.minimum(np.bincount(rows, minlength=self.size), np.iinfo(np.uint8).max).astype(np.uint8)
+
+        # Number the words in sorted order, then one stable sort over (word, row) pairs;
+        # the first of a word repeated in a name keeps its earliest position
+        words = np.fromiter(words, dtype=object, count=len(words))
+        order = np.argsort(words)
+        renumber = np.empty(len(words), dtype=np.int64)
+        renumber[order] = np.arange(len(words))
+        codes = renumber[codes]
+        pairs = codes * max(self.size, 1) + rows
+        order = np.argsort(pairs, kind='stable')
+        keep = order[_run_starts(pairs[order])]
+        self.vocabulary = np.sort(words)
+        self.offsets = np.searchsorted(codes[keep], np.arange(len(self.vocabulary) + 1)).astype(np.int64)
+        self.postings = rows[keep].astype(np.int32)
+        self.leading = leading[keep]
+
+        self.plu_order = np.argsort(plu, kind='stable').astype(np.int32)
+        self.plu_sorted = np.asarray(plu, dtype=np.int64)[self.plu_order]
+        self.plu_digits = len(str(int(self.plu_sorted[-1]))) if self.size else 0
+        self.category_codes = np.asarray(category_codes, dtype=np.int16)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _range(self, token: str):
+        """Postings slice of the words starting with token."""
+        low, high = np.searchsorted(self.vocabulary, [token, token + _PREFIX_END])
+        return slice(self.offsets[low], self.offsets[high])
+
+    def _exact(self, token: str):
+        """Postings slice of the word token itself, or None."""
+        slot = np.searchsorted(self.vocabulary, token)
+        if slot == len(self.vocabulary) or self.vocabulary[slot] != token:
+            return None
+        return slice(self.offsets[slot], self.offsets[slot + 1])
+
+    def mask(self, rows) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def plu_prefix_rows(self, digits: str) -> np.ndarray:
+        """Rows (unordered) whose PLU starts with digits, by value ranges on the sorted PLUs."""
+        if len(digits) > self.plu_digits or (digits.startswith('0') and digits != '0'):
+            return np.empty(0, dtype=np.int64)
+        value = int(digits)
+        spans = [(value, value + 1)] if value == 0 else [
+            (value * 10 ** extra, (value + 1) * 10 ** extra)
+            for extra in range(self.plu_digits - len(digits) + 1)
+        ]
+        bounds = np.searchsorted(self.plu_sorted, np.asarray(spans, dtype=np.int64).ravel())
+        return np.concatenate([self.plu_order[start:stop] for start, stop in bounds.reshape(-1, 2)])
+
+    def category_rows(self, code: int) -> np.ndarray:
+        return np.flatnonzero(self.category_codes == code)
+
+    def match(self, tokens: list, candidates=None) -> np.ndarray:
+        """
+        Sorted rows whose name has a word starting with each token (plus, for a
+        number, the rows whose PLU starts with it), among candidates if given.
+        """
+        ranges = sorted((self._range(token) for token in set(tokens)), key=lambda r: r.stop - r.start)
+        rows = candidates
+        for span in ranges:
+            if rows is None:
+                rows = np.flatnonzero(self.mask(self.postings[span]))
+            else:
+                rows = rows[self.mask(self.postings[span])[rows]]
+            if len(rows) == 0:
+                break
+        if rows is None:
+            rows = np.empty(0, dtype=np.int64)
+        if len(tokens) == 1 and _is_number(tokens[0]):
+            mask = self.mask(rows)
+            mask[self.plu_prefix_rows(tokens[0])] = True
+            rows = np.flatnonzero(mask)
+        return rows
+
+    def rank(self, rows: np.ndarray, tokens: list) -> np.ndarray:
+        """rows ordered by relevance to tokens; ties keep row order."""
+        if len(rows) == 0 or not tokens:
+            return rows
+        distinct = list(dict.fromkeys(tokens))
+        exact = np.zeros(len(rows), dtype=np.int16)
+        for token in distinct:
+            span = self._exact(token)
+            if span is not None:
+                exact += self.mask(self.postings[span])[rows]
+
+        span = self._range(tokens[0])
+        leading = self.mask(self.postings[span][self.leading[span]])[rows]
+        full = (exact == len(distinct)) & (self.token_count[rows] == len(tokens))
+        score = (
+            FULL_NAME_BONUS * full
+            + EXACT_TOKEN_WEIGHT * np.minimum(exact, MAX_EXACT_TOKENS)
+            + LEADING_BONUS * leading
+        ).astype(np.int16)
+        key = self.name_length[rows] - score * np.int16(MAX_NAME_LENGTH + 1)
+        return rows[np.argsort(key, kind='stable')]
+
+
+class SearchService:
+    """
+    Ranked product search over a catalog's fixed columns (Name, PLU, Category 1)
+    with an LRU of query -> results.
+
+    Queries match name words by prefix, every word of the query against some
+    word of the name, and are ranked by relevance. A number also matches PLUs
+    by prefix, with an exact PLU first; a query naming a category appends the
+    rest of that category. A query that extends a cached one (typing on)
+    only checks the cached query's matches. When nothing matches by word,
+    the store's substring search is the fallback.
+    """
+
+    def __init__(self, store, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._categories = {category.lower(): code for code, category in enumerate(store.categories)}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_lock = threading.Lock()
+
+    def index(self, store) -> SearchIndex:
+        """The word index, built on first use (once, whichever session gets there first)."""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    categories = pd.Categorical(store.values('Category 1'), categories=store.categories)
+                    self._index = SearchIndex(store.values('Name'), store.plu, categories.codes)
+        return self._index
+
+    def _lookup(self, key: str):
+        """(cached result for key, or the word-matched result of the longest cached query key extends)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, None
+            prefixes = [cached for cached, result in self._entries.items()
+                        if result.matched is not None and key.startswith(cached)]
+            return None, self._entries[max(prefixes, key=len)] if prefixes else None
+
+    def _store(self, key: str, result: SearchResult):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def search(self, store, term: str) -> np.ndarray:
+        """Row ids matching term, most relevant first (read-only)."""
+        key = normalize(term)
+        if not key:
+            return np.arange(store.size, dtype=np.int64)
+        entry, narrower = self._lookup(key)
+        if entry is not None:
+            return entry.ranked
+
+        index = self.index(store)
+        tokens = TOKEN.findall(key)
+        matched = index.match(tokens, None if narrower is None else narrower.matched)
+        ranked = index.rank(matched, tokens)
+
+        # Fast paths: an exact PLU goes first, an exact category brings in its other items
+        if _is_number(key) and len(key) <= index.plu_digits:
+            row = store.rows_for_plus([int(key)])[0]
+            if row >= 0:
+                ranked = np.concatenate([[row], ranked[ranked != row]])
+        category = self._categories.get(key)
+        if category is not None:
+            others = index.category_rows(category)
+            ranked = np.concatenate([ranked, others[~index.mask(matched)[others]]])
+
+        if len(ranked) == 0:
+            ranked, matched = store.filter_rows(search=term), None
+        ranked = np.asarray(ranked, dtype=np.int64)
+        ranked.setflags(write=False)
+        if matched is not None:
+            matched.setflags(write=False)
+        self._store(key, SearchResult(ranked, matched))
+        return ranked
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# One service per catalog. Search reads only fixed columns, and a catalog's sessions and later
+# versions all share its PLU index, so that keys the service (by id: an Index is not hashable);
+# the entry goes when the index does.
+_services = {}
+_services_lock = threading.Lock()
+
+
+def search_service(store) -> SearchService:
+    """The search service of a catalog's base store (a session's shared_source(()))."""
+    key = id(store.plu_index)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = SearchService(store)
+            weakref.finalize(store.plu_index, _services.pop, key, None)
+        return service
+
+
+def ranked_search(store, term: str) -> np.ndarray:
+    """Row ids matching term, most relevant first, from the catalog's shared search service."""
+    base = store.shared_source(())
+    return search_service(base).search(base, term)
@@ -0,0 +1,224 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from catalog.changes import ChangeTracker
+from catalog.store import EDITABLE_COLUMNS, CatalogStore, column_values
+
+# One published state of the shared catalog: read-only frame, its indexes and
+# the baseline arrays change trackers compare against
+CatalogVersion = namedtuple('CatalogVersion', ['version', 'df', 'store', 'baseline'])
+
+
+def _baseline(df: pd.DataFrame) -> dict:
+    baseline = {}
+    for field in EDITABLE_COLUMNS:
+        values = df[field].to_numpy()
+        if values.flags.writeable:
+            values = values.view()
+            values.setflags(write=False)
+        baseline[field] = values
+    return baseline
+
+
+class SharedCatalog:
+    """
+    Process-wide catalog shared by every session.
+
+    The current version is a read-only frame with its indexes built once.
+    Sessions read through an OverlayStore that keeps only their own edits.
+    publish() adopts a session's synced edits as a new version: the edited
+    columns are copied once and everything else (fixed columns, search and
+    category indexes) is shared with the previous version, which stays valid
+    for sessions that have not moved on yet.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._lock = threading.Lock()
+        self._current = CatalogVersion(1, df, CatalogStore(df), _baseline(df))
+
+    @property
+    def current(self) -> CatalogVersion:
+        return self._current
+
+    def session(self):
+        """A new session's (store, change tracker) over the current version."""
+        store = OverlayStore(self)
+        return store, ChangeTracker(store, baseline=store.base.baseline)
+
+    def publish(self, store: 'OverlayStore', tracker: ChangeTracker, rows) -> CatalogVersion:
+        """
+        Publish the session's edits at rows as a new version and move the
+        session onto it. Only cells the session edited are written, so
+        concurrent publishes from other sessions are never overwritten with
+        stale values.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        version = self.adopt({field: store.edits(field, rows) for field in EDITABLE_COLUMNS})
+        self.refresh(store, tracker)
+        return version
+
+    def adopt(self, updates: dict) -> CatalogVersion:
+        """
+        Publish {field: (rows, values)} as a new version, e.g. state pulled
+        from Deliverect. Sessions pick it up on refresh(); their own edits
+        stay on top.
+        """
+        with self._lock:
+            base = self._current
+            df = base.df.copy(deep=False)
+            baseline = dict(base.baseline)
+            changed = []
+            for field, (rows, values) in updates.items():
+                if not len(rows):
+                    continue
+                column = base.df[field].copy()
+                column.iloc[rows] = values
+                df[field] = column
+                snapshot = base.baseline[field].copy()
+                snapshot[rows] = values
+                snapshot.setflags(write=False)
+                baseline[field] = snapshot
+                changed.append(rows)
+            if changed:
+                rows_changed = np.unique(np.concatenate(changed))
+                self._current = CatalogVersion(base.version + 1, df, base.store.with_frame(df, rows_changed), baseline)
+            return self._current
+
+    def refresh(self, store: 'OverlayStore', tracker: ChangeTracker) -> bool:
+        """Move a session onto the latest version if it is behind; returns whether it moved."""
+        version = self._current
+        if store.base.version == version.version:
+            return False
+        store.rebase(version)
+        tracker.rebase(version.baseline, {field: store.edits(field)[0] for field in EDITABLE_COLUMNS})
+        return True
+
+
+class EditOverlay:
+    """
+    A session's edits on top of a read-only base, per column as sorted
+    (rows, values) arrays. Entries equal to the base value are dropped, so
+    the overlay is exactly the session's unsynced changes. Subclasses read the
+    base through _base_values() and _base_take().
+    """
+
+    def rebase(self, base: CatalogVersion):
+        """Read through base from now on, keeping this session's edits on top of it."""
+        previous = self.__dict__.get('versions', {})
+        # Share every index (and the base frame, if any) of the version's store
+        self.__dict__.update(base.store.__dict__)
+        self.base = base
+        # New version numbers so this session's cached results are recomputed
+        self.versions = {column: previous.get(column, 0) + 1 for column in EDITABLE_COLUMNS}
+        for column in list(self._edits):
+            self._store_edits(column, *self._edits[column])
+
+    def _base_values(self, column, rows=None) -> np.ndarray:
+        raise NotImplementedError
+
+    def _base_take(self, rows) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def edits(self, column: str, rows=None):
+        """This session's (rows, values) for column, limited to rows if given."""
+        edit_rows, values = self._edits.get(column, (np.empty(0, dtype=np.int64), np.empty(0)))
+        if rows is not None and len(edit_rows):
+            keep = np.isin(edit_rows, rows)
+            edit_rows, values = edit_rows[keep], values[keep]
+        return edit_rows, values
+
+    def _store_edits(self, column, rows, values):
+        differs = values != self._base_values(column, rows)
+        if differs.any():
+            self._edits[column] = (rows[differs], values[differs])
+        else:
+            self._edits.pop(column, None)
+
+    def _lookup(self, column, rows):
+        """Positions of rows in the column's overlay and which of them are edited."""
+        edit_rows, values = self._edits[column]
+        positions = np.minimum(np.searchsorted(edit_rows, rows), len(edit_rows) - 1)
+        return positions, edit_rows[positions] == rows
+
+    def values(self, column: str, rows=None) -> np.ndarray:
+        values = self._base_values(column, rows)
+        if column not in self._edits:
+            return values
+        edit_rows, edit_values = self._edits[column]
+        if rows is None:
+            values = values.copy()
+            values[edit_rows] = edit_values
+            return values
+        positions, hit = self._lookup(column, np.asarray(rows, dtype=np.int64))
+        values[hit] = edit_values[positions[hit]]
+        return values
+
+    def shared_source(self, columns):
+        # Queries that read none of the edited columns have the base version's results
+        if any(column in self._edits for column in columns):
+            return self
+        return self.base.store
+
+    def take(self, rows) -> pd.DataFrame:
+        frame = self._base_take(rows)
+        rows = np.asarray(rows, dtype=np.int64)
+        for column, (_, edit_values) in self._edits.items():
+            positions, hit = self._lookup(column, rows)
+            if hit.any():
+                frame.iloc[np.flatnonzero(hit), frame.columns.get_loc(column)] = edit_values[positions[hit]]
+        return frame
+
+    def _merge_edits(self, rows, column: str, values):
+        rows = np.asarray(rows, dtype=np.int64)
+        values = np.asarray(values, dtype=self._base_values(column, rows[:0]).dtype)
+        if column in self._edits:
+            rows = np.concatenate([self._edits[column][0], rows])
+            values = np.concatenate([self._edits[column][1], values])
+        # The latest write to a row wins: stable sort, keep each row's last entry
+        order = np.argsort(rows, kind='stable')
+        rows, values = rows[order], values[order]
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = rows[:-1] != rows[1:]
+        self._store_edits(column, rows[last], values[last])
+        self.versions[column] = self.versions.get(column, 0) + 1
+
+    def set_values(self, rows, column: str, values):
+        """Record values for rows in the overlay; the shared base is never written."""
+        self._merge_edits(rows, column, values)
+
+    def refresh_rows(self, rows):
+        for column in EDITABLE_COLUMNS:
+            self.versions[column] += 1
+
+
+class OverlayStore(EditOverlay, CatalogStore):
+    """
+    A session's copy-on-write view of a shared catalog version.
+
+    Indexes and the frame are the version's, by reference. Edits are kept
+    per column as sorted (rows, values) arrays and read through values() and
+    take(), so a session costs memory in proportion to what it changed.
+    """
+
+    def __init__(self, shared: SharedCatalog):
+        self.shared = shared
+        self._edits = {}
+        self.rebase(shared.current)
+
+    def _base_values(self, column, rows=None) -> np.ndarray:
+        return column_values(self.df[column], rows)
+
+    def _base_take(self, rows) -> pd.DataFrame:
+        return self.df.iloc[rows].copy()
+
+    def _status_mask(self, status):
+        mask = self.status_bitmaps.get(status)
+        if 'Stock Status' not in self._edits:
+            return mask
+        edit_rows, values = self._edits['Stock Status']
+        mask = np.zeros(self.size, dtype=bool) if mask is None else mask.copy()
+        mask[edit_rows] = values == status
+        return mask
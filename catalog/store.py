@@ -0,0 +1,271 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+STOCK_STATUSES = ("IN_STOCK", "OUT_OF_STOCK")
+EDITABLE_COLUMNS = ("Base Price", "Stock Quantity", "Stock Status")
+
+# Trigrams are the smallest n-gram we index; shorter search terms fall back to a scan
+NGRAM = 3
+
+
+def column_values(column: pd.Series, rows=None) -> np.ndarray:
+    """A column's values (for rows) as a NumPy array; categoricals come out as objects."""
+    if rows is None:
+        return column.to_numpy()
+    # Take before converting so a categorical column is not decoded in full
+    return np.asarray(column.array.take(np.asarray(rows, dtype=np.int64)))
+
+
+def _run_starts(values: np.ndarray) -> np.ndarray:
+    """Mask marking the first element of each run of equal values in a sorted array."""
+    mask = np.ones(len(values), dtype=bool)
+    mask[1:] = values[1:] != values[:-1]
+    return mask
+
+
+class CatalogStore:
+    """
+    Columnar view over the item catalog with precomputed filter indexes.
+
+    The DataFrame is kept by reference (no copy); filters return positional
+    row ids that can be passed to take() to materialize only what is shown.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.size = len(df)
+        # Bumped on every write so cached query results can tell when they are stale
+        self.versions = {column: 0 for column in EDITABLE_COLUMNS}
+
+        # Typed columns
+        self.plu = df['PLU'].to_numpy(dtype=np.int64)
+        # Factorize as plain values so the order is alphabetical even for categorical columns
+        codes, categories = pd.factorize(df['Category 1'].to_numpy(dtype=object), sort=True)
+        self.category_codes = codes.astype(np.int32)
+        self.categories = [str(c) for c in categories]
+
+        # PLU hash index
+        self.plu_index = pd.Index(self.plu)
+
+        # Category -> row bitmap
+        self.category_bitmaps = {
+            category: self.category_codes == code
+            for code, category in enumerate(self.categories)
+        }
+
+        # Stock status -> row bitmap
+        self.status_bitmaps = {status: np.zeros(self.size, dtype=bool) for status in STOCK_STATUSES}
+        self._refresh_status(np.arange(self.size))
+
+        # Search keys: lower-cased name and PLU, separated so n-grams never span both
+        keys = df['Name'].fillna('').astype(str).str.lower() + '\x00' + df['PLU'].astype(str)
+        self._key_series = keys.reset_index(drop=True)
+        self._search_keys = self._key_series.to_numpy(dtype=object)
+        self._build_ngram_index()
+
+    # ------------------------------------------------------------------
+    # Index construction
+    # ------------------------------------------------------------------
+
+    def _build_ngram_index(self):
+        """Build a CSR trigram index: sorted unique grams plus their row postings."""
+        keys = self._search_keys
+        lengths = np.fromiter((len(k) for k in keys), dtype=np.int64, count=self.size) + 1
+        text = '\x00'.join(keys) + '\x00'
+        chars = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+        # Compact the alphabet so a trigram fits in a single int64; '\x00' maps to 0
+        present = np.zeros(int(chars.max()) + 1, dtype=bool)
+        present[chars] = True
+        present[0] = True
+        self._alphabet = np.flatnonzero(present)
+        lookup = np.cumsum(present, dtype=np.int64) - 1
+        dense = lookup[chars]
+        width = len(self._alphabet)
+
+        first, second, third = dense[:-2], dense[1:-1], dense[2:]
+        valid = (first != 0) & (second != 0) & (third != 0)
+        grams = ((first * width + second) * width + third)[valid]
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), lengths)[:-2][valid]
+
+        # One sort over (gram, row) pairs, dropping repeated grams within a row
+        if width ** 3 * max(self.size, 1) < 2 ** 63:
+            pairs = np.sort(grams * self.size + rows)
+            pairs = pairs[_run_starts(pairs)]
+            grams, rows = pairs // self.size, pairs % self.size
+        else:
+            order = np.lexsort((rows, grams))
+            grams, rows = grams[order], rows[order]
+            keep = _run_starts(grams) | _run_starts(rows)
+            grams, rows = grams[keep], rows[keep]
+
+        starts = np.flatnonzero(_run_starts(grams))
+        self._grams = grams[starts]
+        self._gram_offsets = np.append(starts, len(grams)).astype(np.int64)
+        self._postings = rows.astype(np.int32)
+
+    def with_frame(self, df: pd.DataFrame, rows) -> 'CatalogStore':
+        """
+        A store over df, a copy of this store's frame whose editable columns
+        differ only at rows. Indexes over the fixed columns (PLU, category,
+        search) are shared with this store rather than rebuilt.
+        """
+        store = copy.copy(self)
+        store.df = df
+        store.versions = {column: version + 1 for column, version in self.versions.items()}
+        store.status_bitmaps = {status: bitmap.copy() for status, bitmap in self.status_bitmaps.items()}
+        store._refresh_status(np.asarray(rows, dtype=np.int64))
+        return store
+
+    def _refresh_status(self, rows):
+        values = self.df['Stock Status'].to_numpy()[rows]
+        for status in set(values.tolist()) - set(self.status_bitmaps):
+            self.status_bitmaps[status] = np.zeros(self.size, dtype=bool)
+        for status, bitmap in self.status_bitmaps.items():
+            bitmap[rows] = values == status
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def values(self, column: str, rows=None) -> np.ndarray:
+        """Current values of column (for rows); treat the full column as read-only."""
+        return column_values(self.df[column], rows)
+
+    def dtype(self, column: str):
+        return self.df[column].dtype
+
+    def distinct(self, column: str) -> list:
+        """Sorted distinct values of a fixed column, as strings."""
+        return sorted(self.df[column].dropna().astype(str).unique())
+
+    def counts(self, column: str) -> dict:
+        """{value (as a string): number of rows} for column, as of this store's version."""
+        counts = self.df[column].dropna().astype(str).value_counts(sort=False)
+        return {value: int(count) for value, count in counts.items()}
+
+    def equals(self, column: str, value) -> np.ndarray:
+        """Row mask where a fixed column equals value."""
+        column = self.df[column]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Compare integer codes instead of strings
+            categories = column.cat.categories
+            if value not in categories:
+                return np.zeros(len(column), dtype=bool)
+            return column.cat.codes.to_numpy() == categories.get_loc(value)
+        return column.to_numpy(dtype=object) == value
+
+    def shared_source(self, columns):
+        """The store whose cached query results hold for a query reading columns (here, always this one)."""
+        return self
+
+    def _status_mask(self, status):
+        return self.status_bitmaps.get(status)
+
+    def rows_for_plus(self, plus) -> np.ndarray:
+        """Row ids for the given PLUs (-1 where a PLU is unknown)."""
+        return self.plu_index.get_indexer_for(np.asarray(plus, dtype=np.int64))
+
+    def search_rows(self, term: str) -> np.ndarray:
+        """Sorted row ids whose name or PLU contains term (case-insensitive)."""
+        term = term.lower()
+        if '\x00' in term:
+            return np.empty(0, dtype=np.int64)
+
+        if len(term) < NGRAM:
+            matches = self._key_series.str.contains(term, regex=False)
+            return np.flatnonzero(matches.to_numpy())
+
+        codes = np.frombuffer(term.encode('utf-32-le'), dtype=np.uint32)
+        dense = np.searchsorted(self._alphabet, codes)
+        if (dense >= len(self._alphabet)).any() or (self._alphabet[dense] != codes).any():
+            return np.empty(0, dtype=np.int64)
+
+        dense = dense.astype(np.int64)
+        width = len(self._alphabet)
+        grams = np.unique((dense[:-2] * width + dense[1:-1]) * width + dense[2:])
+
+        slots = np.searchsorted(self._grams, grams)
+        if (slots >= len(self._grams)).any() or (self._grams[slots] != grams).any():
+            return np.empty(0, dtype=np.int64)
+
+        # Intersect posting lists, shortest first
+        postings = [
+            self._postings[self._gram_offsets[s]:self._gram_offsets[s + 1]]
+            for s in slots
+        ]
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                break
+
+        # Trigrams may match non-contiguously, so confirm the substring on the candidates
+        keys = self._search_keys
+        confirmed = [row for row in candidates.tolist() if term in keys[row]]
+        return np.asarray(confirmed, dtype=np.int64)
+
+    def filter_rows(self, search=None, category=None, stock_status=None) -> np.ndarray:
+        """
+        Intersect the search, category and stock indexes.
+        Returns sorted positional row ids; None means "no filter".
+        """
+        mask = None
+        if category is not None:
+            mask = self.category_bitmaps.get(category)
+            if mask is None:
+                return np.empty(0, dtype=np.int64)
+        if stock_status is not None:
+            status_mask = self._status_mask(stock_status)
+            if status_mask is None:
+                return np.empty(0, dtype=np.int64)
+            mask = status_mask if mask is None else mask & status_mask
+
+        if search:
+            rows = self.search_rows(search)
+            return rows if mask is None else rows[mask[rows]]
+        if mask is None:
+            return np.arange(self.size, dtype=np.int64)
+        return np.flatnonzero(mask)
+
+    def ordered_rows(self, filters: dict, sort=None) -> np.ndarray:
+        """filter_rows() ordered by sort, a (column, descending) pair; ties keep row order."""
+        return self.sort_rows(self.filter_rows(**filters), sort)
+
+    def sort_rows(self, rows, sort=None) -> np.ndarray:
+        """rows reordered by sort, a (column, descending) pair; ties keep their order."""
+        if sort is None or len(rows) == 0:
+            return rows
+        column, descending = sort
+        values = self.values(column, rows)
+        if column == 'Name':
+            values = pd.Series(values).fillna('').astype(str).str.lower().to_numpy(dtype=object)
+        # Rank once so ascending and descending share a stable integer sort
+        ranks = pd.factorize(values, sort=True)[0]
+        order = np.argsort(-ranks if descending else ranks, kind='stable')
+        return rows[order]
+
+    def take(self, rows) -> pd.DataFrame:
+        """Materialize only the given rows."""
+        return self.df.iloc[rows]
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def set_values(self, rows, column: str, values):
+        """Write values for rows into the catalog and keep the indexes in sync."""
+        rows = np.asarray(rows, dtype=np.int64)
+        self.df.iloc[rows, self.df.columns.get_loc(column)] = values
+        self.versions[column] = self.versions.get(column, 0) + 1
+        if column == 'Stock Status':
+            self._refresh_status(rows)
+
+    def refresh_rows(self, rows):
+        """Re-read indexed mutable columns for rows changed outside set_values()."""
+        for column in EDITABLE_COLUMNS:
+            self.versions[column] += 1
+        self._refresh_status(np.asarray(rows, dtype=np.int64))
@@ -0,0 +1,243 @@
+"""
+Composable streaming stages over catalog CSVs.
+
+A stage turns an iterator of DataFrame chunks into another, so a pipeline
+of any number of stages is a single pass over the input. Stages declare the
+columns they read, which lets run_pipeline() parse only the columns that
+are still needed downstream.
+"""
+import queue
+import threading
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from catalog.ingest import CHUNK_ROWS, AtomicCsvWriter, iter_catalog
+
+# reads: columns the stage uses; keeps: the only columns it passes on (None = all);
+# run: chunks -> chunks; stats: dict the stage fills in while running
+Stage = namedtuple('Stage', ['name', 'reads', 'keeps', 'run', 'stats'])
+
+PREFETCH_CHUNKS = 2
+PRICE_COLUMNS = {'PLU': 'plu', 'Base Price': 'price'}
+# An image check's ok (True, False, None = no answer) as 1 / 0 / -1
+_CHECK_STATES = {True: 1, False: 0, None: -1}
+
+
+def select_columns(columns) -> Stage:
+    columns = list(columns)
+
+    def run(chunks):
+        for chunk in chunks:
+            yield chunk[columns]
+
+    return Stage(f"select {', '.join(columns)}", set(columns), set(columns), run, {})
+
+
+def dedupe(keys=('PLU',)) -> Stage:
+    """Keep the first row of each key across the whole file."""
+    keys = list(keys)
+    stats = {'dropped': 0}
+
+    def run(chunks):
+        seen = set()
+        for chunk in chunks:
+            hashes = pd.util.hash_pandas_object(chunk[keys], index=False).to_numpy()
+            fresh = ~pd.Index(hashes).duplicated()
+            fresh &= ~np.fromiter((h in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+            seen.update(hashes[fresh].tolist())
+            stats['dropped'] += int((~fresh).sum())
+            yield chunk[fresh]
+
+    return Stage(f"dedupe on {', '.join(keys)}", set(keys), None, run, stats)
+
+
+def head_per_group(keys, n: int) -> Stage:
+    """Keep the first n rows of each group across chunks, like groupby().head(n) on the whole file."""
+    keys = list(keys)
+    stats = {'original': Counter(), 'kept': Counter()}
+
+    def run(chunks):
+        original, kept = stats['original'], stats['kept']
+        for chunk in chunks:
+            # String keys so missing values group consistently across chunks
+            codes, groups = pd.factorize(pd.MultiIndex.from_frame(chunk[keys].astype(str)))
+            seen = np.array([kept[group] for group in groups], dtype=np.int64)
+            position = pd.Series(codes).groupby(codes).cumcount().to_numpy() + seen[codes]
+            keep = position < n
+            original.update(dict(zip(groups, np.bincount(codes, minlength=len(groups)).tolist())))
+            kept.update(dict(zip(groups, np.bincount(codes[keep], minlength=len(groups)).tolist())))
+            yield chunk[keep]
+
+    return Stage(f"top {n} per {', '.join(keys)}", set(keys), None, run, stats)
+
+
+def validate_images(column: str = 'Image Links', keep_missing: bool = False, on_result=None, cache=None) -> Stage:
+    """
+    Keep rows whose image URL answers as an image (rows without a URL are
+    dropped unless keep_missing). Rows whose check got no answer (timeout,
+    connection error) are kept and counted as unknown: only a definite
+    failure removes a row. A chunk's URLs are checked on a worker
+    thread while the previous chunk moves on downstream; each URL is checked
+    once per run, and fresh results come from the persistent cache (cache,
+    an image_validator.ResultCache, or the default one).
+    """
+    # aiohttp is only needed when this stage is used
+    from itemCsv.image_validator import validate_urls
+
+    stats = {'invalid': 0, 'unknown': 0, 'missing': 0, 'urls': 0}
+
+    def run(chunks):
+        results = {}
+
+        def check(urls):
+            return validate_urls(urls, cache=cache, on_result=on_result) if urls else {}
+
+        def keep_valid(chunk, checked):
+            results.update(checked)
+            links = chunk[column]
+            missing = links.isna().to_numpy()
+            state = np.fromiter(
+                (_CHECK_STATES[results.get(url, {}).get('ok', False)] for url in links.tolist()),
+                dtype=np.int8, count=len(links),
+            )
+            keep = state != 0
+            stats['invalid'] += int((~keep & ~missing).sum())
+            stats['unknown'] += int((state == -1).sum())
+            stats['missing'] += int(missing.sum())
+            stats['urls'] = len(results)
+            return chunk[keep | missing] if keep_missing else chunk[keep]
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-check") as executor:
+            pending = None
+            queued = set()
+            for chunk in chunks:
+                urls = [url for url in chunk[column].dropna().unique().tolist() if url not in queued]
+                queued.update(urls)
+                future = executor.submit(check, urls)
+                if pending is not None:
+                    yield keep_valid(pending[0], pending[1].result())
+                pending = (chunk, future)
+            if pending is not None:
+                yield keep_valid(pending[0], pending[1].result())
+
+    return Stage(f"validate images in {column}", {column}, None, run, stats)
+
+
+def extract_prices(path, columns=None) -> Stage:
+    """
+    Side output: write PLU and Base Price (as plu, price) to path while
+    passing chunks on unchanged. path is replaced once the run succeeds.
+    """
+    columns = dict(columns or PRICE_COLUMNS)
+    stats = {'written': 0}
+
+    def run(chunks):
+        with AtomicCsvWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk[list(columns)].rename(columns=columns))
+                yield chunk
+        stats['written'] = writer.rows
+
+    return Stage(f"extract prices to {path}", set(columns), None, run, stats)
+
+
+def input_columns(stages, output: bool = True):
+    """Columns to parse so every stage and the output get theirs (None = all)."""
+    needed = None if output else set()
+    for stage in reversed(stages):
+        if stage.keeps is not None:
+            needed = set(stage.keeps)
+        if needed is not None:
+            needed |= stage.reads
+    return needed
+
+
+def _prefetch(chunks, depth: int = PREFETCH_CHUNKS):
+    """Parse the CSV on a reader thread, up to depth chunks ahead of the stages."""
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stopped = threading.Event()
+
+    def read():
+        try:
+            for chunk in chunks:
+                if stopped.is_set():
+                    return
+                buffer.put(chunk)
+            buffer.put(done)
+        except BaseException as e:
+            buffer.put(e)
+
+    reader = threading.Thread(target=read, name="catalog-reader", daemon=True)
+    reader.start()
+    try:
+        while (item := buffer.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        # Drain so a reader blocked on a full queue can see the stop flag
+        while reader.is_alive():
+            try:
+                buffer.get(timeout=0.05)
+            except queue.Empty:
+                pass
+
+
+def _counted(chunks, counts: dict):
+    for chunk in chunks:
+        counts['rows'] += len(chunk)
+        yield chunk
+
+
+def run_pipeline(source, stages, output=None, chunksize: int = CHUNK_ROWS, prefetch: bool = True) -> dict:
+    """
+    Stream source through stages in one pass and write what comes out to
+    output atomically (output may be source itself; None = discard, e.g.
+    when the only result is a side output). Returns
+    {'rows_in', 'rows_out', 'stages': [{'stage', 'rows', **stats}]}.
+    """
+    # Check every stage gets its columns before reading anything
+    header = pd.read_csv(source, nrows=0).columns
+    available = set(header)
+    for stage in stages:
+        missing = stage.reads - available
+        if missing:
+            raise ValueError(f"'{stage.name}' needs column(s) {sorted(missing)}, not in its input")
+        if stage.keeps is not None:
+            available = set(stage.keeps)
+
+    usecols = input_columns(stages, output is not None)
+    if usecols is not None:
+        # Keep the file's column order
+        usecols = [column for column in header if column in usecols]
+
+    rows_in = {'rows': 0}
+    chunks = _counted(iter_catalog(source, chunksize=chunksize, usecols=usecols), rows_in)
+    if prefetch:
+        chunks = _prefetch(chunks)
+    stage_rows = []
+    for stage in stages:
+        stage_rows.append({'rows': 0})
+        chunks = _counted(stage.run(chunks), stage_rows[-1])
+
+    if output is not None:
+        with AtomicCsvWriter(output) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        rows_out = writer.rows
+    else:
+        rows_out = sum(len(chunk) for chunk in chunks)
+
+    return {
+        'rows_in': rows_in['rows'],
+        'rows_out': rows_out,
+        'stages': [
+            {'stage': stage.name, 'rows': counts['rows'], **stage.stats}
+            for stage, counts in zip(stages, stage_rows)
+        ],
+    }
@@ -0,0 +1,159 @@
+import gzip
+import random
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) seconds, used when a caller passes no timeout
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_RETRIES = 2
+BACKOFF_SECONDS = 0.5
+
+# Methods that are safe to replay on a transient failure
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Per-host settings: pool size and whether the endpoint accepts gzip request bodies
+_host_config = {
+    "api.deliverect.io": {"pool_maxsize": 20, "gzip": False},
+}
+
+_session = None
+_lock = threading.Lock()
+
+
+def configure_host(host: str, pool_maxsize: int = None, pool_connections: int = None, gzip_body: bool = None):
+    """
+    Set the connection pool size and gzip support for one host.
+    Takes effect for new sessions; call before the first request or after close().
+    """
+    with _lock:
+        config = _host_config.setdefault(host, {})
+        if pool_maxsize is not None:
+            config["pool_maxsize"] = pool_maxsize
+        if pool_connections is not None:
+            config["pool_connections"] = pool_connections
+        if gzip_body is not None:
+            config["gzip"] = gzip_body
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    default = HTTPAdapter(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE)
+    session.mount("https://", default)
+    session.mount("http://", default)
+    for host, config in _host_config.items():
+        adapter = HTTPAdapter(
+            pool_connections=config.get("pool_connections", DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE),
+        )
+        session.mount(f"https://{host}", adapter)
+        session.mount(f"http://{host}", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """The process-wide keep-alive session; its urllib3 pools are shared by all threads."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close():
+    """Close pooled connections; the next request opens a fresh session."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _compress(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, (bytes, bytearray)):
+        return gzip.compress(data, compresslevel=5)
+    return _gzip_stream(data)
+
+
+def _is_replayable(data) -> bool:
+    return data is None or isinstance(data, (str, bytes, bytearray, dict))
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, BACKOFF_SECONDS * (2 ** attempt))
+
+
+def request(method: str, url: str, timeout=None, retries: int = None, gzip_body: bool = None, **kwargs):
+    """
+    Send a request through the shared session.
+
+    timeout:   defaults to DEFAULT_TIMEOUT
+    retries:   transient failures (connection errors, timeouts, 429/5xx) are retried
+               with jittered backoff; defaults to DEFAULT_RETRIES for idempotent
+               methods and 0 otherwise. Streamed bodies are never retried.
+    gzip_body: compress data with Content-Encoding: gzip; defaults to the host setting
+    """
+    method = method.upper()
+    host = urlsplit(url).hostname or ""
+    if retries is None:
+        retries = DEFAULT_RETRIES if method in IDEMPOTENT_METHODS else 0
+    if gzip_body is None:
+        gzip_body = _host_config.get(host, {}).get("gzip", False)
+
+    data = kwargs.pop("data", None)
+    if gzip_body and data is not None:
+        data = _compress(data)
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Encoding": "gzip"}
+    if not _is_replayable(data):
+        retries = 0
+
+    session = get_session()
+    attempt = 0
+    while True:
+        try:
+            response = session.request(method, url, data=data, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            response.close()
+        time.sleep(_backoff(attempt))
+        attempt += 1
+
+
+def get(url: str, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs):
+    return request("HEAD", url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs):
+    return request("PUT", url, **kwargs)
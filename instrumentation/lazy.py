@@ -0,0 +1,28 @@
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Stand-in that imports the real module on first attribute access."""
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.__name__)
+        # Later lookups find the module's attributes directly, without coming back here
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str):
+    """
+    A module that is only imported when one of its attributes is first used,
+    e.g. requests = lazy_import("requests"). Returns the module itself if it
+    is already loaded.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
@@ -0,0 +1,190 @@
+import os
+import re
+import threading
+import time
+from functools import wraps
+
+import numpy as np
+
+# Latency samples kept per timer; percentiles cover the most recent ones
+WINDOW = 2048
+PROMETHEUS_PREFIX = "deliverect_erp"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _setting(name: str):
+    value = None
+    try:
+        import streamlit as st
+        value = st.secrets.get(name)
+    except Exception:
+        pass
+    return value if value is not None else os.getenv(name)
+
+
+def _enabled() -> bool:
+    """METRICS_ENABLED setting (secrets or env); on unless set to 0/false/no/off."""
+    value = _setting("METRICS_ENABLED")
+    if value is None:
+        return True
+    return str(value).strip().lower() not in ("0", "false", "no", "off")
+
+
+# Read once at import: when off, timed() returns functions unchanged and
+# timer() hands out a shared no-op, so disabled instrumentation costs nothing
+ENABLED = _enabled()
+
+
+class _Timer:
+    """Ring buffer of the last WINDOW durations plus running count and sum."""
+
+    def __init__(self, window: int = WINDOW):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self.lock:
+            self.samples[self.count % len(self.samples)] = seconds
+            self.count += 1
+            self.total += seconds
+
+    def clear(self):
+        with self.lock:
+            self.count = 0
+            self.total = 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return self.samples[:min(self.count, len(self.samples))].copy(), self.count, self.total
+
+
+_timers = {}
+_counters = {}
+_registry_lock = threading.Lock()
+
+
+def _timer_for(name: str) -> _Timer:
+    timer = _timers.get(name)
+    if timer is None:
+        with _registry_lock:
+            timer = _timers.setdefault(name, _Timer())
+    return timer
+
+
+def observe(name: str, seconds: float):
+    """Record one duration for name."""
+    if ENABLED:
+        _timer_for(name).observe(seconds)
+
+
+def count(name: str, value: int = 1):
+    """Add value to counter name."""
+    if ENABLED:
+        with _registry_lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+class _Span:
+    __slots__ = ("_timer", "_began")
+
+    def __init__(self, timer: _Timer):
+        self._timer = timer
+
+    def __enter__(self):
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.observe(time.perf_counter() - self._began)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def timer(name: str):
+    """Context manager timing its block under name (a no-op when disabled)."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(_timer_for(name))
+
+
+def timed(name: str = None):
+    """Decorator timing every call under name (default: the function's name)."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+        metric = _timer_for(name or func.__name__)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - began)
+        return wrapper
+    return decorate
+
+
+def summary() -> list:
+    """Per timer: name, count, p50/p95/max (seconds, over the recent window) and total seconds."""
+    rows = []
+    for name, metric in sorted(_timers.items()):
+        samples, calls, total = metric.snapshot()
+        if not calls:
+            continue
+        p50, p95 = np.percentile(samples, [50, 95])
+        rows.append({
+            'name': name, 'count': calls, 'p50': float(p50), 'p95': float(p95),
+            'max': float(samples.max()), 'total': total,
+        })
+    return rows
+
+
+def counters() -> dict:
+    with _registry_lock:
+        return dict(_counters)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    family = f"{PROMETHEUS_PREFIX}_latency_seconds"
+    lines = [f"# HELP {family} Latency of instrumented operations.", f"# TYPE {family} summary"]
+    for name, metric in sorted(_timers.items()):
+        samples, calls, total = metric.snapshot()
+        op = _label(name)
+        if calls:
+            for quantile, value in zip(QUANTILES, np.percentile(samples, [q * 100 for q in QUANTILES])):
+                lines.append(f'{family}{{op="{op}",quantile="{quantile}"}} {value:.9g}')
+        lines.append(f'{family}_sum{{op="{op}"}} {total:.9g}')
+        lines.append(f'{family}_count{{op="{op}"}} {calls}')
+
+    for name, value in sorted(counters().items()):
+        metric = f"{PROMETHEUS_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget all samples and counts; decorated functions keep recording into the same timers."""
+    with _registry_lock:
+        for metric in _timers.values():
+            metric.clear()
+        _counters.clear()
@@ -0,0 +1,265 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from instrumentation import metrics
+
+STATUS_PATH = Path(__file__).resolve().parent / ".upload_status.sqlite"
+CALLBACK_PATH = "/callback"
+METRICS_PATH = "/metrics"
+MAX_BODY_BYTES = 1 << 20
+
+PENDING = "pending"
+
+
+def _setting(name: str):
+    value = None
+    try:
+        import streamlit as st
+        value = st.secrets.get(name)
+    except Exception:
+        pass
+    return value or os.getenv(name)
+
+
+def configured_callback():
+    """
+    (host, port, public_url) for the callback receiver, from the CALLBACK_HOST,
+    CALLBACK_PORT and CALLBACK_PUBLIC_URL settings. Deliverect must be able to
+    reach public_url (e.g. a tunnel to this port); without it the local URL is used.
+    """
+    host = _setting("CALLBACK_HOST") or "127.0.0.1"
+    port = int(_setting("CALLBACK_PORT") or 8765)
+    return host, port, _setting("CALLBACK_PUBLIC_URL")
+
+
+class UploadStatusStore:
+    """
+    Upload results by Deliverect fileId, in SQLite.
+    Cheap to poll: version() changes only when a row changes.
+    """
+
+    def __init__(self, path=STATUS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS uploads (
+                file_id TEXT PRIMARY KEY,
+                account_id TEXT,
+                status TEXT NOT NULL,
+                payload TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS uploads_status ON uploads (status);
+            CREATE INDEX IF NOT EXISTS uploads_updated ON uploads (updated_at);
+        """)
+
+    def register(self, file_ids, account_id: str = None):
+        """Record uploads as pending; a callback that already arrived is kept."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO uploads VALUES (?, ?, ?, NULL, ?, ?)",
+                [(file_id, account_id, PENDING, now, now) for file_id in file_ids if file_id],
+            )
+
+    def record_callback(self, file_id: str, payload: dict) -> str:
+        """Store a callback payload; returns the status derived from it."""
+        status = str(payload.get("status") or payload.get("result") or "received").lower()
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO uploads VALUES (?, NULL, ?, ?, ?, ?)
+                ON CONFLICT (file_id) DO UPDATE SET
+                    status = excluded.status, payload = excluded.payload, updated_at = excluded.updated_at
+                """,
+                (file_id, status, json.dumps(payload), now, now),
+            )
+        return status
+
+    def get(self, file_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, account_id, status, payload, created_at, updated_at FROM uploads WHERE file_id = ?",
+                (file_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'file_id': row[0], 'account_id': row[1], 'status': row[2],
+            'payload': json.loads(row[3]) if row[3] else None,
+            'created_at': row[4], 'updated_at': row[5],
+        }
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM uploads GROUP BY status"))
+
+    def recent(self, limit: int = 10) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_id, account_id, status, updated_at FROM uploads ORDER BY updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {'file_id': r[0], 'account_id': r[1], 'status': r[2], 'updated_at': r[3]}
+            for r in rows
+        ]
+
+    def version(self) -> float:
+        with self._lock:
+            (latest,) = self._conn.execute("SELECT MAX(updated_at) FROM uploads").fetchone()
+        return latest or 0.0
+
+    def close(self):
+        self._conn.close()
+
+
+def _parse_body(body: bytes, content_type: str = "") -> dict:
+    """
+    The callback payload as a dict, whatever the body: JSON (a non-object is
+    wrapped as {"data": ...}), a form, or anything else as {"data": text}.
+    Never fails, so a fileId in the query string still gets recorded.
+    """
+    if not body:
+        return {}
+    text = body.decode("utf-8", "replace")
+    if "application/x-www-form-urlencoded" in content_type:
+        return {key: values[0] for key, values in parse_qs(text).items()}
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return {"data": text}
+    return payload if isinstance(payload, dict) else {"data": payload}
+
+
+class CallbackServer:
+    """
+    Minimal asyncio HTTP server that receives Deliverect upload callbacks.
+
+    POST /callback with a JSON body carrying fileId (or ?fileId= in the URL)
+    is stored in the UploadStatusStore; GET /metrics serves the app's metrics
+    for Prometheus when instrumentation is enabled. Runs its own event loop in
+    a daemon thread so it can live next to the Streamlit script.
+    """
+
+    def __init__(self, store: UploadStatusStore, host: str = "127.0.0.1", port: int = 0):
+        self.store = store
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{CALLBACK_PATH}"
+
+    def start(self):
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port)
+                )
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="upload-callbacks", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {"error": "payload too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+
+            url = urlsplit(target)
+            if method == "GET" and url.path == METRICS_PATH and metrics.ENABLED:
+                await self._respond(writer, 200, metrics.prometheus_text(), "text/plain; version=0.0.4")
+                return
+            if method != "POST" or url.path != CALLBACK_PATH:
+                await self._respond(writer, 404, {"error": "not found"})
+                return
+
+            payload = _parse_body(body, headers.get("content-type", ""))
+            file_id = payload.get("fileId") or parse_qs(url.query).get("fileId", [None])[0]
+            if not file_id:
+                await self._respond(writer, 400, {"error": "fileId missing"})
+                return
+
+            # SQLite write off the event loop
+            status = await asyncio.get_running_loop().run_in_executor(
+                None, self.store.record_callback, file_id, payload
+            )
+            await self._respond(writer, 200, {"fileId": file_id, "status": status})
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._respond(writer, 400, {"error": "bad request"})
+        except Exception:
+            # e.g. the status database failing; the sender gets an answer and can retry
+            try:
+                await self._respond(writer, 500, {"error": "internal error"})
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: int, body, content_type: str = "application/json"):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                   500: "Internal Server Error"}
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + data
+        )
+        await writer.drain()
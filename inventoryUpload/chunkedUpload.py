@@ -0,0 +1,114 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from instrumentation.lazy import lazy_import
+from inventoryUpload.inveUpload import request_signed_url, upload_csv
+from inventoryUpload.serialize import write_upload_csv
+
+# For its exception types; imported with the HTTP pool on the first upload, not at startup
+requests = lazy_import("requests")
+
+# Rows per uploaded file; each chunk gets its own signed URL
+CHUNK_ROWS = 50_000
+MAX_WORKERS = 4
+RETRIES = 3
+BACKOFF_SECONDS = 1.0
+
+
+def split_chunks(n_rows: int, chunk_rows: int = CHUNK_ROWS):
+    """[(start, stop), ...] row ranges of at most chunk_rows."""
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    return [(start, min(start + chunk_rows, n_rows)) for start in range(0, n_rows, chunk_rows)]
+
+
+def chunk_csv_bytes(upload_df: pd.DataFrame, start: int, stop: int) -> bytes:
+    """
+    Rows [start, stop) of upload_df as UTF-8 CSV, header first. A chunk is
+    at most CHUNK_ROWS rows (a few MB), so it is built in memory and sent
+    with a Content-Length, which presigned PUT URLs require.
+    """
+    return bytes(write_upload_csv(upload_df.iloc[start:stop]))
+
+
+def _backoff(attempt: int, base: float) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, base * (2 ** attempt))
+
+
+def upload_chunk(account_id: str, callback_url: str, upload_df: pd.DataFrame, start: int, stop: int,
+                 retries: int = RETRIES, backoff: float = BACKOFF_SECONDS):
+    """
+    Upload one chunk with its own signed URL, retrying with backoff.
+    Returns a dict with the chunk range, fileId, bytes sent, attempts and latency
+    (including retries).
+    """
+    attempt = 0
+    began = time.perf_counter()
+    payload = chunk_csv_bytes(upload_df, start, stop)
+    while True:
+        try:
+            signed_url, upload_headers, file_id = request_signed_url(account_id, callback_url)
+            upload_csv(payload, signed_url, upload_headers)
+            return {
+                'start': start,
+                'stop': stop,
+                'rows': stop - start,
+                'file_id': file_id,
+                'bytes_sent': len(payload),
+                'attempts': attempt + 1,
+                'seconds': time.perf_counter() - began,
+            }
+        except (requests.exceptions.RequestException, KeyError) as e:
+            # Client errors other than throttling will not succeed on retry
+            response = getattr(e, 'response', None)
+            status = response.status_code if response is not None else None
+            if attempt >= retries or (status is not None and 400 <= status < 500 and status != 429):
+                raise
+            time.sleep(_backoff(attempt, backoff))
+            attempt += 1
+
+
+def upload_inventory(account_id: str, callback_url: str, upload_df: pd.DataFrame,
+                     chunk_rows: int = CHUNK_ROWS, max_workers: int = MAX_WORKERS,
+                     retries: int = RETRIES, backoff: float = BACKOFF_SECONDS, on_chunk=None):
+    """
+    Split upload_df into size-bounded chunks and upload them concurrently.
+    on_chunk(result), if given, is called as each chunk finishes.
+
+    Returns a report dict: chunks, rows, bytes_sent, seconds, rows_per_second,
+    bytes_per_second, chunk_latencies (seconds, in chunk order), file_ids and
+    the per-chunk results. Raises the first chunk failure after retries.
+    """
+    began = time.perf_counter()
+    ranges = split_chunks(len(upload_df), chunk_rows)
+    results = []
+    if ranges:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges)))) as executor:
+            futures = [
+                executor.submit(upload_chunk, account_id, callback_url, upload_df, start, stop, retries, backoff)
+                for start, stop in ranges
+            ]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if on_chunk is not None:
+                    on_chunk(results[-1])
+    results.sort(key=lambda r: r['start'])
+
+    seconds = time.perf_counter() - began
+    bytes_sent = sum(r['bytes_sent'] for r in results)
+    rows = sum(r['rows'] for r in results)
+    return {
+        'chunks': len(results),
+        'rows': rows,
+        'bytes_sent': bytes_sent,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'bytes_per_second': bytes_sent / seconds if seconds else 0.0,
+        'chunk_latencies': [r['seconds'] for r in results],
+        'file_ids': [r['file_id'] for r in results],
+        'results': results,
+    }
@@ -1,14 +1,45 @@
 import pandas as pd
-import requests
 from authentication.tokening import getHeaders
+from instrumentation.lazy import lazy_import
+from instrumentation.metrics import timed
 
+# Imported (with requests) on the first upload rather than at startup
+pool = lazy_import("httpClient.pool")
 
 
+def convert_to_upload_format(df_or_series, location="Times Square"):
+    """
+    Convert product catalog to Deliverect inventory upload format.
+    Format: location | plu | stock status | stock | price
+    """
+    # Handle both single row (Series) and DataFrame
+    if isinstance(df_or_series, pd.Series):
+        # Single product
+        upload_df = pd.DataFrame({
+            'location': [location],
+            'plu': [df_or_series['PLU']],
+            'stock status': [df_or_series['Stock Status']],
+            'stock': [df_or_series['Stock Quantity']],
+            'price': [df_or_series['Base Price']]
+        })
+    else:
+        # Multiple products
+        upload_df = pd.DataFrame({
+            'location': location,
+            'plu': df_or_series['PLU'],
+            'stock status': df_or_series['Stock Status'],
+            'stock': df_or_series['Stock Quantity'],
+            'price': df_or_series['Base Price']
+        })
+    return upload_df
+
+
+@timed("request_signed_url")
 def request_signed_url(account_id: str, callback_url: str):
-    resp = requests.post(
+    resp = pool.post(
         f"https://api.deliverect.io/catalog/accounts/{account_id}/inventoryUploadUrl",
         headers={
-            **getHeaders(),
+            **getHeaders(account_id),
             "Content-Type": "application/json",
         },
         json={"callbackUrl": callback_url},
@@ -18,10 +49,16 @@ def request_signed_url(account_id: str, callback_url: str):
     data = resp.json()
     return data["signedUrl"], data.get("headers", {"Content-Type": "text/csv"}), data.get("fileId")
 
-def upload_csv(csv_text: str, signed_url: str, upload_headers: dict):
-    put = requests.put(
+@timed("upload_csv")
+def upload_csv(csv_text, signed_url: str, upload_headers: dict):
+    """
+    Upload CSV as a str or bytes. An iterable of byte chunks is streamed with
+    chunked transfer encoding and no Content-Length, which presigned PUT URLs
+    (S3-style) reject; only send one to endpoints that accept it.
+    """
+    put = pool.put(
         signed_url,
-        data=csv_text.encode("utf-8"),
+        data=csv_text.encode("utf-8") if isinstance(csv_text, str) else csv_text,
         headers=upload_headers,
         timeout=300,
     )
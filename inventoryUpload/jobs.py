@@ -0,0 +1,375 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog.locations import UPLOAD_COLUMNS
+from instrumentation import metrics
+from inventoryUpload.chunkedUpload import CHUNK_ROWS, split_chunks, upload_inventory
+
+QUEUE_PATH = Path(__file__).resolve().parent / ".sync_jobs.sqlite"
+WORKERS = 2
+POLL_SECONDS = 1.0
+# A running job's worker refreshes its heartbeat this often; one silent for
+# LEASE_SECONDS is taken to have died and its job is queued again
+HEARTBEAT_SECONDS = 10.0
+LEASE_SECONDS = 60.0
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class SyncQueue:
+    """
+    Durable queue of sync jobs, in SQLite.
+
+    A job holds the upload rows for one account. Enqueueing for an account
+    that already has a queued job merges into it, latest value per
+    (location, PLU) winning, so an account never has more than one job
+    waiting. Rows stay on disk until the job succeeds, so a restart or a
+    failed upload loses nothing.
+
+    A claimed job records its worker and a heartbeat; only a job whose
+    heartbeat is older than the lease is requeued, so queues in other
+    processes (or an earlier SyncWorkers still running) keep their jobs.
+    """
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Transactions are explicit (BEGIN IMMEDIATE) so claims and merges are atomic across processes
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id TEXT NOT NULL,
+                callback_url TEXT,
+                status TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                chunks_total INTEGER NOT NULL DEFAULT 0,
+                chunks_done INTEGER NOT NULL DEFAULT 0,
+                report TEXT,
+                error TEXT,
+                worker_id TEXT,
+                heartbeat REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, account_id);
+            CREATE TABLE IF NOT EXISTS job_rows (
+                job_id INTEGER NOT NULL,
+                location TEXT NOT NULL,
+                plu INTEGER NOT NULL,
+                stock_status TEXT NOT NULL,
+                stock INTEGER NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (job_id, location, plu)
+            );
+        """)
+        # Queues created before jobs had an owner
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (('worker_id', 'TEXT'), ('heartbeat', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _queued_job(self, conn, account_id):
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE account_id = ? AND status = ? ORDER BY id LIMIT 1",
+            (account_id, QUEUED),
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _count_rows(conn, job_id):
+        conn.execute(
+            "UPDATE jobs SET rows = (SELECT COUNT(*) FROM job_rows WHERE job_id = ?), updated_at = ? WHERE id = ?",
+            (job_id, time.time(), job_id),
+        )
+
+    def enqueue(self, account_id: str, callback_url: str, upload_df: pd.DataFrame) -> int:
+        """Queue upload rows for an account; returns the id of the job that holds them."""
+        rows = list(zip(
+            np.asarray(upload_df['location'], dtype=object).tolist(),
+            np.asarray(upload_df['plu'], dtype=np.int64).tolist(),
+            np.asarray(upload_df['stock status'], dtype=object).tolist(),
+            np.asarray(upload_df['stock'], dtype=np.int64).tolist(),
+            np.asarray(upload_df['price'], dtype=np.float64).tolist(),
+        ))
+        now = time.time()
+        with self._write() as conn:
+            job_id = self._queued_job(conn, account_id)
+            if job_id is None:
+                job_id = conn.execute(
+                    "INSERT INTO jobs (account_id, callback_url, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (account_id, callback_url, QUEUED, now, now),
+                ).lastrowid
+            else:
+                conn.execute("UPDATE jobs SET callback_url = ? WHERE id = ?", (callback_url, job_id))
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_rows VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, *row) for row in rows],
+            )
+            self._count_rows(conn, job_id)
+        return job_id
+
+    def claim(self, worker_id: str = None, lease: float = LEASE_SECONDS):
+        """
+        Take the oldest queued job whose account has nothing running, or None.
+        One job per account runs at a time so uploads land in order. Jobs
+        whose worker stopped heartbeating for lease seconds are queued first.
+        """
+        with self._write() as conn:
+            self._requeue_stale(conn, lease)
+            row = conn.execute(
+                """
+                SELECT id FROM jobs WHERE status = ? AND account_id NOT IN
+                    (SELECT account_id FROM jobs WHERE status = ?)
+                ORDER BY id LIMIT 1
+                """,
+                (QUEUED, RUNNING),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, worker_id = ?, heartbeat = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now, now, row[0]),
+            )
+        return self.get(row[0])
+
+    def heartbeat(self, job_id: int, worker_id: str = None) -> bool:
+        """Extend a running job's lease; False if the job is no longer this worker's."""
+        with self._write() as conn:
+            return conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ? AND worker_id IS ?",
+                (time.time(), job_id, RUNNING, worker_id),
+            ).rowcount == 1
+
+    def job_rows(self, job_id: int) -> pd.DataFrame:
+        with self._lock:
+            frame = pd.read_sql_query(
+                "SELECT location, plu, stock_status, stock, price FROM job_rows WHERE job_id = ?",
+                self._conn, params=(job_id,),
+            )
+        return frame.rename(columns={'stock_status': 'stock status'})[UPLOAD_COLUMNS]
+
+    def progress(self, job_id: int, **fields):
+        """Update progress columns (rows_done, chunks_total, chunks_done) of a running job."""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._write() as conn:
+            conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), time.time(), job_id),
+            )
+
+    def finish(self, job_id: int, report: dict):
+        """Mark a job done; its rows are no longer needed."""
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, report = ?, updated_at = ? WHERE id = ?",
+                (DONE, json.dumps(report), time.time(), job_id),
+            )
+            conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+
+    def fail(self, job_id: int, error: str):
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def _requeue(self, conn, job_id: int, account_id: str):
+        queued = self._queued_job(conn, account_id)
+        if queued is None:
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, rows_done = 0, chunks_done = 0, chunks_total = 0,
+                    worker_id = NULL, heartbeat = NULL, updated_at = ? WHERE id = ?
+                """,
+                (QUEUED, time.time(), job_id),
+            )
+            return
+        # A newer job is waiting: fold these rows into it, its values win
+        conn.execute(
+            "INSERT OR IGNORE INTO job_rows SELECT ?, location, plu, stock_status, stock, price FROM job_rows WHERE job_id = ?",
+            (queued, job_id),
+        )
+        conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._count_rows(conn, queued)
+
+    def retry(self, job_id: int):
+        """Queue a failed job again."""
+        with self._write() as conn:
+            row = conn.execute("SELECT account_id FROM jobs WHERE id = ? AND status = ?", (job_id, FAILED)).fetchone()
+            if row is not None:
+                self._requeue(conn, job_id, row[0])
+
+    def _requeue_stale(self, conn, lease: float):
+        for job_id, account_id in conn.execute(
+            "SELECT id, account_id FROM jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?) ORDER BY id",
+            (RUNNING, time.time() - lease),
+        ).fetchall():
+            self._requeue(conn, job_id, account_id)
+
+    def requeue_interrupted(self, lease: float = LEASE_SECONDS):
+        """Queue jobs left running by a worker that stopped heartbeating mid-upload."""
+        with self._write() as conn:
+            self._requeue_stale(conn, lease)
+
+    def get(self, job_id: int):
+        jobs = self._select("WHERE id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def recent(self, limit: int = 10) -> list:
+        """Newest jobs first, for status display."""
+        return self._select("ORDER BY id DESC LIMIT ?", (limit,))
+
+    def _select(self, clause: str, params: tuple) -> list:
+        columns = ['id', 'account_id', 'callback_url', 'status', 'rows', 'rows_done', 'chunks_total',
+                   'chunks_done', 'report', 'error', 'worker_id', 'heartbeat', 'created_at', 'updated_at']
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM jobs {clause}", params).fetchall()
+        jobs = [dict(zip(columns, row)) for row in rows]
+        for job in jobs:
+            job['report'] = json.loads(job['report']) if job['report'] else None
+        return jobs
+
+    def close(self):
+        self._conn.close()
+
+
+class SyncWorkers:
+    """
+    Worker threads that run queued sync jobs.
+
+    Each job is diffed against the journal, uploaded in chunks (progress
+    persisted per chunk), its fileIds registered with the upload status store
+    and its rows recorded as acknowledged. run_pending() drains the queue in
+    the calling thread, e.g. for tests against a stub endpoint; start() runs
+    the same loop on background threads. While a job runs, its lease is
+    renewed every heartbeat_seconds.
+    """
+
+    def __init__(self, queue: SyncQueue, journal=None, upload_status=None,
+                 workers: int = WORKERS, poll_seconds: float = POLL_SECONDS,
+                 upload=upload_inventory, chunk_rows: int = CHUNK_ROWS,
+                 heartbeat_seconds: float = HEARTBEAT_SECONDS):
+        self.queue = queue
+        self.journal = journal
+        self.upload_status = upload_status
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.upload = upload
+        self.chunk_rows = chunk_rows
+        self.heartbeat_seconds = heartbeat_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _heartbeat(self, job_id: int, finished: threading.Event):
+        while not finished.wait(self.heartbeat_seconds):
+            try:
+                self.queue.heartbeat(job_id, self.worker_id)
+            except sqlite3.Error:
+                pass
+
+    def run_job(self, job: dict):
+        job_id = job['id']
+        finished = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, finished),
+                         name=f"sync-heartbeat-{job_id}", daemon=True).start()
+        try:
+            upload_df = self.queue.job_rows(job_id)
+            if self.journal is not None:
+                upload_df = self.journal.diff(upload_df)
+            self.queue.progress(job_id, chunks_total=len(split_chunks(len(upload_df), self.chunk_rows)))
+
+            done = {'rows': 0, 'chunks': 0}
+
+            def on_chunk(result):
+                done['rows'] += result['rows']
+                done['chunks'] += 1
+                self.queue.progress(job_id, rows_done=done['rows'], chunks_done=done['chunks'])
+
+            report = {'chunks': 0, 'rows': 0, 'bytes_sent': 0, 'seconds': 0.0,
+                      'bytes_per_second': 0.0, 'chunk_latencies': [], 'file_ids': []}
+            if len(upload_df):
+                report = self.upload(job['account_id'], job['callback_url'], upload_df,
+                                     chunk_rows=self.chunk_rows, on_chunk=on_chunk)
+                if self.upload_status is not None:
+                    self.upload_status.register(report['file_ids'], job['account_id'])
+                if self.journal is not None:
+                    self.journal.record(upload_df)
+            metrics.count("rows_uploaded", report['rows'])
+            # Per-chunk results are not needed once the job is done
+            self.queue.finish(job_id, {k: v for k, v in report.items() if k != 'results'})
+        except Exception as e:
+            metrics.count("sync_jobs_failed")
+            self.queue.fail(job_id, str(e))
+        finally:
+            finished.set()
+
+    def run_pending(self) -> int:
+        """Run queued jobs in this thread until none can be claimed; returns how many ran."""
+        ran = 0
+        while (job := self.queue.claim(self.worker_id)) is not None:
+            self.run_job(job)
+            ran += 1
+        return ran
+
+    def notify(self):
+        """Wake idle workers, e.g. right after enqueueing."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            self.run_job(job)
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"sync-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Stop after the jobs in progress finish."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+JOURNAL_PATH = Path(__file__).resolve().parent / ".sync_journal.sqlite"
+KEY_COLUMNS = ['location', 'plu']
+VALUE_COLUMNS = ['stock status', 'stock', 'price']
+
+
+class SyncJournal:
+    """
+    Last state Deliverect acknowledged per (location, PLU), in SQLite.
+
+    diff() compares an upload frame against it in one vectorized merge and
+    keeps only rows that would change something; record() stores rows once
+    their upload succeeded.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the app's sessions, serialized by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS acknowledged (
+                location TEXT NOT NULL,
+                plu INTEGER NOT NULL,
+                stock_status TEXT NOT NULL,
+                stock INTEGER NOT NULL,
+                price REAL NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (location, plu)
+            );
+        """)
+
+    def load(self, locations=None) -> pd.DataFrame:
+        """Acknowledged rows, optionally only for some locations, in upload column names."""
+        query = "SELECT location, plu, stock_status, stock, price FROM acknowledged"
+        params = []
+        if locations is not None:
+            locations = list(locations)
+            query += f" WHERE location IN ({','.join('?' * len(locations))})"
+            params = locations
+        with self._lock:
+            frame = pd.read_sql_query(query, self._conn, params=params)
+        return frame.rename(columns={'stock_status': 'stock status'})
+
+    def diff(self, upload_df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of upload_df that differ from (or are missing in) the acknowledged state."""
+        if upload_df.empty:
+            return upload_df
+        locations = pd.unique(np.asarray(upload_df['location'], dtype=object))
+        acked = self.load(locations)
+        if acked.empty:
+            return upload_df
+
+        keys = upload_df[KEY_COLUMNS].astype({'location': object, 'plu': np.int64})
+        merged = keys.merge(acked, on=KEY_COLUMNS, how='left')
+        status = np.asarray(upload_df['stock status'], dtype=object)
+        stock = np.asarray(upload_df['stock'], dtype=np.int64)
+        # Compare prices at the catalog's float32 precision
+        price = np.asarray(upload_df['price'], dtype=np.float32)
+        acked_price = merged['price'].to_numpy(dtype=np.float32, na_value=np.nan)
+
+        changed = (
+            merged['stock'].isna().to_numpy()
+            | (merged['stock status'].to_numpy(dtype=object) != status)
+            | (merged['stock'].to_numpy(dtype=np.float64, na_value=np.nan) != stock)
+            | (acked_price != price)
+        )
+        return upload_df[changed]
+
+    def record(self, upload_df: pd.DataFrame):
+        """Store rows as acknowledged; call after their upload succeeded."""
+        if upload_df.empty:
+            return
+        now = time.time()
+        rows = zip(
+            np.asarray(upload_df['location'], dtype=object).tolist(),
+            np.asarray(upload_df['plu'], dtype=np.int64).tolist(),
+            np.asarray(upload_df['stock status'], dtype=object).tolist(),
+            np.asarray(upload_df['stock'], dtype=np.int64).tolist(),
+            np.asarray(upload_df['price'], dtype=np.float64).tolist(),
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO acknowledged VALUES (?, ?, ?, ?, ?, ?)",
+                [(*row, now) for row in rows],
+            )
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,365 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from catalog.locations import UPLOAD_COLUMNS
+from instrumentation import metrics
+
+STATE_PATH = Path(__file__).resolve().parent / ".inventory_pull.sqlite"
+# Paginated inventory listing; INVENTORY_PULL_URL overrides it (e.g. a local stub)
+PULL_URL = "https://api.deliverect.io/catalog/accounts/{account_id}/inventory"
+PAGE_SIZE = 500
+MAX_WORKERS = 4
+# Incremental pulls ask for changes since the last pull started, minus this margin for clock skew
+OVERLAP_SECONDS = 300
+
+# Query parameters of the listing
+PAGE_PARAM = "page"
+PAGE_SIZE_PARAM = "pageSize"
+SINCE_PARAM = "updatedSince"
+
+# Item fields as the API may name them -> upload column names
+FIELD_ALIASES = {
+    'location': 'location',
+    'locationName': 'location',
+    'plu': 'plu',
+    'PLU': 'plu',
+    'stockStatus': 'stock status',
+    'stock status': 'stock status',
+    'status': 'stock status',
+    'stock': 'stock',
+    'quantity': 'stock',
+    'price': 'price',
+}
+
+RUNNING = "running"
+DONE = "done"
+
+
+def _setting(name: str):
+    value = None
+    try:
+        import streamlit as st
+        value = st.secrets.get(name)
+    except Exception:
+        pass
+    return value or os.getenv(name)
+
+
+def configured_pull_url(account_id: str) -> str:
+    return (_setting("INVENTORY_PULL_URL") or PULL_URL).format(account_id=account_id)
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_items(items, location: str = None) -> pd.DataFrame:
+    """One page of API items as an upload-format frame (location, plu, stock status, stock, price)."""
+    frame = pd.DataFrame.from_records(items) if items else pd.DataFrame()
+    frame = frame.rename(columns=FIELD_ALIASES)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    if 'location' not in frame:
+        if location is None:
+            frame['location'] = pd.Series(dtype=object)
+        else:
+            frame['location'] = location
+    if 'plu' not in frame:
+        raise ValueError("Inventory items carry no PLU")
+    frame = frame.reindex(columns=UPLOAD_COLUMNS)
+    return pd.DataFrame({
+        'location': frame['location'].astype(object),
+        'plu': pd.to_numeric(frame['plu'], errors='coerce').astype('Int64'),
+        'stock status': frame['stock status'].astype(object),
+        'stock': pd.to_numeric(frame['stock'], errors='coerce').astype('Int64'),
+        'price': pd.to_numeric(frame['price'], errors='coerce').astype(np.float64),
+    }).dropna(subset=['location', 'plu'])
+
+
+class PullState:
+    """
+    Progress and results of inventory pulls, in SQLite.
+
+    A pull is a run of pages for one account. Each page's rows are stored
+    together with the page number in one transaction, so a pull that stops
+    halfway resumes with the pages it is missing. The start time of the last
+    finished run is the watermark for the next incremental pull.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS pull_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                account_id TEXT NOT NULL,
+                since TEXT,
+                status TEXT NOT NULL,
+                pages_total INTEGER,
+                rows INTEGER NOT NULL DEFAULT 0,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS pull_pages (
+                run_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                PRIMARY KEY (run_id, page)
+            );
+            CREATE TABLE IF NOT EXISTS remote_inventory (
+                location TEXT NOT NULL,
+                plu INTEGER NOT NULL,
+                stock_status TEXT,
+                stock INTEGER,
+                price REAL,
+                run_id INTEGER NOT NULL,
+                PRIMARY KEY (location, plu)
+            );
+            CREATE INDEX IF NOT EXISTS remote_inventory_run ON remote_inventory (run_id);
+        """)
+
+    def open_run(self, account_id: str, full: bool = False) -> dict:
+        """
+        The account's unfinished run to resume, or a new one. A new run asks
+        for changes since the last finished run started (everything if full
+        or never pulled).
+        """
+        with self._lock, self._conn:
+            if full:
+                # A full pull replaces whatever an interrupted run was doing
+                self._conn.execute(
+                    "DELETE FROM pull_pages WHERE run_id IN (SELECT id FROM pull_runs WHERE account_id = ? AND status = ?)",
+                    (account_id, RUNNING),
+                )
+                self._conn.execute("DELETE FROM pull_runs WHERE account_id = ? AND status = ?", (account_id, RUNNING))
+            row = self._conn.execute(
+                "SELECT id FROM pull_runs WHERE account_id = ? AND status = ? ORDER BY id DESC LIMIT 1",
+                (account_id, RUNNING),
+            ).fetchone()
+            if row is None:
+                since = None
+                if not full:
+                    last = self._conn.execute(
+                        "SELECT MAX(started_at) FROM pull_runs WHERE account_id = ? AND status = ?",
+                        (account_id, DONE),
+                    ).fetchone()[0]
+                    since = _isoformat(last - OVERLAP_SECONDS) if last is not None else None
+                run_id = self._conn.execute(
+                    "INSERT INTO pull_runs (account_id, since, status, started_at) VALUES (?, ?, ?, ?)",
+                    (account_id, since, RUNNING, time.time()),
+                ).lastrowid
+                resumed = False
+            else:
+                run_id = row[0]
+                resumed = True
+        run = self.get_run(run_id)
+        run['resumed'] = resumed
+        return run
+
+    def get_run(self, run_id: int) -> dict:
+        columns = ['id', 'account_id', 'since', 'status', 'pages_total', 'rows', 'started_at', 'finished_at']
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(columns)} FROM pull_runs WHERE id = ?", (run_id,)).fetchone()
+            pages = [page for (page,) in self._conn.execute("SELECT page FROM pull_pages WHERE run_id = ?", (run_id,))]
+        run = dict(zip(columns, row))
+        run['pages_done'] = set(pages)
+        return run
+
+    def set_pages_total(self, run_id: int, pages_total: int):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pull_runs SET pages_total = ? WHERE id = ?", (pages_total, run_id))
+
+    def store_page(self, run_id: int, page: int, frame: pd.DataFrame):
+        """Upsert one page's rows and mark the page fetched, atomically."""
+        rows = list(zip(
+            frame['location'].tolist(),
+            frame['plu'].astype(np.int64).tolist(),
+            frame['stock status'].where(frame['stock status'].notna(), None).tolist(),
+            frame['stock'].astype(object).where(frame['stock'].notna(), None).tolist(),
+            frame['price'].astype(object).where(frame['price'].notna(), None).tolist(),
+        ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO remote_inventory VALUES (?, ?, ?, ?, ?, ?)",
+                [(*row, run_id) for row in rows],
+            )
+            self._conn.execute("INSERT OR IGNORE INTO pull_pages VALUES (?, ?)", (run_id, page))
+            self._conn.execute("UPDATE pull_runs SET rows = rows + ? WHERE id = ?", (len(rows), run_id))
+
+    def finish_run(self, run_id: int):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pull_runs SET status = ?, finished_at = ? WHERE id = ?", (DONE, time.time(), run_id))
+            self._conn.execute("DELETE FROM pull_pages WHERE run_id = ?", (run_id,))
+
+    def load(self, locations=None, run_id: int = None) -> pd.DataFrame:
+        """Pulled rows (all, or only those a run changed), in upload column names."""
+        query = "SELECT location, plu, stock_status, stock, price FROM remote_inventory"
+        clauses, params = [], []
+        if locations is not None:
+            locations = list(locations)
+            clauses.append(f"location IN ({','.join('?' * len(locations))})")
+            params += locations
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            frame = pd.read_sql_query(query, self._conn, params=params)
+        return frame.rename(columns={'stock_status': 'stock status'})[UPLOAD_COLUMNS]
+
+    def last_run(self, account_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM pull_runs WHERE account_id = ? ORDER BY id DESC LIMIT 1", (account_id,)
+            ).fetchone()
+        return self.get_run(row[0]) if row else None
+
+    def close(self):
+        self._conn.close()
+
+
+def _get_headers(account_id):
+    from authentication.tokening import getHeaders
+    return getHeaders(account_id)
+
+
+def _invalidate_token(account_id):
+    from authentication.tokening import getProvider
+    getProvider(account_id).invalidate()
+
+
+@metrics.timed("pull_page")
+def fetch_page(url: str, account_id: str, page: int, page_size: int = PAGE_SIZE, since: str = None,
+               headers=_get_headers) -> dict:
+    """GET one page of the listing; a rejected token is dropped and the page asked for once more."""
+    from httpClient import pool
+
+    params = {PAGE_PARAM: page, PAGE_SIZE_PARAM: page_size}
+    if since:
+        params[SINCE_PARAM] = since
+    for attempt in range(2):
+        response = pool.get(url, headers=headers(account_id), params=params, timeout=60)
+        if response.status_code == 401 and attempt == 0 and headers is _get_headers:
+            _invalidate_token(account_id)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+
+def _page_items(data) -> list:
+    if isinstance(data, list):
+        return data
+    return data.get('_items', data.get('items', []))
+
+
+def _pages_total(data, page_size: int):
+    """Number of pages from the listing's metadata, or None if it does not say."""
+    if isinstance(data, list):
+        return None
+    meta = data.get('_meta', data)
+    if meta.get('pages') is not None:
+        return int(meta['pages'])
+    if meta.get('total') is not None:
+        return max(math.ceil(int(meta['total']) / page_size), 1)
+    return None
+
+
+def pull_inventory(account_id: str, state: PullState, url: str = None, full: bool = False,
+                   page_size: int = PAGE_SIZE, workers: int = MAX_WORKERS, location: str = None,
+                   journal=None, inventory=None, headers=_get_headers, on_page=None) -> dict:
+    """
+    Pull the account's inventory (or its changes since the last pull) into state.
+
+    The first page tells how many pages there are; the rest are fetched
+    concurrently and stored as they arrive, in the calling thread. Pages an
+    interrupted run already stored are skipped. Without page metadata, pages
+    are fetched in order until one comes back short. Pulled rows are recorded
+    in journal (if given) as the state Deliverect holds, so they are not
+    uploaded back; fields an item leaves out (e.g. no price when it uses the
+    base price) are filled from inventory (a LocationInventory, if given)
+    first, and rows still incomplete are not recorded. location names items
+    that carry none.
+    Returns a report including run_id, whose changed rows state.load(run_id=...) returns.
+    """
+    url = url or configured_pull_url(account_id)
+    run = state.open_run(account_id, full=full)
+    run_id, since = run['id'], run['since']
+    began = time.perf_counter()
+    counts = {'pages': 0, 'rows': 0}
+
+    def store(page, data):
+        frame = parse_items(_page_items(data), location)
+        state.store_page(run_id, page, frame)
+        if journal is not None:
+            acknowledged = frame
+            if inventory is not None:
+                with inventory.lock:
+                    acknowledged = inventory.fill_missing(frame)
+            journal.record(acknowledged.dropna())
+        counts['pages'] += 1
+        counts['rows'] += len(frame)
+        metrics.count("rows_pulled", len(frame))
+        if on_page is not None:
+            on_page(page, pages_total, len(frame))
+        return len(_page_items(data))
+
+    pages_total = run['pages_total']
+    done = run['pages_done']
+    if pages_total is None:
+        first = fetch_page(url, account_id, 1, page_size, since, headers)
+        pages_total = _pages_total(first, page_size)
+        if pages_total is not None:
+            state.set_pages_total(run_id, pages_total)
+        if 1 not in done:
+            fetched = store(1, first)
+            done.add(1)
+        else:
+            fetched = page_size
+        if pages_total is None:
+            # No metadata: walk the pages in order
+            page = 1
+            while fetched >= page_size:
+                page += 1
+                if page in done:
+                    # Stored by the interrupted run, which only went on past full pages
+                    continue
+                fetched = store(page, fetch_page(url, account_id, page, page_size, since, headers))
+
+    if pages_total is not None:
+        missing = [page for page in range(1, pages_total + 1) if page not in done]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inventory-pull") as executor:
+            futures = {
+                executor.submit(fetch_page, url, account_id, page, page_size, since, headers): page
+                for page in missing
+            }
+            try:
+                for future in as_completed(futures):
+                    store(futures[future], future.result())
+            except BaseException:
+                # Stored pages stay; the next pull resumes with the rest
+                for future in futures:
+                    future.cancel()
+                raise
+
+    state.finish_run(run_id)
+    seconds = time.perf_counter() - began
+    return {
+        'run_id': run_id,
+        'since': since,
+        'resumed': run['resumed'],
+        'pages': counts['pages'],
+        'pages_total': pages_total,
+        'rows': counts['rows'],
+        'seconds': seconds,
+    }
@@ -0,0 +1,138 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rows formatted per step; bounds the temporary arrays held while streaming
+BATCH_ROWS = 50_000
+# Same defaults as DataFrame.to_csv
+LINE_TERMINATOR = os.linesep.encode()
+NA_REP = b""
+_QUOTE_CHARS = (",", '"', "\n", "\r")
+
+
+def _quote(text: str) -> bytes:
+    """csv.QUOTE_MINIMAL, as used by to_csv."""
+    if any(char in text for char in _QUOTE_CHARS):
+        text = '"' + text.replace('"', '""') + '"'
+    return text.encode("utf-8")
+
+
+def _format_values(values: np.ndarray) -> np.ndarray:
+    """Bytes per value, formatted exactly as to_csv writes them."""
+    if values.dtype.kind in "iu":
+        return values.astype("S")
+    if values.dtype.kind == "f":
+        # to_csv formats floats with astype(str), i.e. the shortest repr at the array's own precision
+        formatted = values.astype(str).astype("S")
+        formatted[np.isnan(values)] = NA_REP
+        return formatted
+    if values.dtype.kind == "b":
+        return np.where(values, b"True", b"False")
+    return np.array([NA_REP if pd.isna(value) else _quote(str(value)) for value in values], dtype="S")
+
+
+def format_column(column, n_rows: int) -> np.ndarray:
+    """
+    One CSV field per row as a fixed-width bytes array.
+
+    Scalars are formatted once and broadcast. Columns are factorized first when
+    they repeat (locations, statuses, PLUs across locations), so only the
+    distinct values are formatted.
+    """
+    if np.ndim(column) == 0:
+        return np.full(n_rows, _format_values(np.array([column]))[0])
+    if isinstance(column, pd.Series) and isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        table = _format_values(np.append(np.asarray(column.cat.categories, dtype=object), None))
+        return table[codes]
+    values = column.to_numpy() if isinstance(column, pd.Series) else np.asarray(column)
+    if values.dtype == object or isinstance(getattr(column, "dtype", None), pd.ArrowDtype):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        table = _format_values(np.append(np.asarray(uniques, dtype=object), None))
+        return table[codes]
+    if values.dtype.kind in "iuf" and len(values) > 1:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        if len(uniques) * 2 < len(values):
+            return _format_values(np.asarray(uniques, dtype=values.dtype))[codes]
+    return _format_values(values)
+
+
+def _header(names) -> bytes:
+    return b",".join(_quote(str(name)) for name in names) + LINE_TERMINATOR
+
+
+def _rows(columns: dict, start: int, stop: int) -> bytes:
+    n_rows = stop - start
+    fields = [
+        format_column(column if np.ndim(column) == 0 else column.iloc[start:stop], n_rows)
+        for column in columns.values()
+    ]
+    lines = fields[0]
+    for field in fields[1:]:
+        lines = np.char.add(np.char.add(lines, b","), field)
+    lines = np.char.add(lines, LINE_TERMINATOR)
+    return b"".join(lines.tolist())
+
+
+def _as_columns(upload) -> dict:
+    if isinstance(upload, pd.DataFrame):
+        return {name: upload[name] for name in upload.columns}
+    return {
+        name: column if np.ndim(column) == 0 or isinstance(column, pd.Series) else pd.Series(column)
+        for name, column in upload.items()
+    }
+
+
+def upload_columns(df_or_series, location="Times Square") -> dict:
+    """
+    The five Deliverect upload columns of catalog rows, without copying them
+    into a new frame (the serializer counterpart of convert_to_upload_format).
+    """
+    return {
+        'location': location,
+        'plu': df_or_series['PLU'],
+        'stock status': df_or_series['Stock Status'],
+        'stock': df_or_series['Stock Quantity'],
+        'price': df_or_series['Base Price'],
+    }
+
+
+def _length(columns: dict) -> int:
+    lengths = {len(column) for column in columns.values() if np.ndim(column) != 0}
+    if len(lengths) > 1:
+        raise ValueError("Upload columns differ in length")
+    return lengths.pop() if lengths else 1
+
+
+def iter_upload_csv(upload, start: int = 0, stop: int = None, batch_rows: int = BATCH_ROWS, header: bool = True):
+    """
+    Stream rows [start, stop) of an upload frame (or upload_columns() mapping)
+    as CSV bytes, one batch per chunk.
+
+    Byte-identical to upload_df.to_csv(index=False).encode("utf-8"), but
+    formats whole columns at once instead of row by row, and never holds more
+    than one batch of text.
+    """
+    columns = _as_columns(upload)
+    stop = _length(columns) if stop is None else stop
+    if header:
+        yield _header(columns)
+    for batch_start in range(start, stop, batch_rows):
+        yield _rows(columns, batch_start, min(batch_start + batch_rows, stop))
+
+
+def write_upload_csv(upload, buffer: bytearray = None, batch_rows: int = BATCH_ROWS) -> bytearray:
+    """
+    Serialize a whole upload into buffer, overwriting it in place so a buffer
+    kept between syncs is not reallocated. Returns the buffer, trimmed to the
+    CSV's length.
+    """
+    if buffer is None:
+        buffer = bytearray()
+    position = 0
+    for chunk in iter_upload_csv(upload, batch_rows=batch_rows):
+        buffer[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    del buffer[position:]
+    return buffer
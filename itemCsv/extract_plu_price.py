@@ -1,20 +1,11 @@
-import pandas as pd
+import sys
+from pathlib import Path
 
-# Read the CSV file
-df = pd.read_csv("DemoITems.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from itemCsv.transform import main
 
-# Extract only PLU and Base Price columns
-extracted_df = pd.DataFrame({
-    'plu': df['PLU'],
-    'price': df['Base Price']
-})
-
-# Save to new CSV file
-output_path = "PLU_Price.csv"
-extracted_df.to_csv(output_path, index=False)
-
-print(f"✓ Created {output_path} with {len(extracted_df)} items")
-print(f"Columns: {list(extracted_df.columns)}")
-print(f"\nFirst 5 rows:")
-print(extracted_df.head())
+here = Path(__file__).resolve().parent
 
+# Write only PLU and Base Price (as plu, price) to PLU_Price.csv, leaving the catalog as is;
+# same as: python itemCsv/transform.py DemoITems.csv --extract-prices PLU_Price.csv --no-output
+sys.exit(main([str(here / "DemoITems.csv"), "--extract-prices", str(here / "PLU_Price.csv"), "--no-output"]))
@@ -0,0 +1,222 @@
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import aiohttp
+
+CACHE_PATH = Path(__file__).resolve().parent / ".image_cache.sqlite"
+TTL_SECONDS = 7 * 24 * 3600
+PER_HOST_LIMIT = 8
+TOTAL_LIMIT = 64
+TIMEOUT_SECONDS = 5
+
+
+class ResultCache:
+    """
+    Persistent URL -> check result store (SQLite).
+    Also remembers which hosts answer HEAD properly so their URLs skip the GET fallback.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # validate_images() uses a caller's cache from its worker thread
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS image_checks (
+                url TEXT PRIMARY KEY,
+                ok INTEGER NOT NULL,
+                status INTEGER,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                error TEXT,
+                checked_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS head_hosts (
+                host TEXT PRIMARY KEY
+            );
+        """)
+
+    def get_many(self, urls) -> dict:
+        results = {}
+        urls = list(urls)
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(urls), 500):
+            batch = urls[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT url, ok, status, content_type, etag, last_modified, error, checked_at "
+                f"FROM image_checks WHERE url IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for url, ok, status, content_type, etag, last_modified, error, checked_at in rows:
+                results[url] = {
+                    'ok': bool(ok), 'status': status, 'content_type': content_type, 'etag': etag,
+                    'last_modified': last_modified, 'error': error, 'checked_at': checked_at,
+                }
+        return results
+
+    def put_many(self, results: dict):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO image_checks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (url, int(r['ok']), r['status'], r['content_type'], r['etag'],
+                     r['last_modified'], r['error'], r['checked_at'])
+                    for url, r in results.items()
+                ],
+            )
+
+    def head_hosts(self) -> set:
+        return {host for (host,) in self._conn.execute("SELECT host FROM head_hosts")}
+
+    def add_head_hosts(self, hosts):
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO head_hosts VALUES (?)", [(h,) for h in hosts])
+
+    def close(self):
+        self._conn.close()
+
+
+def _result(ok, status=None, content_type=None, etag=None, last_modified=None, error=None):
+    return {
+        'ok': ok, 'status': status, 'content_type': content_type, 'etag': etag,
+        'last_modified': last_modified, 'error': error, 'checked_at': time.time(),
+    }
+
+
+def _host(url):
+    try:
+        return urlsplit(url).hostname
+    except ValueError:  # e.g. a malformed IPv6 address; the request fails as an invalid URL
+        return None
+
+
+def _from_response(response) -> dict:
+    content_type = response.headers.get('Content-Type', '').lower()
+    ok = response.status == 200 and 'image' in content_type
+    error = None
+    if response.status != 200:
+        error = f"HTTP {response.status}"
+    elif not ok:
+        error = f"Not an image (Content-Type: {content_type})"
+    return _result(
+        ok, response.status, content_type,
+        response.headers.get('ETag'), response.headers.get('Last-Modified'), error,
+    )
+
+
+async def _check(session, url, previous, head_hosts, learned_hosts, timeout):
+    """
+    HEAD (conditional when we have validators), falling back to GET for hosts
+    not known to support HEAD. timeout applies to each request on its own.
+    Timeouts and connection failures come back with ok=None (unknown): the
+    image may well be fine, the check just didn't get an answer.
+    """
+    host = _host(url)
+    headers = {}
+    if previous:
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+    try:
+        async with session.head(url, headers=headers, allow_redirects=True, timeout=timeout) as response:
+            if response.status == 304 and previous:
+                return {**previous, 'checked_at': time.time()}
+            result = _from_response(response)
+        if result['ok']:
+            learned_hosts.add(host)
+            return result
+        if host in head_hosts:
+            return result
+
+        async with session.get(url, headers=headers, allow_redirects=True, timeout=timeout) as response:
+            if response.status == 304 and previous:
+                return {**previous, 'checked_at': time.time()}
+            # Only the headers matter, the body is never read
+            return _from_response(response)
+    except asyncio.TimeoutError:
+        return _result(None, error="Timeout")
+    except aiohttp.InvalidURL:
+        return _result(False, error="Invalid URL")
+    except aiohttp.ClientConnectionError:
+        return _result(None, error="Connection error")
+    except Exception as e:
+        return _result(None, error=str(e))
+
+
+async def validate_urls_async(urls, cache=None, ttl=TTL_SECONDS, per_host_limit=PER_HOST_LIMIT,
+                              total_limit=TOTAL_LIMIT, timeout=TIMEOUT_SECONDS, on_result=None) -> dict:
+    """
+    Check image URLs concurrently and return {url: result}.
+
+    result['ok'] is True for an image, False for a definite failure (HTTP
+    error, not an image, invalid URL) and None when the check got no answer
+    (timeout, connection error). Results cached within ttl are returned
+    without a request; stale ones are revalidated with If-None-Match /
+    If-Modified-Since. on_result(url, result) is called as each check completes.
+
+    At most per_host_limit checks per host (total_limit overall) are in
+    flight, and a check's timeout only starts once it holds its slot, so URLs
+    queued behind a busy host are not timed out while they wait.
+    """
+    own_cache = cache is None
+    cache = ResultCache() if own_cache else cache
+    try:
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        to_check = []
+        for url in urls:
+            if not isinstance(url, str) or not url.strip():
+                results[url] = _result(False, error="Empty URL")
+        valid_urls = [u for u in urls if u not in results]
+
+        cached = cache.get_many(valid_urls)
+        now = time.time()
+        for url in valid_urls:
+            previous = cached.get(url)
+            if previous and now - previous['checked_at'] < ttl:
+                results[url] = previous
+                if on_result:
+                    on_result(url, previous)
+            else:
+                to_check.append(url)
+
+        head_hosts = cache.head_hosts()
+        learned_hosts = set()
+        checked = {}
+        connector = aiohttp.TCPConnector(limit=total_limit, limit_per_host=per_host_limit, ttl_dns_cache=300)
+        request_timeout = aiohttp.ClientTimeout(total=timeout)
+        total_slots = asyncio.Semaphore(total_limit)
+        host_slots = {}
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def run(url):
+                host = _host(url)
+                if host not in host_slots:
+                    host_slots[host] = asyncio.Semaphore(per_host_limit)
+                # Host slot first, so URLs waiting on a busy host don't hold overall slots
+                async with host_slots[host], total_slots:
+                    result = await _check(session, url, cached.get(url), head_hosts, learned_hosts, request_timeout)
+                checked[url] = result
+                if on_result:
+                    on_result(url, result)
+
+            await asyncio.gather(*(run(url) for url in to_check))
+
+        # Network failures are transient (ok=None), only cache answers the server actually gave
+        cache.put_many({url: r for url, r in checked.items() if r['status'] is not None})
+        cache.add_head_hosts(learned_hosts - head_hosts)
+        results.update(checked)
+        return {url: results[url] for url in urls}
+    finally:
+        if own_cache:
+            cache.close()
+
+
+def validate_urls(urls, **kwargs) -> dict:
+    """Synchronous wrapper around validate_urls_async() for scripts and the app."""
+    return asyncio.run(validate_urls_async(urls, **kwargs))
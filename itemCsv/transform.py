@@ -0,0 +1,123 @@
+"""
+Transform a catalog CSV in one streaming pass through composable stages.
+
+Stages run in the order they are given on the command line:
+
+    python itemCsv/transform.py DemoITems.csv --top-per-group "Category 1,Category 2:5"
+    python itemCsv/transform.py DemoITems.csv --validate-images --dedupe PLU \\
+        --extract-prices PLU_Price.csv
+    python itemCsv/transform.py DemoITems.csv --select PLU,Name -o names.csv
+
+The result replaces the input (atomically) unless --output or --no-output
+is given. Only the columns some stage or the output needs are parsed, the
+CSV is parsed on a reader thread ahead of the stages, and image checks for
+one chunk run while the previous chunk is written.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog.ingest import CHUNK_ROWS
+from catalog.transforms import (dedupe, extract_prices, head_per_group, run_pipeline, select_columns,
+                                validate_images)
+
+
+def _columns(text: str) -> list:
+    columns = [column.strip() for column in text.split(',') if column.strip()]
+    if not columns:
+        raise argparse.ArgumentTypeError("expected comma-separated column names")
+    return columns
+
+
+def _top_per_group(text: str):
+    columns, _, n = text.rpartition(':')
+    try:
+        return _columns(columns), int(n)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected COLUMNS:N, got '{text}'") from None
+
+
+def _report_invalid(url, result):
+    error_msg = f" - {result['error']}" if result['error'] else ""
+    if result['ok'] is None:
+        print(f"  ⚠️ Could not check image, kept{error_msg}: {url[:70]}")
+    elif not result['ok']:
+        print(f"  ❌ Invalid image{error_msg}: {url[:70]}")
+
+
+class _AddStage(argparse.Action):
+    """Append a stage to args.stages, keeping command-line order."""
+
+    def __init__(self, option_strings, dest, build, **kwargs):
+        self.build = build
+        super().__init__(option_strings, dest, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        stages = list(getattr(namespace, 'stages', None) or [])
+        stages.append(self.build(namespace, values))
+        namespace.stages = stages
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="catalog CSV")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("-o", "--output", type=Path, help="write the result here instead of replacing the input")
+    output.add_argument("--no-output", action="store_true", help="discard the result (side outputs only)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS, help="rows per chunk")
+    parser.add_argument("--keep-missing-images", action="store_true",
+                        help="--validate-images keeps rows without an image URL (given before it)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't list invalid image URLs")
+
+    parser.add_argument("--select", metavar="COLUMNS", type=_columns, action=_AddStage, dest='stages',
+                        build=lambda args, columns: select_columns(columns),
+                        help="keep only these columns")
+    parser.add_argument("--dedupe", metavar="COLUMNS", type=_columns, nargs='?', const=['PLU'],
+                        action=_AddStage, dest='stages', build=lambda args, keys: dedupe(keys),
+                        help="keep the first row per key (default PLU)")
+    parser.add_argument("--top-per-group", metavar="COLUMNS:N", type=_top_per_group, action=_AddStage,
+                        dest='stages', build=lambda args, value: head_per_group(*value),
+                        help="keep the first N rows of each group")
+    parser.add_argument("--validate-images", metavar="COLUMN", nargs='?', const='Image Links',
+                        action=_AddStage, dest='stages',
+                        build=lambda args, column: validate_images(
+                            column, keep_missing=args.keep_missing_images,
+                            on_result=None if args.quiet else _report_invalid),
+                        help="keep rows whose image URL is a reachable image (default column 'Image Links')")
+    parser.add_argument("--extract-prices", metavar="PATH", type=Path, action=_AddStage, dest='stages',
+                        build=lambda args, path: extract_prices(path),
+                        help="also write plu,price to PATH")
+    parser.set_defaults(stages=[])
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.stages:
+        parser.error("give at least one stage")
+    output = None if args.no_output else args.output or args.input
+
+    try:
+        report = run_pipeline(args.input, args.stages, output, chunksize=args.chunksize)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"Read {report['rows_in']} items from {args.input}")
+    for stage, entry in zip(args.stages, report['stages']):
+        details = {k: v for k, v in entry.items() if k not in ('stage', 'rows') and not isinstance(v, dict)}
+        extra = ", ".join(f"{k} {v}" for k, v in details.items())
+        print(f"  {entry['stage']}: {entry['rows']} items" + (f" ({extra})" if extra else ""))
+        if 'kept' in entry:
+            breakdown = pd.DataFrame({'original': pd.Series(entry['original']), 'kept': pd.Series(entry['kept'])})
+            print(breakdown.fillna(0).astype(int).sort_index().to_string())
+    if output is not None:
+        print(f"✓ Saved {report['rows_out']} items to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
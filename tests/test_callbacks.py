@@ -0,0 +1,54 @@
+import sqlite3
+import sys
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventoryUpload.callbacks import CallbackServer, UploadStatusStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStatusStore(tmp_path / "upload_status.sqlite")
+
+
+@pytest.fixture
+def server(store):
+    server = CallbackServer(store, "127.0.0.1", 0).start()
+    yield server
+    server.stop()
+
+
+def _post(server, query: str, body: bytes, content_type: str):
+    request = Request(f"{server.url}{query}", data=body, method="POST",
+                      headers={"Content-Type": content_type})
+    try:
+        with urlopen(request, timeout=5) as response:
+            return response.status
+    except HTTPError as e:
+        return e.code
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"status=success", "application/x-www-form-urlencoded"),
+    (b"not json", "application/json"),
+    (b"", "application/json"),
+])
+def test_file_id_from_query_string_whatever_the_body(server, store, body, content_type):
+    assert _post(server, "?fileId=f1", body, content_type) == 200
+    assert store.get("f1") is not None
+
+
+def test_form_body_fields_are_recorded(server, store):
+    assert _post(server, "?fileId=f2", b"status=FAILED", "application/x-www-form-urlencoded") == 200
+    assert store.get("f2")['status'] == "failed"
+
+
+def test_store_failure_answers_500(server, store, monkeypatch):
+    def fail(*args):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(store, "record_callback", fail)
+    assert _post(server, "", b'{"fileId": "f3"}', "application/json") == 500
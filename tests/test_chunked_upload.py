@@ -0,0 +1,54 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventoryUpload import chunkedUpload
+from inventoryUpload.chunkedUpload import upload_inventory
+
+
+class _SignedUrlStub(BaseHTTPRequestHandler):
+    """Presigned-PUT stand-in: like S3, refuses bodies without a Content-Length."""
+    puts = []
+
+    def do_PUT(self):
+        if "Content-Length" not in self.headers or "Transfer-Encoding" in self.headers:
+            self.send_response(411)
+            self.end_headers()
+            return
+        self.puts.append(self.rfile.read(int(self.headers["Content-Length"])))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def signed_url(monkeypatch):
+    _SignedUrlStub.puts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SignedUrlStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/upload"
+    files = iter(range(1000))
+    monkeypatch.setattr(chunkedUpload, "request_signed_url",
+                        lambda account_id, callback_url: (url, {"Content-Type": "text/csv"}, f"file-{next(files)}"))
+    yield _SignedUrlStub.puts
+    server.shutdown()
+    server.server_close()
+
+
+def test_chunks_are_sent_with_a_content_length(signed_url):
+    upload_df = pd.DataFrame({
+        'location': "Times Square", 'plu': range(5), 'stock status': "IN_STOCK", 'stock': 3, 'price': 1.25,
+    })
+    report = upload_inventory("acc", "http://cb", upload_df, chunk_rows=2, retries=0)
+
+    assert report['chunks'] == 3 and report['rows'] == 5
+    assert report['bytes_sent'] == sum(len(body) for body in signed_url)
+    expected = [upload_df.iloc[start:start + 2].to_csv(index=False).encode() for start in (0, 2, 4)]
+    assert sorted(signed_url) == sorted(expected)
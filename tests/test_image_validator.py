@@ -0,0 +1,81 @@
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog.transforms import validate_images
+from itemCsv.image_validator import ResultCache, validate_urls
+
+
+class _SlowImages(BaseHTTPRequestHandler):
+    """Every path is an image, served after server.latency seconds."""
+
+    def do_HEAD(self):
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_host():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowImages)
+    server.daemon_threads = True
+    server.latency = 0.2
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(tmp_path / "image_cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def _refused_url() -> str:
+    # A port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/image.jpg"
+
+
+def test_urls_queued_behind_one_slow_host_do_not_time_out(slow_host, cache):
+    # 24 URLs, 2 at a time, 0.2 s each: 2.4 s in all, well past the 1 s timeout per check
+    urls = [f"{slow_host}/{i}.jpg" for i in range(24)]
+    results = validate_urls(urls, cache=cache, per_host_limit=2, timeout=1.0)
+    assert [r['error'] for r in results.values() if not r['ok']] == []
+
+
+def test_connection_failures_are_unknown_not_invalid(cache):
+    url = _refused_url()
+    result = validate_urls([url], cache=cache, timeout=1.0)[url]
+    assert result['ok'] is None
+    assert result['status'] is None
+    # Not cached, so the next run checks again
+    assert cache.get_many([url]) == {}
+
+
+def test_validate_images_keeps_rows_it_could_not_check(slow_host, cache):
+    unreachable = _refused_url()
+    chunk = pd.DataFrame({'PLU': [1, 2, 3], 'Image Links': [f"{slow_host}/1.jpg", unreachable, None]})
+    stage = validate_images(cache=cache)
+    kept = pd.concat(list(stage.run(iter([chunk]))))
+    assert kept['PLU'].tolist() == [1, 2]
+    assert stage.stats['unknown'] == 1
+    assert stage.stats['invalid'] == 0
@@ -0,0 +1,38 @@
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog.imports import read_updates
+from catalog.store import CatalogStore
+
+
+@pytest.fixture
+def store():
+    return CatalogStore(pd.DataFrame({
+        'PLU': [101, 102, 103],
+        'Name': ["Red Apple", "Green Pear", "Banana"],
+        'Category 1': ["Fruit", "Fruit", "Fruit"],
+        'Base Price': [1.0, 2.0, 3.0],
+        'Stock Quantity': [5, 5, 5],
+        'Stock Status': ["IN_STOCK", "IN_STOCK", "IN_STOCK"],
+    }))
+
+
+def test_reads_aliased_headers(store):
+    plan = read_updates(store, io.StringIO("plu,price,stock\n102,2.5,7\n999,1,1\n"), "stock.csv")
+    assert plan.rows.tolist() == [1]
+    assert plan.updates['Base Price'][1].tolist() == [2.5]
+    assert plan.report['unknown_plus'].tolist() == [999]
+
+
+@pytest.mark.parametrize("header, clash", [
+    ("PLU,Price,Base Price", "Price, Base Price"),
+    ("PLU,Stock,Stock Quantity", "Stock, Stock Quantity"),
+])
+def test_headers_naming_the_same_column_are_rejected(store, header, clash):
+    with pytest.raises(ValueError, match=clash):
+        read_updates(store, io.StringIO(f"{header}\n101,1,2\n"), "stock.csv")
@@ -0,0 +1,81 @@
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventoryUpload.jobs import DONE, QUEUED, RUNNING, SyncQueue, SyncWorkers
+
+
+def _rows(plus, location="Times Square"):
+    return pd.DataFrame({
+        'location': location, 'plu': plus, 'stock status': "IN_STOCK", 'stock': 10, 'price': 1.5,
+    })
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "sync_jobs.sqlite"
+
+
+def test_run_pending_uploads_queued_jobs(path):
+    queue = SyncQueue(path)
+    uploads = []
+
+    def upload(account_id, callback_url, upload_df, chunk_rows, on_chunk):
+        uploads.append((account_id, sorted(upload_df['plu'])))
+        on_chunk({'rows': len(upload_df)})
+        return {'chunks': 1, 'rows': len(upload_df), 'bytes_sent': 10, 'seconds': 0.1,
+                'bytes_per_second': 100.0, 'chunk_latencies': [0.1], 'file_ids': ["f1"], 'results': []}
+
+    job_id = queue.enqueue("acc", "http://cb", _rows([1, 2]))
+    # Merged into the queued job, latest value winning
+    assert queue.enqueue("acc", "http://cb", _rows([2, 3])) == job_id
+
+    assert SyncWorkers(queue, upload=upload).run_pending() == 1
+    assert uploads == [("acc", [1, 2, 3])]
+    job = queue.get(job_id)
+    assert job['status'] == DONE
+    assert (job['rows_done'], job['chunks_done'], job['report']['file_ids']) == (3, 1, ["f1"])
+
+
+def test_failed_upload_keeps_rows_for_retry(path):
+    queue = SyncQueue(path)
+
+    def upload(*args, **kwargs):
+        raise RuntimeError("signed URL refused")
+
+    job_id = queue.enqueue("acc", "http://cb", _rows([1]))
+    SyncWorkers(queue, upload=upload).run_pending()
+    assert queue.get(job_id)['error'] == "signed URL refused"
+    queue.retry(job_id)
+    assert queue.get(job_id)['status'] == QUEUED
+    assert len(queue.job_rows(job_id)) == 1
+
+
+def test_live_job_is_not_taken_over_by_another_queue(path):
+    first, second = SyncQueue(path), SyncQueue(path)
+    job_id = first.enqueue("acc", "http://cb", _rows([1]))
+    assert first.claim("worker-1")['id'] == job_id
+
+    # A second process starting up (or claiming) leaves the heartbeating job alone
+    second.requeue_interrupted()
+    assert second.claim("worker-2") is None
+    job = second.get(job_id)
+    assert (job['status'], job['worker_id']) == (RUNNING, "worker-1")
+    assert first.heartbeat(job_id, "worker-1")
+    assert not first.heartbeat(job_id, "worker-2")
+
+
+def test_stale_job_is_requeued(path):
+    first, second = SyncQueue(path), SyncQueue(path)
+    job_id = first.enqueue("acc", "http://cb", _rows([1]))
+    first.claim("worker-1")
+    time.sleep(0.05)
+
+    job = second.claim("worker-2", lease=0.01)
+    assert (job['id'], job['worker_id']) == (job_id, "worker-2")
+    # The first worker lost its lease
+    assert not first.heartbeat(job_id, "worker-1")
@@ -0,0 +1,91 @@
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog.locations import LocationInventory
+from inventoryUpload.journal import SyncJournal
+from inventoryUpload.pull import PullState, pull_inventory
+
+LOCATION = "Times Square"
+
+
+class _Listing(BaseHTTPRequestHandler):
+    """Inventory listing without page metadata: a bare list per page."""
+    items = []
+    requested = []
+    fail_page = None
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        page, size = int(query['page'][0]), int(query['pageSize'][0])
+        self.requested.append(page)
+        if page == self.fail_page:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(self.items[(page - 1) * size:page * size]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def listing():
+    _Listing.items, _Listing.requested, _Listing.fail_page = [], [], None
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Listing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield _Listing, f"http://127.0.0.1:{server.server_address[1]}/inventory"
+    server.shutdown()
+    server.server_close()
+
+
+def _no_auth(account_id):
+    return {}
+
+
+def test_items_without_a_price_are_recorded_at_the_inventory_price(listing, tmp_path):
+    handler, url = listing
+    handler.items = [
+        {'plu': 1, 'stockStatus': "IN_STOCK", 'stock': 4},
+        {'plu': 2, 'stockStatus': "OUT_OF_STOCK", 'stock': 0, 'price': 9.5},
+    ]
+    inventory = LocationInventory([1, 2], [2.5, 3.0], [LOCATION])
+    journal = SyncJournal(tmp_path / "journal.sqlite")
+    pull_inventory("acc", PullState(tmp_path / "pull.sqlite"), url=url, location=LOCATION,
+                   journal=journal, inventory=inventory, headers=_no_auth)
+
+    acked = journal.load().sort_values('plu')
+    assert acked['price'].tolist() == [2.5, 9.5]
+    assert acked['stock'].tolist() == [4, 0]
+    # Nothing to upload back for what was just pulled
+    inventory.adopt(PullState(tmp_path / "pull.sqlite").load())
+    assert journal.diff(inventory.upload_rows([0, 0], [0, 1])).empty
+
+
+def test_resume_without_page_metadata_skips_stored_pages(listing, tmp_path):
+    handler, url = listing
+    handler.items = [{'plu': plu, 'stock': 1} for plu in range(1, 8)]
+    state = PullState(tmp_path / "pull.sqlite")
+    handler.fail_page = 3
+    with pytest.raises(Exception):
+        pull_inventory("acc", state, url=url, location=LOCATION, page_size=2, headers=_no_auth)
+    assert handler.requested == [1, 2, 3]
+
+    handler.fail_page, handler.requested[:] = None, []
+    report = pull_inventory("acc", state, url=url, location=LOCATION, page_size=2, headers=_no_auth)
+    # Page 1 is asked again for its metadata; page 2 was stored
+    assert handler.requested == [1, 3, 4]
+    assert report['resumed'] and report['pages'] == 2
+    assert sorted(state.load()['plu']) == list(range(1, 8))
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from catalog.search import SearchService
+from catalog.store import CatalogStore
+
+
+@pytest.fixture
+def store():
+    return CatalogStore(pd.DataFrame({
+        'PLU': [101, 102, 103, 104],
+        'Name': ["Red Apple", "Pear - large", "Redcurrant Jam", "Green Pear"],
+        'Category 1': ["Fruit", "Fruit", "Jam", "Fruit"],
+        'Base Price': [1.0, 2.0, 3.0, 4.0],
+        'Stock Quantity': [5, 5, 5, 5],
+        'Stock Status': ["IN_STOCK"] * 4,
+    }))
+
+
+def test_ranks_whole_words_first(store):
+    assert SearchService(store).search(store, "red").tolist() == [0, 2]
+
+
+def test_typing_on_narrows_from_the_shorter_query(store):
+    service = SearchService(store)
+    service.search(store, "pe")
+    assert service.search(store, "pear g").tolist() == [3]
+
+
+def test_results_do_not_depend_on_a_cached_substring_fallback(store):
+    fresh = SearchService(store).search(store, "-red").tolist()
+    service = SearchService(store)
+    # No word in "-": answered by the substring fallback
+    assert service.search(store, "-").tolist() == [1]
+    assert service.search(store, "-red").tolist() == fresh == [0, 2]
@@ -0,0 +1,43 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from authentication.tokening import TokenProvider
+
+
+class _CountingProvider(TokenProvider):
+    def __init__(self, delay: float = 0.0):
+        super().__init__("client", "secret", cache_dir=None)
+        self.delay = delay
+        self.fetches = 0
+
+    def _fetch(self):
+        self.fetches += 1
+        time.sleep(self.delay)
+        return f"token-{self.fetches}", 3600
+
+
+def test_concurrent_callers_share_one_fetch():
+    provider = _CountingProvider(delay=0.2)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(provider.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    provider.close()
+    assert provider.fetches == 1
+    assert tokens == ["token-1"] * 8
+
+
+def test_caller_arriving_after_the_fetch_reuses_its_token():
+    provider = _CountingProvider()
+    assert provider.get() == "token-1"
+    # A caller that saw the expired token before the fetch finished, reaching _refresh after it
+    assert provider._refresh() == "token-1"
+    assert provider.fetches == 1
+    # The background refresh still replaces the held token
+    assert provider._refresh(force=True) == "token-2"
+    provider.close()